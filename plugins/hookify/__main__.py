@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Command line entry point: `python3 -m hookify <command>`.
+
+Run from the directory containing the plugin (or with it on PYTHONPATH):
+
+    python3 -m hookify serve [--socket PATH] [--idle-timeout SECONDS]
+    python3 -m hookify bench INPUTS [--root DIR] [--iterations N]
+"""
+
+import argparse
+import sys
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='hookify')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser(
+        'serve', help='run the resident rule server for the hook executors')
+    serve_parser.add_argument('--socket', help='Unix socket path '
+                              '(default: $HOOKIFY_SOCKET or a per-user path)')
+    serve_parser.add_argument('--idle-timeout', type=float, default=None,
+                              help='exit after this many idle seconds')
+
+    bench_parser = commands.add_parser(
+        'bench', help='replay recorded hook inputs through the rules and '
+                      'report latency per event type and per rule')
+    bench_parser.add_argument('inputs', help='directory or .json/.jsonl file of '
+                              'hook input payloads')
+    bench_parser.add_argument('--root', help='project directory holding .claude/ '
+                              '(default: current directory)')
+    bench_parser.add_argument('--iterations', type=int, default=1,
+                              help='times to replay the whole corpus')
+    bench_parser.add_argument('--slow-regex-ms', type=float, default=50.0,
+                              help='flag a regex whose single search takes longer')
+    bench_parser.add_argument('--top', type=int, default=20,
+                              help='rules to list, slowest first')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        from hookify.core import server
+        idle = args.idle_timeout
+        if idle is None:
+            idle = server.DEFAULT_IDLE_TIMEOUT_SECONDS
+        return server.serve(args.socket, idle)
+    if args.command == 'bench':
+        from hookify.core import replay
+        try:
+            return replay.run(args.inputs, root=args.root,
+                              iterations=max(args.iterations, 1),
+                              slow_regex_ms=args.slow_regex_ms, top=args.top)
+        except OSError as e:
+            print(f"hookify bench: {e}", file=sys.stderr)
+            return 2
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
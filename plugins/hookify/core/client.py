@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Client shim for the resident hookify server.
+
+The hook executors call evaluate_remote() before importing the rule loader
+and engine. When a server (`python3 -m hookify serve`) is listening it does
+the evaluation with rules already parsed and compiled; otherwise this
+returns None and the hook evaluates in-process as before. Keep this module
+free of heavy imports: it runs on every hook invocation.
+"""
+
+import json
+import os
+import socket
+import stat
+import struct
+import tempfile
+from typing import Any, Dict, Optional
+
+# Generous, but well under the 10s hook timeout so the in-process fallback
+# still has time to run if the server wedges.
+CLIENT_TIMEOUT_SECONDS = 2.0
+
+# Replies larger than this are treated as a protocol error
+_MAX_REPLY_BYTES = 4 * 1024 * 1024
+
+
+def socket_path() -> str:
+    """Path of the server's Unix socket.
+
+    HOOKIFY_SOCKET overrides it; otherwise `server.sock` in a per-user,
+    owner-only directory under XDG_RUNTIME_DIR (or the temp dir).
+    """
+    override = os.environ.get('HOOKIFY_SOCKET')
+    if override:
+        return override
+    base = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(base, f'hookify-{os.getuid()}', 'server.sock')
+
+
+def trusted_dir(path: str) -> bool:
+    """True if no other user can put or swap an entry into directory path.
+
+    It must be owned by this user or root: a directory's owner can rename
+    or remove anything in it, sticky bit or not. Group and others may not
+    write to it, unless it is sticky (like /tmp), where they can't rename
+    or remove an entry they don't own.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid not in (os.getuid(), 0):
+        return False
+    return bool(st.st_mode & stat.S_ISVTX) or not st.st_mode & 0o022
+
+
+def trusted_socket(path: str) -> bool:
+    """True if path is a socket owned by this user in a trusted_dir().
+
+    The socket gets every tool input (commands, file contents) and its
+    answer can switch block rules off, so one another local user planted
+    at a predictable path must never be used.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return False
+    return trusted_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def _peer_is_me(sock: socket.socket) -> bool:
+    """Check the connected server's uid where the platform reports it."""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return True  # the lstat checks in trusted_socket() still apply
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize('3i'))
+    _pid, uid, _gid = struct.unpack('3i', creds)
+    return uid == os.getuid()
+
+
+def evaluate_remote(input_data: Dict[str, Any],
+                    event: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Ask the resident server to evaluate rules for this hook input.
+
+    Args:
+        input_data: Hook input JSON
+        event: Event filter the hook would pass to load_rules()
+
+    Returns:
+        The same response dict RuleEngine.evaluate_rules() would return, or
+        None if no server is reachable (or it failed, or its socket isn't
+        provably this user's — see trusted_socket()) and the caller should
+        evaluate in-process. Set HOOKIFY_DAEMON=0 to always get None.
+    """
+    if os.environ.get('HOOKIFY_DAEMON', '1') == '0':
+        return None
+    path = socket_path()
+    if not trusted_socket(path):
+        return None
+
+    request = json.dumps({
+        'cwd': os.getcwd(),
+        'event': event,
+        'input': input_data,
+    }).encode('utf-8') + b'\n'
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT_SECONDS)
+            sock.connect(path)
+            if not _peer_is_me(sock):
+                return None
+            sock.sendall(request)
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            received = 0
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > _MAX_REPLY_BYTES:
+                    return None
+                chunks.append(chunk)
+        reply = json.loads(b''.join(chunks))
+    except (OSError, ValueError):
+        # Stale socket, server restarting, timeout, garbled reply, ...
+        return None
+
+    if not isinstance(reply, dict) or not isinstance(reply.get('result'), dict):
+        return None
+    return reply['result']
@@ -7,11 +7,27 @@ Loads and parses .claude/hookify.*.local.md files.
 import os
 import sys
 import glob
+import json
 import re
-from typing import List, Optional, Dict, Any
+import tempfile
+import time
+from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass, field
 
 
+# On-disk cache of parsed rule files. Lives next to the rules and matches the
+# `.claude/*.local.json` gitignore entry so it is never committed. Each entry
+# is keyed by path and validated against (mtime_ns, size), so editing a rule
+# invalidates only that rule. Set HOOKIFY_RULE_CACHE=0 to bypass it.
+RULE_CACHE_PATH = os.path.join('.claude', 'hookify.rules-cache.local.json')
+RULE_CACHE_VERSION = 1
+
+# Files modified this recently are parsed but not cached: an edit landing in
+# the same mtime tick with an unchanged size would otherwise be invisible
+# (the same "racily clean" problem git solves for its index).
+_RACY_WINDOW_NS = 2_000_000_000
+
+
 @dataclass
 class Condition:
     """A single condition for matching."""
@@ -40,6 +56,7 @@ class Rule:
     action: str = "warn"  # "warn" or "block" (future)
     tool_matcher: Optional[str] = None  # Override tool matching
     message: str = ""  # Message body from markdown
+    scope: Optional[str] = None  # Transcript scope: "turn" or "session"
 
     @classmethod
     def from_dict(cls, frontmatter: Dict[str, Any], message: str) -> 'Rule':
@@ -80,7 +97,8 @@ class Rule:
             conditions=conditions,
             action=frontmatter.get('action', 'warn'),
             tool_matcher=frontmatter.get('tool_matcher'),
-            message=message.strip()
+            message=message.strip(),
+            scope=frontmatter.get('scope')
         )
 
 
@@ -88,8 +106,6 @@ def extract_frontmatter(content: str) -> tuple[Dict[str, Any], str]:
     """Extract YAML frontmatter and message body from markdown.
 
     Returns (frontmatter_dict, message_body).
-
-    Supports multi-line dictionary items in lists by preserving indentation.
     """
     if not content.startswith('---'):
         return {}, content
@@ -99,9 +115,18 @@ def extract_frontmatter(content: str) -> tuple[Dict[str, Any], str]:
     if len(parts) < 3:
         return {}, content
 
-    frontmatter_text = parts[1]
-    message = parts[2].strip()
+    return _parse_simple_frontmatter(parts[1]), parts[2].strip()
+
+
+def _parse_simple_frontmatter(frontmatter_text: str) -> Dict[str, Any]:
+    """Line-based parser for the frontmatter shapes hookify rules use.
+
+    This, not a YAML library, defines how rule files read, whatever is
+    installed: quoted values are taken as written, with no escape
+    processing, and a `#` after a value is part of it.
 
+    Supports multi-line dictionary items in lists by preserving indentation.
+    """
     # Simple YAML parser that handles indented list items
     frontmatter = {}
     lines = frontmatter_text.split('\n')
@@ -192,14 +217,26 @@ def extract_frontmatter(content: str) -> tuple[Dict[str, Any], str]:
             current_list.append(current_dict)
         frontmatter[current_key] = current_list
 
-    return frontmatter, message
+    return frontmatter
+
+
+def rule_file_paths(root: Optional[str] = None) -> List[str]:
+    """Sorted hookify.*.local.md paths under <root>/.claude (default: cwd)."""
+    pattern = os.path.join(root or '', '.claude', 'hookify.*.local.md')
+    return sorted(glob.glob(pattern))
 
 
-def load_rules(event: Optional[str] = None) -> List[Rule]:
+def load_rules(event: Optional[str] = None, use_cache: bool = True,
+               root: Optional[str] = None) -> List[Rule]:
     """Load all hookify rules from .claude directory.
 
+    Parsed rule files are memoized in RULE_CACHE_PATH; only files whose
+    (mtime_ns, size) changed since the last load are re-read and re-parsed.
+
     Args:
         event: Optional event filter ("bash", "file", "stop", etc.)
+        use_cache: Read/update the on-disk rule cache (default True)
+        root: Project directory holding .claude/ (default: current directory)
 
     Returns:
         List of enabled Rule objects matching the event.
@@ -207,14 +244,38 @@ def load_rules(event: Optional[str] = None) -> List[Rule]:
     rules = []
 
     # Find all hookify.*.local.md files
-    pattern = os.path.join('.claude', 'hookify.*.local.md')
-    files = glob.glob(pattern)
+    files = rule_file_paths(root)
+
+    use_cache = use_cache and os.environ.get('HOOKIFY_RULE_CACHE', '1') != '0'
+    cache = _read_rule_cache(root) if use_cache else {}
+    fresh_cache = {}
+    now_ns = time.time_ns()
 
     for file_path in files:
+        # Cache keys stay relative so every caller shares one cache file
+        key = os.path.relpath(file_path, root) if root else file_path
         try:
-            rule = load_rule_file(file_path)
-            if not rule:
-                continue
+            st = os.stat(file_path)
+            entry = cache.get(key)
+            if (entry and entry.get('mtime_ns') == st.st_mtime_ns
+                    and entry.get('size') == st.st_size):
+                frontmatter, message = entry['frontmatter'], entry['message']
+                fresh_cache[key] = entry
+            else:
+                parsed = _parse_rule_file(file_path)
+                if parsed is None:
+                    continue
+                frontmatter, message = parsed
+                # Too fresh to trust the stat key; re-parse next time.
+                if now_ns - st.st_mtime_ns >= _RACY_WINDOW_NS:
+                    fresh_cache[key] = {
+                        'mtime_ns': st.st_mtime_ns,
+                        'size': st.st_size,
+                        'frontmatter': frontmatter,
+                        'message': message,
+                    }
+
+            rule = Rule.from_dict(frontmatter, message)
 
             # Filter by event if specified
             if event:
@@ -238,15 +299,70 @@ def load_rules(event: Optional[str] = None) -> List[Rule]:
             print(f"Warning: Unexpected error loading {file_path} ({type(e).__name__}): {e}", file=sys.stderr)
             continue
 
+    if use_cache and fresh_cache != cache:
+        _write_rule_cache(fresh_cache, root)
+
     return rules
 
 
+def _read_rule_cache(root: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Read the on-disk rule cache. Returns {} if missing, stale or corrupt."""
+    try:
+        with open(os.path.join(root or '', RULE_CACHE_PATH), 'r') as f:
+            data = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != RULE_CACHE_VERSION:
+        return {}
+    entries = data.get('rules')
+    return entries if isinstance(entries, dict) else {}
+
+
+def _write_rule_cache(entries: Dict[str, Dict[str, Any]],
+                      root: Optional[str] = None) -> None:
+    """Atomically replace the on-disk rule cache. Failures are ignored —
+    the cache is an optimization and the next load simply re-parses."""
+    cache_path = os.path.join(root or '', RULE_CACHE_PATH)
+    cache_dir = os.path.dirname(cache_path)
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix='.hookify-cache-', dir=cache_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': RULE_CACHE_VERSION, 'rules': entries}, f)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+    except (IOError, OSError, TypeError, ValueError):
+        pass
+    finally:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
 def load_rule_file(file_path: str) -> Optional[Rule]:
     """Load a single rule file.
 
     Returns:
         Rule object or None if file is invalid.
     """
+    parsed = _parse_rule_file(file_path)
+    if parsed is None:
+        return None
+    try:
+        return Rule.from_dict(*parsed)
+    except (ValueError, KeyError, AttributeError, TypeError) as e:
+        print(f"Error: Malformed rule file {file_path}: {e}", file=sys.stderr)
+        return None
+
+
+def _parse_rule_file(file_path: str) -> Optional[Tuple[Dict[str, Any], str]]:
+    """Read and parse a rule file into (frontmatter, message).
+
+    Returns:
+        (frontmatter, message) or None if the file is unreadable or invalid.
+    """
     try:
         with open(file_path, 'r') as f:
             content = f.read()
@@ -257,8 +373,7 @@ def load_rule_file(file_path: str) -> Optional[Rule]:
             print(f"Warning: {file_path} missing YAML frontmatter (must start with ---)", file=sys.stderr)
             return None
 
-        rule = Rule.from_dict(frontmatter, message)
-        return rule
+        return frontmatter, message
 
     except (IOError, OSError, PermissionError) as e:
         print(f"Error: Cannot read {file_path}: {e}", file=sys.stderr)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""Replay recorded hook inputs through hookify rules: `python3 -m hookify bench`.
+
+Shows how a rule pack performs on real traffic before it is rolled out.
+Payloads are the JSON objects the hook executors read on stdin, as single
+.json files, or one per line in .jsonl files, in a directory tree.
+
+The harness:
+  1. loads the rules for each event type once, the way hooks/*.py do
+  2. probes every regex_match condition on the corpus fields it would read
+     and flags patterns that are slow outright or whose time grows much
+     faster than the input (catastrophic backtracking). Probes are cut off
+     by a timer, and flagged rules are left out of the timed replay, so a
+     runaway pattern can't hang the harness.
+  3. replays every payload through RuleEngine.evaluate_rules() and reports
+     throughput and p50/p95/p99 latency per event type
+  4. replays again with profiling for p50/p95/p99 per rule
+
+The transcript offset index is disabled while replaying, so every Stop
+payload is timed as a full scan and no index files are written.
+"""
+
+import json
+import os
+import re
+import signal
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from hookify.core.config_loader import Rule, load_rules
+from hookify.core.rule_engine import RuleEngine, event_for_input
+
+# Allowed growth in search time relative to the growth in input length;
+# re.search is legitimately quadratic for patterns like `a.*b`, so only
+# growth steeper than this exponent is flagged
+_PROBE_EXPONENT = 2.5
+# Searches faster than this are too noisy to judge growth on
+_PROBE_NOISE_MS = 0.5
+
+
+class _ProbeTimeout(Exception):
+    """Raised from SIGALRM to abandon a runaway regex search."""
+
+
+def _on_alarm(signum, frame):
+    raise _ProbeTimeout()
+
+
+def iter_payloads(path: str) -> Iterator[Tuple[str, Any]]:
+    """Yield (source, payload) for each recorded hook input under path.
+
+    A payload that isn't valid JSON is yielded as None so callers can count
+    it; source is "file" or "file:line".
+    """
+    if os.path.isdir(path):
+        files = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            files.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                         if name.endswith(('.json', '.jsonl')))
+    else:
+        files = [path]
+
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if not file_path.endswith('.jsonl'):
+                try:
+                    yield file_path, json.load(f)
+                except ValueError:
+                    yield file_path, None
+                continue
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield f'{file_path}:{line_number}', json.loads(line)
+                except ValueError:
+                    yield f'{file_path}:{line_number}', None
+
+
+def event_label(input_data: Dict[str, Any]) -> str:
+    """Reporting group: hook event plus the rule event it dispatches to."""
+    event = event_for_input(input_data)
+    return f"{input_data.get('hook_event_name') or '?'}/{event or 'all'}"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples (0.0 if empty)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _latency(samples: List[float]) -> str:
+    return (f"p50 {percentile(samples, 50):8.3f} ms  "
+            f"p95 {percentile(samples, 95):8.3f} ms  "
+            f"p99 {percentile(samples, 99):8.3f} ms")
+
+
+def _timed_search(regex: re.Pattern, text: str, limit_ms: float) -> Optional[float]:
+    """Milliseconds regex.search(text) took, or None if it ran past limit_ms.
+
+    The regex engine checks for signals while matching, so a SIGALRM timer
+    interrupts even an exponential search (where setitimer is available and
+    this is the main thread; elsewhere the search is not bounded).
+    """
+    guarded = hasattr(signal, 'setitimer')
+    if guarded:
+        try:
+            previous = signal.signal(signal.SIGALRM, _on_alarm)
+        except ValueError:  # not the main thread
+            guarded = False
+    start = time.perf_counter()
+    try:
+        if guarded:
+            signal.setitimer(signal.ITIMER_REAL, limit_ms / 1000)
+        regex.search(text)
+    except _ProbeTimeout:
+        return None
+    finally:
+        if guarded:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return (time.perf_counter() - start) * 1000
+
+
+def probe_regex(regex: re.Pattern, text: str, slow_ms: float) -> Optional[str]:
+    """Why regex looks catastrophic on text, or None if it scales acceptably.
+
+    Flags a search of the whole text slower than slow_ms (abandoning it
+    there), and one whose time grows steeper than the input length to the
+    power _PROBE_EXPONENT, comparing against both halves: what triggers
+    backtracking may sit at either end of the text.
+    """
+    elapsed = _timed_search(regex, text, slow_ms)
+    if elapsed is None:
+        return f"over {slow_ms:g} ms on {len(text)} chars"
+    if elapsed <= _PROBE_NOISE_MS or len(text) < 2:
+        return None
+    half = len(text) // 2
+    for part in (text[:half], text[-half:]):
+        part_ms = _timed_search(regex, part, slow_ms)
+        if part_ms is None:
+            continue
+        if elapsed > max(part_ms, _PROBE_NOISE_MS / 2) * (len(text) / half) ** _PROBE_EXPONENT:
+            return f"{part_ms:.2f} ms on {half} chars -> {elapsed:.2f} ms on {len(text)}"
+    return None
+
+
+def find_backtracking(engine: RuleEngine, rules: Dict[str, List[Rule]],
+                      payloads: List[Dict[str, Any]],
+                      slow_ms: float) -> Dict[str, str]:
+    """{rule name: finding} for rules with a regex flagged by probe_regex()."""
+    flagged: Dict[str, str] = {}
+    probed = set()
+    for input_data in payloads:
+        tool_name = input_data.get('tool_name', '')
+        tool_input = input_data.get('tool_input') or {}
+        for rule in rules[event_label(input_data)]:
+            if rule.name in flagged:
+                continue
+            for condition in rule.conditions:
+                if condition.operator != 'regex_match':
+                    continue
+                text = engine._extract_field(condition.field, tool_name,
+                                             tool_input, input_data)
+                if not text or (condition.pattern, text) in probed:
+                    continue
+                probed.add((condition.pattern, text))
+                regex, _ = engine._compiled_pattern(condition.pattern)
+                finding = probe_regex(regex, text, slow_ms) if regex else None
+                if finding:
+                    flagged[rule.name] = f"{condition.field} /{condition.pattern}/: {finding}"
+                    break
+    return flagged
+
+
+def run(path: str, root: Optional[str] = None, iterations: int = 1,
+        slow_regex_ms: float = 50.0, top: int = 20, out=sys.stdout) -> int:
+    """Replay the payloads under path and print the report to out.
+
+    Args:
+        path: Directory or .json/.jsonl file of recorded hook inputs
+        root: Project directory holding .claude/ rules (default: cwd)
+        iterations: Times to replay the whole corpus
+        slow_regex_ms: A single regex search slower than this is flagged
+        top: Rules to list, slowest p99 first
+
+    Returns:
+        Exit status: 0, or 1 if any rule was flagged or no payload was usable
+    """
+    payloads = []
+    invalid = []
+    for source, payload in iter_payloads(path):
+        if isinstance(payload, dict):
+            payloads.append(payload)
+        else:
+            invalid.append(source)
+    if invalid:
+        print(f"skipped {len(invalid)} invalid payload(s), first: {invalid[0]}", file=out)
+    if not payloads:
+        print("no hook inputs to replay", file=out)
+        return 1
+
+    saved_index = os.environ.get('HOOKIFY_TRANSCRIPT_INDEX')
+    os.environ['HOOKIFY_TRANSCRIPT_INDEX'] = '0'
+    try:
+        # Rules per reporting group, loaded the way each hook executor does
+        rules: Dict[str, List[Rule]] = {}
+        load_ms: Dict[str, float] = {}
+        for input_data in payloads:
+            label = event_label(input_data)
+            if label not in rules:
+                start = time.perf_counter()
+                rules[label] = load_rules(event=event_for_input(input_data), root=root)
+                load_ms[label] = (time.perf_counter() - start) * 1000
+
+        flagged = find_backtracking(RuleEngine(), rules, payloads, slow_regex_ms)
+        for label in rules:
+            rules[label] = [rule for rule in rules[label] if rule.name not in flagged]
+
+        engine = RuleEngine()
+        by_event: Dict[str, List[float]] = {}
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for input_data in payloads:
+                label = event_label(input_data)
+                start = time.perf_counter()
+                engine.evaluate_rules(rules[label], input_data)
+                by_event.setdefault(label, []).append((time.perf_counter() - start) * 1000)
+        total_s = time.perf_counter() - started
+
+        profiler = RuleEngine(profile=True)
+        by_rule: Dict[str, List[float]] = {}
+        matches: Dict[str, int] = {}
+        for _ in range(iterations):
+            for input_data in payloads:
+                profiler.timings = {}
+                result = profiler.evaluate_rules(rules[event_label(input_data)], input_data)
+                message = result.get('systemMessage', '')
+                for name, (elapsed, _, _) in profiler.timings.items():
+                    by_rule.setdefault(name, []).append(elapsed)
+                    if f'**[{name}]**' in message:
+                        matches[name] = matches.get(name, 0) + 1
+    finally:
+        if saved_index is None:
+            os.environ.pop('HOOKIFY_TRANSCRIPT_INDEX', None)
+        else:
+            os.environ['HOOKIFY_TRANSCRIPT_INDEX'] = saved_index
+
+    evaluations = len(payloads) * iterations
+    print(f"{len(payloads)} hook inputs x {iterations}: {evaluations} evaluations in "
+          f"{total_s:.2f} s ({evaluations / total_s if total_s else 0:.0f}/s)", file=out)
+
+    print("\nper event type", file=out)
+    for label in sorted(by_event):
+        print(f"  {label:<28} {_latency(by_event[label])}  n={len(by_event[label])}  "
+              f"({len(rules[label])} rules, loaded in {load_ms[label]:.1f} ms)", file=out)
+
+    print(f"\nper rule (slowest p99 first, top {top})", file=out)
+    ranked = sorted(by_rule.items(), key=lambda item: -percentile(item[1], 99))
+    for name, samples in ranked[:top]:
+        print(f"  {name:<28} {_latency(samples)}  n={len(samples)}  "
+              f"matched {matches.get(name, 0)}", file=out)
+
+    if flagged:
+        print("\nregexes with catastrophic backtracking "
+              "(rules left out of the replay above)", file=out)
+        for name, finding in sorted(flagged.items()):
+            print(f"  {name}: {finding}", file=out)
+        return 1
+    return 0
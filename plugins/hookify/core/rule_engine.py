@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """Rule evaluation engine for hookify plugin."""
 
+import itertools
 import re
 import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 
 # Import from local module
 from hookify.core.config_loader import Rule, Condition
+from hookify.core.transcript import match_transcript, read_transcript, transcript_scope
+from hookify.matchers.literal_prefilter import (
+    FoldedText, Requirement, required_literals
+)
 
 
 # Cache compiled regexes (max 128 patterns)
@@ -24,38 +32,291 @@ def compile_regex(pattern: str) -> re.Pattern:
     return re.compile(pattern, re.IGNORECASE)
 
 
+@lru_cache(maxsize=128)
+def split_tool_matcher(matcher: str) -> Tuple[str, ...]:
+    """Split a tool_matcher like "Edit|Write" into its tool names (cached)."""
+    return tuple(matcher.split('|'))
+
+
+def event_for_input(input_data: Dict[str, Any]) -> Optional[str]:
+    """Map hook input to the rule event the hook executors load rules for.
+
+    Returns "stop", "prompt", "bash" or "file", or None when every event
+    applies (other tools), mirroring the event= filters in hooks/*.py.
+    """
+    hook_event = input_data.get('hook_event_name', '')
+    if hook_event == 'Stop':
+        return 'stop'
+    if hook_event == 'UserPromptSubmit':
+        return 'prompt'
+    tool_name = input_data.get('tool_name', '')
+    if tool_name == 'Bash':
+        return 'bash'
+    if tool_name in ['Edit', 'Write', 'MultiEdit']:
+        return 'file'
+    return None
+
+
+# evaluate_rules(event=...) default: derive the event from the input
+_INFER_EVENT = object()
+
+# pattern -> (compiled regex, literal prefilter requirement)
+PatternTable = Dict[str, Tuple[re.Pattern, Requirement]]
+
+# Relative cost of producing a field's value: transcript reads a file, file
+# contents can be large, the rest are short strings from the hook input
+FIELD_COSTS = {
+    'transcript': 100.0,
+    'content': 8.0, 'new_text': 8.0, 'new_string': 8.0,
+    'old_text': 8.0, 'old_string': 8.0,
+    'user_prompt': 2.0,
+}
+
+# Relative cost of each operator once the value is extracted
+OPERATOR_COSTS = {
+    'equals': 1.0, 'starts_with': 1.0, 'ends_with': 1.0,
+    'contains': 2.0, 'not_contains': 2.0,
+    'regex_match': 5.0,
+}
+
+# Conditions with selectivity statistics kept per engine; reset beyond this
+_MAX_CONDITION_STATS = 4096
+
+
+def condition_cost(condition: Condition) -> float:
+    """Estimated cost of checking condition: field cost x operator cost."""
+    return (FIELD_COSTS.get(condition.field, 1.0)
+            * OPERATOR_COSTS.get(condition.operator, 2.0))
+
+
+class _Evaluation:
+    """Per-call scratch shared by every condition of one evaluate_rules().
+
+    Each field is extracted (and lowercased for the literal prefilter) once
+    however many conditions read it, and a condition repeated across rules
+    is only evaluated once. All transcript conditions of the candidate rules
+    are evaluated together, in one bounded (and, with a session id,
+    incremental) pass; see core/transcript.py.
+    """
+
+    __slots__ = ('engine', 'input_data', 'tool_name', 'tool_input',
+                 'patterns', 'candidates', 'check_tool', 'fields', 'results')
+
+    def __init__(self, engine: 'RuleEngine', input_data: Dict[str, Any],
+                 patterns: Optional[PatternTable] = None,
+                 candidates: Optional[List[Rule]] = None,
+                 check_tool: bool = True):
+        self.engine = engine
+        self.input_data = input_data
+        self.tool_name = input_data.get('tool_name', '')
+        self.tool_input = input_data.get('tool_input', {})
+        self.patterns = patterns
+        self.candidates = candidates or []
+        self.check_tool = check_tool
+        self.fields: Dict[str, Optional[FoldedText]] = {}
+        # (field, operator, pattern), plus the scope for transcript conditions
+        self.results: Dict[Tuple[str, ...], bool] = {}
+
+    def field(self, name: str) -> Optional[FoldedText]:
+        """Extracted value of field `name`, or None if not present."""
+        if name in self.fields:
+            return self.fields[name]
+        value = self.engine._extract_field(name, self.tool_name,
+                                          self.tool_input, self.input_data)
+        folded = FoldedText(value) if value is not None else None
+        self.fields[name] = folded
+        return folded
+
+    def reads_transcript(self, condition: Condition) -> bool:
+        """True if condition is matched against the transcript file."""
+        return (condition.field == 'transcript'
+                and 'transcript' not in self.tool_input
+                and bool(self.input_data.get('transcript_path')))
+
+    def transcript_result(self, condition: Condition, rule: Rule) -> bool:
+        """Result of a transcript condition within rule's transcript scope."""
+        key = ('transcript', condition.operator, condition.pattern,
+               transcript_scope(rule.scope))
+        if key not in self.results:
+            self.match_transcript()
+        return self.results.get(key, False)
+
+    def may_match(self, rule: Rule) -> bool:
+        """False if rule's tool matcher or any non-transcript condition
+        already rules it out (checking them is far cheaper than a scan)."""
+        if (self.check_tool and rule.tool_matcher
+                and not self.engine._matches_tool(rule.tool_matcher, self.tool_name)):
+            return False
+        return all(self.reads_transcript(condition)
+                   or self.engine._check_condition(condition, self.tool_name,
+                                                   self.tool_input, self.input_data,
+                                                   evaluation=self)
+                   for condition in rule.conditions)
+
+    def match_transcript(self, always: bool = False) -> None:
+        """Evaluate the transcript conditions of every candidate rule, in one
+        pass, unless no rule reading the transcript can still match.
+
+        Args:
+            always: Call match_transcript() even with nothing to evaluate,
+                so a Stop still moves the index's turn marker
+        """
+        reading = [rule for rule in self.candidates
+                   if any(self.reads_transcript(c) for c in rule.conditions)]
+        # All conditions, not just the viable rules', so the session index
+        # keeps covering the same set and stays incremental
+        pending: Dict[str, Dict[Tuple[str, ...], Condition]] = {
+            'session': {}, 'turn': {}}
+        if any(self.may_match(rule) for rule in reading):
+            for rule in reading:
+                scope = transcript_scope(rule.scope)
+                for condition in rule.conditions:
+                    if self.reads_transcript(condition):
+                        key = ('transcript', condition.operator, condition.pattern, scope)
+                        if key not in self.results:
+                            pending[scope][key] = condition
+        if not pending['session'] and not pending['turn'] and not always:
+            return
+
+        conditions = {}
+        for scope, by_key in pending.items():
+            conditions[scope] = []
+            for key, condition in by_key.items():
+                regex, requirement = None, ()
+                if condition.operator == 'regex_match':
+                    regex, requirement = self.engine._compiled_pattern(
+                        condition.pattern, self.patterns)
+                conditions[scope].append(
+                    (key, condition.operator, condition.pattern, regex, requirement))
+
+        results = match_transcript(
+            self.input_data['transcript_path'], conditions,
+            session_id=self.input_data.get('session_id'),
+            is_stop=self.input_data.get('hook_event_name') == 'Stop')
+        if results is None:
+            # Unreadable: behave as if the transcript were empty, as before
+            empty = FoldedText('')
+            results = {key: self.engine._apply_operator(condition, empty)
+                       for by_key in pending.values()
+                       for key, condition in by_key.items()}
+        self.results.update(results)
+
+    def finish(self) -> None:
+        """On Stop, make sure the transcript index records this turn's end
+        even if cheaper conditions ruled out every transcript condition."""
+        if (self.input_data.get('hook_event_name') == 'Stop'
+                and self.input_data.get('session_id')
+                and not any(key[0] == 'transcript' and len(key) == 4
+                            for key in self.results)
+                and any(self.reads_transcript(condition)
+                        for rule in self.candidates for condition in rule.conditions)):
+            self.match_transcript(always=True)
+
+
+class CompiledRuleSet:
+    """Rules indexed by event and tool name for fast dispatch.
+
+    Built once per rule set. Each rule lands in one event bucket ("all" rules
+    in every one) and in either the exact-tool buckets named by its
+    tool_matcher or the wildcard bucket. rules_for() merges the relevant
+    buckets back into file order and memoizes the result per (event, tool),
+    so a Bash call only ever touches Bash and wildcard rules.
+
+    Every regex_match pattern is also compiled up front together with its
+    literal prefilter, so large rule sets don't churn compile_regex's LRU.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        # (index, rule) pairs so merged buckets keep the original rule order
+        self._by_tool: Dict[str, List[Tuple[int, Rule]]] = {}
+        self._any_tool: List[Tuple[int, Rule]] = []
+        self._dispatch: Dict[Tuple[Optional[str], str], List[Rule]] = {}
+        self.patterns: PatternTable = {}
+
+        for index, rule in enumerate(self.rules):
+            for condition in rule.conditions:
+                if (condition.operator == 'regex_match'
+                        and condition.pattern not in self.patterns):
+                    try:
+                        regex = re.compile(condition.pattern, re.IGNORECASE)
+                    except re.error:
+                        # Left out; _regex_match reports it when evaluated
+                        continue
+                    self.patterns[condition.pattern] = (
+                        regex, required_literals(condition.pattern))
+
+            if not rule.tool_matcher or rule.tool_matcher == '*':
+                self._any_tool.append((index, rule))
+                continue
+            for tool in split_tool_matcher(rule.tool_matcher):
+                self._by_tool.setdefault(tool, []).append((index, rule))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def rules_for(self, event: Optional[str], tool_name: str) -> List[Rule]:
+        """Rules that can apply to `event` (None = any) and `tool_name`."""
+        key = (event, tool_name)
+        cached = self._dispatch.get(key)
+        if cached is not None:
+            return cached
+
+        candidates = self._any_tool + self._by_tool.get(tool_name, [])
+        candidates.sort(key=lambda pair: pair[0])
+        selected = [
+            rule for _, rule in candidates
+            if event is None or rule.event in ('all', event)
+        ]
+        self._dispatch[key] = selected
+        return selected
+
+
 class RuleEngine:
     """Evaluates rules against hook input data."""
 
-    def __init__(self):
-        """Initialize rule engine."""
-        # No need for instance cache anymore - using global lru_cache
-        pass
+    def __init__(self, profile: bool = False):
+        """Initialize rule engine.
 
-    def evaluate_rules(self, rules: List[Rule], input_data: Dict[str, Any]) -> Dict[str, Any]:
+        Args:
+            profile: Record per-rule and per-condition evaluation times for
+                profile_report()
+        """
+        # Compiled regexes use the global lru_cache. Per-condition
+        # [checked, passed] counts order each rule's conditions (see
+        # ordered_conditions()); they build up in a resident server.
+        self.condition_stats: Dict[Tuple[str, str, str], List[int]] = {}
+        self.profile = profile
+        # rule name -> [total ms, evaluations, {condition label: [ms, checks, passes]}]
+        self.timings: Dict[str, List[Any]] = {}
+
+    def evaluate_rules(self, rules: Union[List[Rule], CompiledRuleSet],
+                       input_data: Dict[str, Any],
+                       event: Any = _INFER_EVENT) -> Dict[str, Any]:
         """Evaluate all rules and return combined results.
 
         Checks all rules and accumulates matches. Blocking rules take priority
         over warning rules. All matching rule messages are combined.
 
         Args:
-            rules: List of Rule objects to evaluate
+            rules: List of Rule objects, or a CompiledRuleSet to only evaluate
+                rules indexed under this input's event and tool
             input_data: Hook input JSON (tool_name, tool_input, etc.)
+            event: Event to dispatch a CompiledRuleSet on, as passed to
+                load_rules() (None = all events). Defaults to
+                event_for_input(input_data).
 
         Returns:
             Response dict with systemMessage, hookSpecificOutput, etc.
             Empty dict {} if no rules match.
         """
         hook_event = input_data.get('hook_event_name', '')
-        blocking_rules = []
-        warning_rules = []
-
-        for rule in rules:
-            if self._rule_matches(rule, input_data):
-                if rule.action == 'block':
-                    blocking_rules.append(rule)
-                else:
-                    warning_rules.append(rule)
+        matched = self.matching_rules(rules, input_data, event)
+        blocking_rules = [rule for rule in matched if rule.action == 'block']
+        warning_rules = [rule for rule in matched if rule.action != 'block']
 
         # If any blocking rules matched, block the operation
         if blocking_rules:
@@ -93,12 +354,66 @@ class RuleEngine:
         # No matches - allow operation
         return {}
 
-    def _rule_matches(self, rule: Rule, input_data: Dict[str, Any]) -> bool:
+    def matching_rules(self, rules: Union[List[Rule], CompiledRuleSet],
+                       input_data: Dict[str, Any],
+                       event: Any = _INFER_EVENT) -> List[Rule]:
+        """Rules that match input_data, in rule order (see evaluate_rules)."""
+        if isinstance(rules, CompiledRuleSet):
+            # Tool matching was resolved by the index
+            if event is _INFER_EVENT:
+                event = event_for_input(input_data)
+            candidates = rules.rules_for(event, input_data.get('tool_name', ''))
+            check_tool = False
+            evaluation = _Evaluation(self, input_data, rules.patterns, candidates,
+                                     check_tool=False)
+        else:
+            candidates = rules
+            check_tool = True
+            evaluation = _Evaluation(self, input_data, candidates=candidates)
+
+        matched = [rule for rule in candidates
+                   if self._rule_matches(rule, input_data, check_tool=check_tool,
+                                         evaluation=evaluation)]
+        evaluation.finish()
+        return matched
+
+    def evaluate_many(self, rules: Union[List[Rule], CompiledRuleSet],
+                      inputs: Iterable[Dict[str, Any]],
+                      event: Any = _INFER_EVENT, processes: int = 0,
+                      chunk_size: int = 256) -> 'BatchEvaluation':
+        """Evaluate rules over many hook inputs, streaming the decisions.
+
+        Meant for audits and CI over recorded traffic. A rule list is
+        compiled once into a CompiledRuleSet, and each input is dispatched
+        the way the hooks load rules for it (event_for_input) unless
+        `event` is given. Only which rules matched is recorded; no messages
+        are built.
+
+        Args:
+            rules: List of Rule objects or a CompiledRuleSet
+            inputs: Hook inputs; consumed lazily, so it can be a generator
+                over a large corpus
+            event: As for evaluate_rules(); None evaluates every rule
+            processes: Worker processes to fan out to (0 = this process)
+            chunk_size: Inputs per task sent to a worker
+
+        Returns:
+            A BatchEvaluation: iterate it for one BatchDecision per input,
+            in input order; its hit_counts are complete once exhausted.
+        """
+        return BatchEvaluation(self, rules, inputs, event, processes, chunk_size)
+
+    def _rule_matches(self, rule: Rule, input_data: Dict[str, Any],
+                      check_tool: bool = True,
+                      evaluation: Optional[_Evaluation] = None) -> bool:
         """Check if rule matches input data.
 
         Args:
             rule: Rule to evaluate
             input_data: Hook input data
+            check_tool: Check rule.tool_matcher (False when already dispatched
+                through a CompiledRuleSet)
+            evaluation: Per-call field/result cache from evaluate_rules()
 
         Returns:
             True if rule matches, False otherwise
@@ -108,7 +423,7 @@ class RuleEngine:
         tool_input = input_data.get('tool_input', {})
 
         # Check tool matcher if specified
-        if rule.tool_matcher:
+        if check_tool and rule.tool_matcher:
             if not self._matches_tool(rule.tool_matcher, tool_name):
                 return False
 
@@ -117,12 +432,101 @@ class RuleEngine:
         if not rule.conditions:
             return False
 
-        # All conditions must match
-        for condition in rule.conditions:
-            if not self._check_condition(condition, tool_name, tool_input, input_data):
-                return False
+        if evaluation is None:
+            # All conditions must match
+            for condition in rule.conditions:
+                if not self._check_condition(condition, tool_name, tool_input, input_data):
+                    return False
+            return True
 
-        return True
+        # All conditions must match; check the cheap, selective ones first.
+        # Statistics only matter where there is an order to choose.
+        ordered = len(rule.conditions) > 1
+        conditions = self.ordered_conditions(rule) if ordered else rule.conditions
+        started = time.perf_counter() if self.profile else 0.0
+        matched = True
+        for condition in conditions:
+            checked = time.perf_counter() if self.profile else 0.0
+            if evaluation.reads_transcript(condition):
+                matched = evaluation.transcript_result(condition, rule)
+            else:
+                matched = self._check_condition(condition, tool_name, tool_input,
+                                                input_data, evaluation=evaluation)
+            if ordered:
+                self._record_condition(condition, matched)
+            if self.profile:
+                self._record_time(rule, condition, checked, matched)
+            if not matched:
+                break
+        if self.profile:
+            self._record_time(rule, None, started, matched)
+        return matched
+
+    def ordered_conditions(self, rule: Rule) -> List[Condition]:
+        """rule.conditions in the order that rejects non-matching input
+        cheapest.
+
+        For AND-ed conditions the expected cost is minimized by checking them
+        by ascending cost / P(reject). Costs come from condition_cost(); the
+        reject probability is estimated from this engine's past evaluations
+        (starting from 1/2). Ties keep file order.
+        """
+        if len(rule.conditions) < 2:
+            return rule.conditions
+        stats = self.condition_stats
+
+        def rank(condition: Condition) -> float:
+            checked, passed = stats.get(
+                (condition.field, condition.operator, condition.pattern), (0, 0))
+            rejected = (checked - passed + 1) / (checked + 2)
+            return condition_cost(condition) / rejected
+
+        return sorted(rule.conditions, key=rank)
+
+    def _record_condition(self, condition: Condition, matched: bool) -> None:
+        """Count a condition check for ordered_conditions()."""
+        key = (condition.field, condition.operator, condition.pattern)
+        counts = self.condition_stats.get(key)
+        if counts is None:
+            if len(self.condition_stats) >= _MAX_CONDITION_STATS:
+                self.condition_stats.clear()
+            counts = self.condition_stats[key] = [0, 0]
+        counts[0] += 1
+        if matched:
+            counts[1] += 1
+
+    def _record_time(self, rule: Rule, condition: Optional[Condition],
+                     started: float, matched: bool) -> None:
+        """Add the time since `started` to the rule's (or condition's) profile."""
+        elapsed = (time.perf_counter() - started) * 1000
+        entry = self.timings.setdefault(rule.name, [0.0, 0, {}])
+        if condition is None:
+            entry[0] += elapsed
+            entry[1] += 1
+            return
+        label = f"{condition.field} {condition.operator} {condition.pattern!r}"
+        counts = entry[2].setdefault(label, [0.0, 0, 0])
+        counts[0] += elapsed
+        counts[1] += 1
+        if matched:
+            counts[2] += 1
+
+    def profile_report(self) -> str:
+        """Per-rule and per-condition times recorded with profile=True,
+        slowest rule first.
+
+        A condition's time includes extracting its field the first time it
+        is read; the first transcript condition also carries the single
+        transcript pass shared by all rules.
+        """
+        lines = []
+        ranked = sorted(self.timings.items(), key=lambda item: -item[1][0])
+        for name, (total, evaluations, conditions) in ranked:
+            lines.append(f"{total:9.3f} ms  {name} ({evaluations}x)")
+            for label, (elapsed, checks, passes) in conditions.items():
+                lines.append(f"{elapsed:9.3f} ms    {label} "
+                             f"[{passes}/{checks} matched]")
+        return '\n'.join(lines) if lines else 'no rules evaluated'
 
     def _matches_tool(self, matcher: str, tool_name: str) -> bool:
         """Check if tool_name matches the matcher pattern.
@@ -138,11 +542,11 @@ class RuleEngine:
             return True
 
         # Split on | for OR matching
-        patterns = matcher.split('|')
-        return tool_name in patterns
+        return tool_name in split_tool_matcher(matcher)
 
     def _check_condition(self, condition: Condition, tool_name: str,
-                        tool_input: Dict[str, Any], input_data: Dict[str, Any] = None) -> bool:
+                        tool_input: Dict[str, Any], input_data: Dict[str, Any] = None,
+                        evaluation: Optional[_Evaluation] = None) -> bool:
         """Check if a single condition matches.
 
         Args:
@@ -150,21 +554,49 @@ class RuleEngine:
             tool_name: Tool being used
             tool_input: Tool input dict
             input_data: Full hook input data (for Stop events, etc.)
+            evaluation: Per-call field/result cache from evaluate_rules();
+                must have been built from the same input
 
         Returns:
             True if condition matches
         """
+        if evaluation is not None:
+            key = (condition.field, condition.operator, condition.pattern)
+            result = evaluation.results.get(key)
+            if result is None:
+                result = self._apply_operator(condition, evaluation.field(condition.field),
+                                              evaluation.patterns)
+                evaluation.results[key] = result
+            return result
+
         # Extract the field value to check
         field_value = self._extract_field(condition.field, tool_name, tool_input, input_data)
         if field_value is None:
             return False
+        return self._apply_operator(condition, FoldedText(field_value))
+
+    def _apply_operator(self, condition: Condition, folded: Optional[FoldedText],
+                        patterns: Optional[PatternTable] = None) -> bool:
+        """Apply condition.operator to an extracted field value.
+
+        Args:
+            condition: Condition to check
+            folded: Extracted field value, or None if the field is missing
+            patterns: Precompiled regexes from a CompiledRuleSet, if any
+
+        Returns:
+            True if condition matches
+        """
+        if folded is None:
+            return False
+        field_value = folded.text
 
         # Apply operator
         operator = condition.operator
         pattern = condition.pattern
 
         if operator == 'regex_match':
-            return self._regex_match(pattern, field_value)
+            return self._regex_match(pattern, field_value, folded, patterns)
         elif operator == 'contains':
             return pattern in field_value
         elif operator == 'equals':
@@ -206,23 +638,11 @@ class RuleEngine:
                 return input_data.get('reason', '')
             elif field == 'transcript':
                 # Read transcript file if path provided
+                # (evaluate_rules() goes through match_transcript() instead,
+                # which bounds memory and scans incrementally)
                 transcript_path = input_data.get('transcript_path')
                 if transcript_path:
-                    try:
-                        with open(transcript_path, 'r') as f:
-                            return f.read()
-                    except FileNotFoundError:
-                        print(f"Warning: Transcript file not found: {transcript_path}", file=sys.stderr)
-                        return ''
-                    except PermissionError:
-                        print(f"Warning: Permission denied reading transcript: {transcript_path}", file=sys.stderr)
-                        return ''
-                    except (IOError, OSError) as e:
-                        print(f"Warning: Error reading transcript {transcript_path}: {e}", file=sys.stderr)
-                        return ''
-                    except UnicodeDecodeError as e:
-                        print(f"Warning: Encoding error in transcript {transcript_path}: {e}", file=sys.stderr)
-                        return ''
+                    return read_transcript(transcript_path)
             elif field == 'user_prompt':
                 # For UserPromptSubmit events
                 return input_data.get('user_prompt', '')
@@ -253,25 +673,152 @@ class RuleEngine:
 
         return None
 
-    def _regex_match(self, pattern: str, text: str) -> bool:
+    def _regex_match(self, pattern: str, text: str,
+                     folded: Optional[FoldedText] = None,
+                     patterns: Optional[PatternTable] = None) -> bool:
         """Check if pattern matches text using regex.
 
         Args:
             pattern: Regex pattern
             text: Text to match against
+            folded: FoldedText of text, enables the literal prefilter
+            patterns: Precompiled regexes from a CompiledRuleSet, if any
 
         Returns:
             True if pattern matches
         """
+        entry = patterns.get(pattern) if patterns else None
+        if entry is not None:
+            regex, requirement = entry
+        else:
+            regex, requirement = None, required_literals(pattern)
+
+        # Skip the regex when a literal every match needs is absent
+        if folded is not None and not folded.may_match(requirement):
+            return False
+
         try:
-            # Use cached compiled regex (LRU cache with max 128 patterns)
-            regex = compile_regex(pattern)
+            if regex is None:
+                # Use cached compiled regex (LRU cache with max 128 patterns)
+                regex = compile_regex(pattern)
             return bool(regex.search(text))
 
         except re.error as e:
             print(f"Invalid regex pattern '{pattern}': {e}", file=sys.stderr)
             return False
 
+    def _compiled_pattern(self, pattern: str, patterns: Optional[PatternTable] = None
+                          ) -> Tuple[Optional[re.Pattern], Requirement]:
+        """Compiled regex and literal requirement for pattern.
+
+        Returns (None, ()) for an invalid pattern, after reporting it the way
+        _regex_match does.
+        """
+        entry = patterns.get(pattern) if patterns else None
+        if entry is not None:
+            return entry
+        try:
+            return compile_regex(pattern), required_literals(pattern)
+        except re.error as e:
+            print(f"Invalid regex pattern '{pattern}': {e}", file=sys.stderr)
+            return None, ()
+
+
+@dataclass
+class BatchDecision:
+    """Outcome of one input in RuleEngine.evaluate_many()."""
+    index: int  # Position in the input iterable
+    decision: str  # "block", "warn" or "allow"
+    matched: List[str] = field(default_factory=list)  # Rule names, in rule order
+
+
+def _decide(index: int, matched: List[Rule]) -> BatchDecision:
+    if any(rule.action == 'block' for rule in matched):
+        decision = 'block'
+    else:
+        decision = 'warn' if matched else 'allow'
+    return BatchDecision(index, decision, [rule.name for rule in matched])
+
+
+# Per-process state of evaluate_many() workers: (engine, rule set, event)
+_batch_worker: Optional[Tuple['RuleEngine', CompiledRuleSet, Any]] = None
+
+
+def _init_batch_worker(rules: List[Rule], infer_event: bool, event: Optional[str]) -> None:
+    global _batch_worker
+    _batch_worker = (RuleEngine(), CompiledRuleSet(rules),
+                     _INFER_EVENT if infer_event else event)
+
+
+def _evaluate_batch_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[BatchDecision]:
+    engine, rules, event = _batch_worker
+    return [_decide(index, engine.matching_rules(rules, input_data, event))
+            for index, input_data in chunk]
+
+
+class BatchEvaluation:
+    """Streaming result of RuleEngine.evaluate_many().
+
+    Iterating yields a BatchDecision per input, in input order, and fills in
+    hit_counts (rule name -> inputs it matched) and decision_counts as it
+    goes. With worker processes, at most a few chunks per worker are in
+    flight, so memory stays bounded however long the input is.
+    """
+
+    def __init__(self, engine: 'RuleEngine', rules: Union[List[Rule], CompiledRuleSet],
+                 inputs: Iterable[Dict[str, Any]], event: Any = _INFER_EVENT,
+                 processes: int = 0, chunk_size: int = 256):
+        self.engine = engine
+        self.rules = rules if isinstance(rules, CompiledRuleSet) else CompiledRuleSet(rules)
+        self.inputs = inputs
+        self.event = event
+        self.processes = processes
+        self.chunk_size = max(chunk_size, 1)
+        self.hit_counts: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+        self.decision_counts: Dict[str, int] = {'block': 0, 'warn': 0, 'allow': 0}
+        self._started = False
+
+    def __iter__(self) -> Iterator[BatchDecision]:
+        if self._started:
+            raise RuntimeError('a BatchEvaluation can only be iterated once')
+        self._started = True
+        decisions = self._parallel() if self.processes > 0 else self._sequential()
+        for decision in decisions:
+            self.decision_counts[decision.decision] += 1
+            for name in decision.matched:
+                self.hit_counts[name] = self.hit_counts.get(name, 0) + 1
+            yield decision
+
+    def run(self) -> 'BatchEvaluation':
+        """Consume every decision (for callers that only want the counts)."""
+        for _ in self:
+            pass
+        return self
+
+    def _sequential(self) -> Iterator[BatchDecision]:
+        for index, input_data in enumerate(self.inputs):
+            yield _decide(index, self.engine.matching_rules(self.rules, input_data,
+                                                            self.event))
+
+    def _parallel(self) -> Iterator[BatchDecision]:
+        from concurrent.futures import ProcessPoolExecutor
+
+        infer = self.event is _INFER_EVENT
+        numbered = enumerate(self.inputs)
+        with ProcessPoolExecutor(
+                max_workers=self.processes, initializer=_init_batch_worker,
+                initargs=(self.rules.rules, infer, None if infer else self.event)) as pool:
+            pending = deque()
+            while True:
+                while len(pending) < 2 * self.processes:
+                    chunk = list(itertools.islice(numbered, self.chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_evaluate_batch_chunk, chunk))
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+
 
 # For testing
 if __name__ == '__main__':
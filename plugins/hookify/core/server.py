@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Resident hookify server.
+
+Every hook invocation is otherwise a fresh python3 process that imports the
+engine and loads rules before checking a single condition. The server keeps
+a CompiledRuleSet per project in memory and answers evaluation requests from
+the hook executors (see core/client.py) over a Unix domain socket.
+
+Start it with `python3 -m hookify serve`. It exits on its own after
+--idle-timeout seconds without requests.
+
+Protocol: the client sends one JSON line
+    {"cwd": "/abs/project", "event": "bash" | ... | null, "input": {...}}
+and reads one JSON line back: {"result": {...}} or {"error": "..."}.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from hookify.core.client import socket_path, trusted_dir
+from hookify.core.config_loader import _RACY_WINDOW_NS, load_rules, rule_file_paths
+from hookify.core.rule_engine import CompiledRuleSet, RuleEngine
+
+DEFAULT_IDLE_TIMEOUT_SECONDS = 30 * 60
+
+# Requests carry whole Write payloads; anything bigger is refused and the
+# hook falls back to in-process evaluation.
+_MAX_REQUEST_BYTES = 32 * 1024 * 1024
+
+# Projects whose compiled rules are kept; the oldest is dropped beyond this
+_MAX_PROJECTS = 32
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def _rules_signature(root: str) -> Optional[Signature]:
+    """(path, mtime_ns, size) of every rule file under root.
+
+    Returns None while any file is inside the racy window (modified too
+    recently for the stat key to be trusted), forcing a reload.
+    """
+    now_ns = time.time_ns()
+    signature = []
+    for path in rule_file_paths(root):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if now_ns - st.st_mtime_ns < _RACY_WINDOW_NS:
+            return None
+        signature.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+class HookifyServer(socketserver.UnixStreamServer):
+    """Unix socket server holding compiled rules per project directory.
+
+    Rule changes are picked up by re-statting <cwd>/.claude/hookify.*.local.md
+    on every request (a glob plus a handful of stats, far cheaper than a
+    reload). Any added, removed or modified file triggers load_rules(), which
+    itself only re-parses the files that changed.
+    """
+
+    def __init__(self, path: str, idle_timeout: float):
+        super().__init__(path, _RequestHandler)
+        self.timeout = idle_timeout
+        self.idle = False
+        self.engine = RuleEngine()
+        self._projects: Dict[str, Tuple[Signature, CompiledRuleSet]] = {}
+
+    def rules_for_root(self, root: str) -> CompiledRuleSet:
+        """Compiled rules for project `root`, reloading if files changed."""
+        signature = _rules_signature(root)
+        cached = self._projects.get(root)
+        if signature is not None and cached is not None and cached[0] == signature:
+            return cached[1]
+
+        compiled = CompiledRuleSet(load_rules(root=root))
+        self._projects.pop(root, None)
+        if signature is not None:
+            if len(self._projects) >= _MAX_PROJECTS:
+                self._projects.pop(next(iter(self._projects)))
+            self._projects[root] = (signature, compiled)
+        return compiled
+
+    def handle_timeout(self):
+        self.idle = True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles one request line per connection."""
+
+    def handle(self):
+        server: HookifyServer = self.server
+        try:
+            request = json.loads(self.rfile.readline(_MAX_REQUEST_BYTES))
+            root = request.get('cwd')
+            input_data = request.get('input')
+            if not isinstance(root, str) or not os.path.isabs(root):
+                raise ValueError('cwd must be an absolute path')
+            if not isinstance(input_data, dict):
+                raise ValueError('input must be an object')
+            rules = server.rules_for_root(root)
+            result = server.engine.evaluate_rules(rules, input_data,
+                                                  event=request.get('event'))
+            reply: Dict[str, Any] = {'result': result}
+        except Exception as e:
+            # The client treats any error as "evaluate in-process"
+            reply = {'error': f'{type(e).__name__}: {e}'}
+        try:
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+
+
+def _server_running(path: str) -> bool:
+    """True if something is already accepting connections on path."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            sock.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+def serve(path: Optional[str] = None,
+          idle_timeout: float = DEFAULT_IDLE_TIMEOUT_SECONDS) -> int:
+    """Run the server until idle for idle_timeout seconds or signalled.
+
+    Args:
+        path: Socket path (default: client.socket_path())
+        idle_timeout: Seconds without a request before exiting
+
+    Returns:
+        Process exit code
+    """
+    if not path:
+        path = socket_path()
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        except OSError as e:
+            print(f"hookify server: cannot create {os.path.dirname(path)}: {e}", file=sys.stderr)
+            return 1
+    # Clients only connect to a socket in a directory no other user can
+    # write to (client.trusted_socket), so don't serve from any other
+    directory = os.path.dirname(os.path.abspath(path))
+    if not trusted_dir(directory):
+        print(f"hookify server: {directory} is owned or writable by another user; "
+              "use a directory only you can write to", file=sys.stderr)
+        return 1
+    if _server_running(path):
+        print(f"hookify server already running on {path}", file=sys.stderr)
+        return 1
+    try:
+        os.unlink(path)  # stale socket from a crashed server
+    except FileNotFoundError:
+        pass
+
+    # Owner-only socket: requests can read files the user can read
+    old_umask = os.umask(0o077)
+    try:
+        server = HookifyServer(path, idle_timeout)
+    finally:
+        os.umask(old_umask)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"hookify server listening on {path}", file=sys.stderr)
+    try:
+        while not server.idle:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""Bounded, incremental transcript matching for hookify `transcript` conditions.
+
+Session transcripts are JSONL files that grow to many megabytes. All
+transcript conditions of one hook invocation are evaluated together by
+match_transcript(): regions up to HOOKIFY_TRANSCRIPT_MAX_BYTES are matched
+in memory, larger ones in overlapping chunks.
+
+Each rule matches either the whole session or only the current turn
+(`scope: turn` in its frontmatter; the default comes from
+HOOKIFY_TRANSCRIPT_SCOPE and is "session").
+
+With a session id, a TranscriptIndex remembers how far the transcript was
+scanned, the session-scope results reached there, and where the last Stop
+left off, so the next evaluation only scans bytes appended since. The index
+is validated against the file's identity and content hashes around the
+recorded offsets; a rotated, truncated or rewritten transcript falls back
+to a full scan.
+"""
+
+import codecs
+import hashlib
+import io
+import json
+import locale
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from hookify.matchers.literal_prefilter import FoldedText, Requirement
+
+# Larger regions are matched in chunks instead of as one string
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+# Bytes read per chunk when streaming
+CHUNK_BYTES = 1024 * 1024
+
+# Characters carried from one chunk into the next so matches spanning the
+# boundary are still seen. Regex matches are exact when no longer than this.
+# Incremental scans likewise restart this many bytes before the last end.
+OVERLAP_CHARS = 64 * 1024
+
+# Block size for scanning backwards to the start of the current turn
+_TAIL_BLOCK_BYTES = 64 * 1024
+
+# Bytes hashed at the start of the file and before each recorded offset
+_ANCHOR_BYTES = 4096
+
+# Index files kept in the state directory; the oldest are pruned beyond this
+_MAX_INDEX_FILES = 256
+
+INDEX_VERSION = 1
+
+SCOPES = ('session', 'turn')
+
+# (key, operator, pattern, compiled regex or None, literal requirement)
+StreamCondition = Tuple[Any, str, str, Any, Requirement]
+
+
+def max_in_memory_bytes() -> int:
+    """HOOKIFY_TRANSCRIPT_MAX_BYTES, or DEFAULT_MAX_BYTES if unset/invalid."""
+    try:
+        value = int(os.environ.get('HOOKIFY_TRANSCRIPT_MAX_BYTES', ''))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+    return value if value > 0 else DEFAULT_MAX_BYTES
+
+
+def transcript_scope(rule_scope: Optional[str] = None) -> str:
+    """Effective scope: the rule's own, else HOOKIFY_TRANSCRIPT_SCOPE,
+    else "session"."""
+    if rule_scope in SCOPES:
+        return rule_scope
+    scope = os.environ.get('HOOKIFY_TRANSCRIPT_SCOPE', 'session')
+    return 'turn' if scope == 'turn' else 'session'
+
+
+def state_dir() -> str:
+    """Directory for per-session index files (HOOKIFY_STATE_DIR overrides)."""
+    override = os.environ.get('HOOKIFY_STATE_DIR')
+    if override:
+        return override
+    return os.path.join(tempfile.gettempdir(), f'hookify-{os.getuid()}')
+
+
+def _report_read_error(path: str, error: Exception) -> None:
+    """Print the warning _extract_field has always printed for error."""
+    if isinstance(error, FileNotFoundError):
+        print(f"Warning: Transcript file not found: {path}", file=sys.stderr)
+    elif isinstance(error, PermissionError):
+        print(f"Warning: Permission denied reading transcript: {path}", file=sys.stderr)
+    elif isinstance(error, UnicodeDecodeError):
+        print(f"Warning: Encoding error in transcript {path}: {error}", file=sys.stderr)
+    else:
+        print(f"Warning: Error reading transcript {path}: {error}", file=sys.stderr)
+
+
+def read_transcript(path: str) -> str:
+    """Whole transcript as text; '' after reporting any read/decode error."""
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except (IOError, OSError, UnicodeDecodeError) as e:
+        _report_read_error(path, e)
+        return ''
+
+
+def _is_user_prompt(line: bytes) -> bool:
+    """True for a transcript record holding a prompt typed by the user
+    (as opposed to a tool result, which is also recorded as type "user")."""
+    if b'"user"' not in line:
+        return False
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return False
+    if not isinstance(record, dict) or record.get('type') != 'user':
+        return False
+    message = record.get('message')
+    content = message.get('content') if isinstance(message, dict) else None
+    if isinstance(content, list):
+        return not any(isinstance(part, dict) and part.get('type') == 'tool_result'
+                       for part in content)
+    return isinstance(content, str)
+
+
+def turn_start_offset(path: str) -> int:
+    """Byte offset of the last user prompt record in a JSONL transcript.
+
+    Used when no index records where the previous Stop left off. Scans
+    backwards in blocks, so only the current turn (plus one block) is read.
+    Returns 0 if no prompt is found.
+    """
+    try:
+        with open(path, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            pending = b''  # bytes from pos up to the last unchecked line end
+            while pos > 0:
+                step = min(_TAIL_BLOCK_BYTES, pos)
+                pos -= step
+                f.seek(pos)
+                pending = f.read(step) + pending
+                # Before the first newline the line may continue further back
+                cut = pending.find(b'\n') + 1 if pos > 0 else 0
+                if pos > 0 and cut == 0:
+                    continue
+                line_end = len(pending)
+                for line in reversed(pending[cut:].split(b'\n')):
+                    line_start = line_end - len(line)
+                    if _is_user_prompt(line):
+                        return pos + line_start
+                    line_end = line_start - 1
+                pending = pending[:cut]
+    except OSError:
+        pass
+    return 0
+
+
+def _resume_offset(path: str, offset: int, back: int) -> int:
+    """Newline at least `back` bytes before offset to restart a scan from,
+    or 0 to rescan from the start."""
+    start = offset - back
+    if start <= 0:
+        return 0
+    try:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            block = f.read(back)
+    except OSError:
+        return 0
+    newline = block.find(b'\n')
+    return start + newline if newline >= 0 else 0
+
+
+class TranscriptStream:
+    """Matches conditions against a byte range of a transcript in one pass.
+
+    The file is decoded like open(path, 'r') (locale encoding, universal
+    newlines). A region up to max_in_memory_bytes() is a single window and
+    matched exactly; larger ones are split into overlapping chunks.
+    """
+
+    def __init__(self, path: str, offset: int = 0, continued: bool = False):
+        """
+        Args:
+            path: Transcript path
+            offset: Byte offset to start at (a line start, or the newline
+                before one when continued)
+            continued: The region continues text already scanned: its first
+                character is lookbehind context only, and "^"/"\\A" can't
+                match anywhere in it
+        """
+        self.path = path
+        self.offset = offset
+        self.continued = continued and offset > 0
+        # Bytes consumed so far; where a later scan can resume
+        self.end_offset = offset
+
+    def _texts(self, f, chunk_bytes: Optional[int]) -> Iterator[str]:
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(locale.getpreferredencoding(False))(),
+            translate=True)
+        while True:
+            data = f.read(chunk_bytes) if chunk_bytes else f.read()
+            self.end_offset += len(data)
+            if not data:
+                tail = decoder.decode(b'', final=True)
+                if tail:
+                    yield tail
+                return
+            text = decoder.decode(data)
+            if text:
+                yield text
+
+    def _windows(self, overlap: int) -> Iterator[Tuple[str, int, bool]]:
+        """Yield (window, carried, is_last) over the region.
+
+        Each window is the last overlap + 1 chars of the previous one (the
+        first `carried` chars) followed by the next chunk. Searches start at
+        index 1 of a carried window so "^" and "\\A" never match mid-file,
+        while the first character still serves as lookbehind context.
+        """
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(self.offset)
+            whole = size - self.offset <= max_in_memory_bytes()
+            texts = self._texts(f, None if whole else CHUNK_BYTES)
+            chunk = next(texts, '')
+            carry = ''
+            if self.continued and chunk:
+                carry, chunk = chunk[:1], chunk[1:]
+            while True:
+                following = next(texts, None)
+                window = carry + chunk
+                yield window, len(carry), following is None
+                if following is None:
+                    return
+                carry = window[-(overlap + 1):]
+                chunk = following
+
+    def evaluate(self, conditions: List[StreamCondition]) -> Optional[Dict[Any, bool]]:
+        """Evaluate conditions in one pass over the region.
+
+        Args:
+            conditions: (key, operator, pattern, regex, requirement) tuples;
+                regex is the compiled pattern for regex_match, else None
+
+        Returns:
+            {key: matched}, or None if the file could not be read or decoded
+            (after reporting it; callers treat the transcript as empty).
+        """
+        overlap = max([OVERLAP_CHARS] + [len(c[2]) for c in conditions])
+        found: Dict[Any, bool] = {}
+        # equals/starts_with: False once the text diverges from the pattern
+        prefix_ok = {c[0]: True for c in conditions}
+        pattern_of = {c[0]: c[2] for c in conditions}
+        consumed = 0
+        window = ''
+
+        def settled(key: Any, operator: str) -> bool:
+            if operator in ('contains', 'not_contains', 'regex_match'):
+                return key in found
+            if operator == 'starts_with':
+                return not prefix_ok[key] or consumed >= len(pattern_of[key])
+            if operator == 'equals':
+                return not prefix_ok[key]
+            return operator != 'ends_with'
+
+        try:
+            for window, carried, is_last in self._windows(overlap):
+                fresh = window[carried:]
+                start = 1 if carried else 0
+                folded = FoldedText(window)
+                for key, operator, pattern, regex, requirement in conditions:
+                    if settled(key, operator):
+                        continue
+                    if operator in ('contains', 'not_contains'):
+                        if pattern in window:
+                            found[key] = True
+                    elif operator == 'regex_match':
+                        if regex is not None and folded.may_match(requirement):
+                            m = regex.search(window, start)
+                            # Matches starting in the tail carried into the
+                            # next window are confirmed there, with context
+                            if m and (is_last or m.start() < len(window) - overlap):
+                                found[key] = True
+                    elif operator in ('equals', 'starts_with'):
+                        expected = pattern[consumed:consumed + len(fresh)]
+                        if operator == 'equals':
+                            prefix_ok[key] = fresh == expected
+                        else:
+                            prefix_ok[key] = fresh.startswith(expected)
+                consumed += len(fresh)
+                if all(settled(c[0], c[1]) for c in conditions):
+                    break
+        except (IOError, OSError, UnicodeDecodeError) as e:
+            _report_read_error(self.path, e)
+            return None
+
+        results: Dict[Any, bool] = {}
+        for key, operator, pattern, _, _ in conditions:
+            if operator in ('contains', 'regex_match'):
+                results[key] = found.get(key, False)
+            elif operator == 'not_contains':
+                results[key] = not found.get(key, False)
+            elif operator == 'equals':
+                results[key] = prefix_ok[key] and consumed == len(pattern)
+            elif operator == 'starts_with':
+                results[key] = prefix_ok[key] and consumed >= len(pattern)
+            elif operator == 'ends_with':
+                # The last window keeps overlap >= len(pattern) carried chars
+                results[key] = window.endswith(pattern)
+            else:
+                results[key] = False
+        return results
+
+
+def _hash_range(f, start: int, end: int) -> str:
+    f.seek(start)
+    return hashlib.sha1(f.read(max(end - start, 0))).hexdigest()
+
+
+class TranscriptIndex:
+    """Per-session record of how far hookify has read a transcript.
+
+    Stored as JSON in state_dir(), one file per (session id, transcript):
+      turn_start  file size at the last Stop; the current turn starts here
+      scanned     {"offset", "anchor", "results"} for session-scope
+                  conditions, results keyed by [operator, pattern]
+      head        hash of the first bytes, to notice a rewritten file
+    """
+
+    def __init__(self, session_id: str, transcript_path: str):
+        digest = hashlib.sha1(f'{session_id}\0{transcript_path}'.encode('utf-8'))
+        self.path = os.path.join(state_dir(), f'transcript-{digest.hexdigest()}.json')
+        self.transcript_path = transcript_path
+
+    def load(self, st: os.stat_result) -> Dict[str, Any]:
+        """Index entries still valid for the transcript as stat'ed.
+
+        Returns {} when there is no index or the transcript was replaced
+        (different inode), truncated, or rewritten at the start. Otherwise
+        drops just the entries whose offsets no longer hold.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if (not isinstance(state, dict) or state.get('version') != INDEX_VERSION
+                or state.get('dev') != st.st_dev or state.get('ino') != st.st_ino):
+            return {}
+        head_end = state.get('head_end')
+        if not isinstance(head_end, int) or head_end > st.st_size:
+            return {}
+
+        valid: Dict[str, Any] = {}
+        try:
+            with open(self.transcript_path, 'rb') as f:
+                if state.get('head') != _hash_range(f, 0, head_end):
+                    return {}
+                turn_start = state.get('turn_start')
+                if isinstance(turn_start, int) and 0 <= turn_start <= st.st_size:
+                    valid['turn_start'] = turn_start
+                scanned = state.get('scanned')
+                if isinstance(scanned, dict):
+                    offset = scanned.get('offset')
+                    if (isinstance(offset, int) and 0 < offset <= st.st_size
+                            and isinstance(scanned.get('results'), dict)
+                            and scanned.get('anchor') == _hash_range(
+                                f, max(offset - _ANCHOR_BYTES, 0), offset)):
+                        valid['scanned'] = scanned
+        except (IOError, OSError):
+            return {}
+        return valid
+
+    def save(self, st: os.stat_result, turn_start: Optional[int],
+             scanned: Optional[Dict[str, Any]]) -> None:
+        """Write the index atomically. Failures are ignored — the index is an
+        optimization and a missing one just means a full scan."""
+        tmp_path = None
+        try:
+            with open(self.transcript_path, 'rb') as f:
+                head_end = min(_ANCHOR_BYTES, st.st_size)
+                state = {
+                    'version': INDEX_VERSION,
+                    'dev': st.st_dev,
+                    'ino': st.st_ino,
+                    'head': _hash_range(f, 0, head_end),
+                    'head_end': head_end,
+                    'turn_start': turn_start,
+                    'scanned': scanned,
+                }
+                if scanned:
+                    offset = scanned['offset']
+                    scanned['anchor'] = _hash_range(
+                        f, max(offset - _ANCHOR_BYTES, 0), offset)
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            is_new = not os.path.exists(self.path)
+            fd, tmp_path = tempfile.mkstemp(prefix='.transcript-', dir=directory)
+            with os.fdopen(fd, 'w') as out:
+                json.dump(state, out)
+            os.replace(tmp_path, self.path)
+            tmp_path = None
+            if is_new:
+                _prune_index_files(directory)
+        except (IOError, OSError, TypeError, ValueError):
+            pass
+        finally:
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+
+def _prune_index_files(directory: str) -> None:
+    """Delete the oldest index files beyond _MAX_INDEX_FILES."""
+    try:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)
+                 if name.startswith('transcript-')]
+        if len(paths) <= _MAX_INDEX_FILES:
+            return
+        paths.sort(key=lambda p: os.stat(p).st_mtime)
+        for path in paths[:len(paths) - _MAX_INDEX_FILES]:
+            os.unlink(path)
+    except OSError:
+        pass
+
+
+def _result_key(operator: str, pattern: str) -> str:
+    return json.dumps([operator, pattern])
+
+
+def _match_session(path: str, conditions: List[StreamCondition],
+                   scanned: Optional[Dict[str, Any]]
+                   ) -> Tuple[Optional[Dict[Any, bool]], Optional[Dict[str, Any]]]:
+    """Session-scope results, scanning only what was appended since
+    `scanned` when it covers every condition.
+
+    Returns (results, new scanned entry); results is None on read errors.
+    """
+    known = scanned.get('results') if scanned else None
+    incremental = known is not None and all(
+        _result_key(c[1], c[2]) in known and c[1] != 'equals' for c in conditions)
+
+    start = 0
+    if incremental:
+        back = max([OVERLAP_CHARS] + [4 * len(c[2]) for c in conditions])
+        start = _resume_offset(path, scanned['offset'], back)
+    stream = TranscriptStream(path, start, continued=start > 0)
+    results = stream.evaluate(conditions)
+    if results is None:
+        return None, None
+
+    if start > 0:
+        for key, operator, pattern, _, _ in conditions:
+            before = known[_result_key(operator, pattern)]
+            if operator in ('contains', 'regex_match'):
+                results[key] = results[key] or before
+            elif operator == 'not_contains':
+                results[key] = results[key] and before
+            elif operator == 'starts_with':
+                results[key] = before  # the start of the file is unchanged
+    return results, {
+        'offset': stream.end_offset,
+        'results': {_result_key(c[1], c[2]): results[c[0]] for c in conditions},
+    }
+
+
+def match_transcript(path: str, conditions: Dict[str, List[StreamCondition]],
+                     session_id: Optional[str] = None,
+                     is_stop: bool = False) -> Optional[Dict[Any, bool]]:
+    """Evaluate transcript conditions, grouped by scope.
+
+    Args:
+        path: transcript_path from the hook input
+        conditions: {"session": [...], "turn": [...]} StreamConditions
+        session_id: Session id from the hook input; enables the index
+            (HOOKIFY_TRANSCRIPT_INDEX=0 disables it)
+        is_stop: This is a Stop event: the next turn starts after it
+
+    Returns:
+        {key: matched}, or None if the transcript can't be read (after
+        reporting it; callers treat the transcript as empty, as before).
+    """
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        _report_read_error(path, e)
+        return None
+
+    use_index = bool(session_id) and os.environ.get('HOOKIFY_TRANSCRIPT_INDEX', '1') != '0'
+    index = TranscriptIndex(session_id, path) if use_index else None
+    state = index.load(st) if index else {}
+
+    results: Dict[Any, bool] = {}
+    scanned = state.get('scanned')
+    if conditions.get('session'):
+        session_results, scanned = _match_session(path, conditions['session'], scanned)
+        if session_results is None:
+            return None
+        results.update(session_results)
+
+    if conditions.get('turn'):
+        turn_start = state.get('turn_start')
+        if turn_start is None:
+            turn_start = turn_start_offset(path)
+        turn_results = TranscriptStream(path, turn_start).evaluate(conditions['turn'])
+        if turn_results is None:
+            return None
+        results.update(turn_results)
+
+    if index:
+        index.save(st, st.st_size if is_stop else state.get('turn_start'), scanned)
+    return results
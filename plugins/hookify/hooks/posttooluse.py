@@ -8,6 +8,7 @@ It reads .claude/hookify.*.local.md files and evaluates rules.
 import os
 import sys
 import json
+import time
 
 # CRITICAL: Add plugin root to Python path for imports
 PLUGIN_ROOT = os.environ.get('CLAUDE_PLUGIN_ROOT')
@@ -19,8 +20,7 @@ if PLUGIN_ROOT:
         sys.path.insert(0, PLUGIN_ROOT)
 
 try:
-    from hookify.core.config_loader import load_rules
-    from hookify.core.rule_engine import RuleEngine
+    from hookify.core.client import evaluate_remote
 except ImportError as e:
     error_msg = {"systemMessage": f"Hookify import error: {e}"}
     print(json.dumps(error_msg), file=sys.stdout)
@@ -41,12 +41,28 @@ def main():
         elif tool_name in ['Edit', 'Write', 'MultiEdit']:
             event = 'file'
 
-        # Load rules
-        rules = load_rules(event=event)
+        # --profile: evaluate in process and report timings on stderr
+        profile = '--profile' in sys.argv[1:]
 
-        # Evaluate rules
-        engine = RuleEngine()
-        result = engine.evaluate_rules(rules, input_data)
+        # Use the resident server if one is running (python3 -m hookify serve)
+        result = None if profile else evaluate_remote(input_data, event)
+        if result is None:
+            from hookify.core.config_loader import load_rules
+            from hookify.core.rule_engine import RuleEngine
+
+            # Load rules
+            started = time.perf_counter()
+            rules = load_rules(event=event)
+            loaded = time.perf_counter()
+
+            # Evaluate rules
+            engine = RuleEngine(profile=profile)
+            result = engine.evaluate_rules(rules, input_data)
+
+            if profile:
+                print(f"{(loaded - started) * 1000:9.3f} ms  load_rules ({len(rules)} rules)\n"
+                      f"{(time.perf_counter() - loaded) * 1000:9.3f} ms  evaluate_rules\n"
+                      f"{engine.profile_report()}", file=sys.stderr)
 
         # Always output JSON (even if empty)
         print(json.dumps(result), file=sys.stdout)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Literal prefilter for hookify regex conditions.
+
+Python's re module has no multi-pattern (DFA) mode: joining many patterns
+into one alternation is slower than searching them one by one, because the
+engine tries every branch at every offset and loses the literal-prefix
+scan that single patterns get. Most rule patterns do contain a literal that
+any match must include ("rm", "push", "eval(", ".env"), so instead we
+extract those literals once per pattern and check them with a plain
+substring test against a lowercased copy of the text. Patterns whose
+required literals are absent are skipped without running the regex.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+_LITERAL = sre_parse.LITERAL
+_SUBPATTERN = sre_parse.SUBPATTERN
+_BRANCH = sre_parse.BRANCH
+_REPEATS = tuple(
+    op for op in (
+        getattr(sre_parse, 'MAX_REPEAT', None),
+        getattr(sre_parse, 'MIN_REPEAT', None),
+        getattr(sre_parse, 'POSSESSIVE_REPEAT', None),
+    ) if op is not None
+)
+_ATOMIC_GROUP = getattr(sre_parse, 'ATOMIC_GROUP', None)
+
+# Alternative sets are only useful while they stay small
+_MAX_ALTERNATIVES = 8
+
+# A requirement is a tuple of lowercase literals, at least one of which must
+# appear in any text the pattern matches. () means "no usable literal".
+Requirement = Tuple[str, ...]
+
+
+@lru_cache(maxsize=1024)
+def required_literals(pattern: str) -> Requirement:
+    """Literals (lowercased) of which any match of pattern contains one.
+
+    Args:
+        pattern: Regex pattern, compiled by the engine with re.IGNORECASE
+
+    Returns:
+        Tuple of alternative literals, or () when nothing can be required
+        (invalid pattern, leading wildcard only, non-ASCII literals, ...)
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, RecursionError, OverflowError):
+        return ()
+    return _sequence_requirement(list(parsed)) or ()
+
+
+def _score(requirement: Requirement) -> int:
+    """Selectivity of a requirement: length of its weakest alternative."""
+    return min(len(literal) for literal in requirement)
+
+
+def _sequence_requirement(items: List) -> Optional[Requirement]:
+    """Best requirement for a sequence of parsed items (all must match)."""
+    best: Optional[Requirement] = None
+    run: List[str] = []
+
+    def consider(candidate: Optional[Requirement]) -> None:
+        nonlocal best
+        if candidate and (best is None or _score(candidate) > _score(best)):
+            best = candidate
+
+    for op, av in items:
+        if op is _LITERAL and av < 128:
+            run.append(chr(av).lower())
+            continue
+        # Any other item ends the current run of adjacent literals
+        if run:
+            consider((''.join(run),))
+            run = []
+        consider(_item_requirement(op, av))
+    if run:
+        consider((''.join(run),))
+    return best
+
+
+def _item_requirement(op, av) -> Optional[Requirement]:
+    """Requirement contributed by a single non-literal parsed item."""
+    if op is _SUBPATTERN:
+        # (group, add_flags, del_flags, pattern)
+        return _sequence_requirement(list(av[3]))
+    if op in _REPEATS:
+        # (min, max, pattern): the body must occur at least once if min >= 1
+        if av[0] >= 1:
+            return _sequence_requirement(list(av[2]))
+        return None
+    if _ATOMIC_GROUP is not None and op is _ATOMIC_GROUP:
+        return _sequence_requirement(list(av))
+    if op is _BRANCH:
+        # (None, [branch, ...]): every branch needs a literal of its own
+        alternatives: List[str] = []
+        for branch in av[1]:
+            requirement = _sequence_requirement(list(branch))
+            if not requirement:
+                return None
+            alternatives.extend(requirement)
+        unique = tuple(dict.fromkeys(alternatives))
+        if len(unique) > _MAX_ALTERNATIVES:
+            return None
+        return unique
+    return None
+
+
+class FoldedText:
+    """Text plus a lazily lowercased copy for literal prefiltering.
+
+    Only ASCII text is folded: re.IGNORECASE treats a few non-ASCII
+    characters as equal to ASCII letters (KELVIN SIGN and "k", LONG S and
+    "s", ...), which str.lower() would not reproduce, so non-ASCII text
+    always falls through to the real regex.
+    """
+
+    __slots__ = ('text', '_folded', '_folded_ready')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._folded: Optional[str] = None
+        self._folded_ready = False
+
+    def may_match(self, requirement: Requirement) -> bool:
+        """False only when no alternative literal occurs in the text."""
+        if not requirement:
+            return True
+        if not self._folded_ready:
+            if self.text.isascii():
+                self._folded = self.text.lower()
+            self._folded_ready = True
+        folded = self._folded
+        if folded is None:
+            return True
+        for literal in requirement:
+            if literal in folded:
+                return True
+        return False
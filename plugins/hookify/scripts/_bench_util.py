@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Shared helpers for the hookify benchmark scripts.
+
+Puts the hookify package on sys.path (the same way the hook executors do via
+CLAUDE_PLUGIN_ROOT) and generates synthetic rule packs that resemble the
+rules people actually write.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_parent = os.path.dirname(PLUGIN_ROOT)
+if _parent not in sys.path:
+    sys.path.insert(0, _parent)
+
+_BASH_PATTERNS = [
+    r"rm\s+-rf", r"git\s+push\s+--force", r"chmod\s+777", r"curl\s+.*\|\s*sh",
+    r"dd\s+if=", r"mkfs", r"sudo\s+", r"npm\s+publish", r"docker\s+rm\s+-f",
+    r"kubectl\s+delete",
+]
+_FILE_PATTERNS = [
+    r"console\.log\(", r"debugger;", r"eval\(", r"API_KEY\s*=", r"TODO",
+    r"print\(", r"innerHTML\s*=", r"password\s*=", r"\.only\(", r"SECRET",
+]
+
+
+def rule_markdown(i: int) -> str:
+    """Synthetic rule #i: alternates simple-pattern and conditions styles
+    across bash and file events."""
+    if i % 2 == 0:
+        pattern = _BASH_PATTERNS[i % len(_BASH_PATTERNS)]
+        return (
+            f"---\nname: bench-bash-{i}\nenabled: true\nevent: bash\n"
+            f"pattern: {pattern}{i}?\naction: warn\n---\n\n"
+            f"Bench rule {i} matched a bash command.\n"
+        )
+    pattern = _FILE_PATTERNS[i % len(_FILE_PATTERNS)]
+    return (
+        f"---\nname: bench-file-{i}\nenabled: true\nevent: file\naction: warn\n"
+        f"conditions:\n"
+        f"  - field: file_path\n    operator: regex_match\n    pattern: \\.(ts|js|py)$\n"
+        f"  - field: new_text\n    operator: regex_match\n    pattern: {pattern}{i}?\n"
+        f"---\n\nBench rule {i} matched a file edit.\n"
+    )
+
+
+def write_rule_pack(root: str, count: int) -> None:
+    """Write `count` synthetic rule files into <root>/.claude/."""
+    claude_dir = os.path.join(root, '.claude')
+    os.makedirs(claude_dir, exist_ok=True)
+    for i in range(count):
+        path = os.path.join(claude_dir, f'hookify.bench-{i}.local.md')
+        with open(path, 'w') as f:
+            f.write(rule_markdown(i))
+        # Backdate so the rule cache doesn't treat the files as racily fresh.
+        past = time.time() - 60
+        os.utime(path, (past, past))
+
+
+def time_call(fn, iterations: int, setup=None) -> list:
+    """Run fn() `iterations` times; return per-call wall times in ms.
+
+    setup(), if given, runs before each call, outside the timing.
+    """
+    samples = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(label: str, samples: list) -> str:
+    return (
+        f"{label:<28} median {statistics.median(samples):8.3f} ms   "
+        f"p95 {percentile(samples, 95):8.3f} ms   n={len(samples)}"
+    )
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark RuleEngine.evaluate_many() against one evaluate_rules() per input.
+
+Usage:
+    python3 scripts/bench_batch.py [--rules 200] [--inputs 20000] [--processes 4]
+
+Times a synthetic corpus of Bash and Write inputs three ways:
+
+  per input        evaluate_rules() with the rules each hook would load
+  evaluate_many    one process, streaming
+  processes=N      fanned out over a process pool
+
+Decisions and per-rule hit counts are checked against the per-input
+results first.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bench_util import write_rule_pack  # noqa: E402
+
+from hookify.core.config_loader import load_rules  # noqa: E402
+from hookify.core.rule_engine import RuleEngine, event_for_input  # noqa: E402
+
+COMMANDS = ['ls -la', 'git status', 'rm -rf build', 'sudo make install',
+            'npm publish --tag next', 'pytest -q', 'chmod 777 /tmp/x',
+            'kubectl delete pod web-1', 'cat README.md', 'docker rm -f api']
+SNIPPETS = ["console.log('debug')", 'const API_KEY = "abc"', 'eval(code)',
+            'return total', 'el.innerHTML = html', '// TODO: remove']
+
+
+def build_inputs(count: int) -> list:
+    rng = random.Random(7)
+    inputs = []
+    for i in range(count):
+        if i % 2:
+            inputs.append({'hook_event_name': 'PreToolUse', 'tool_name': 'Bash',
+                           'tool_input': {'command': f'{rng.choice(COMMANDS)} {i}'}})
+        else:
+            body = '\n'.join(rng.choice(SNIPPETS) for _ in range(20))
+            inputs.append({'hook_event_name': 'PreToolUse', 'tool_name': 'Write',
+                           'tool_input': {'file_path': f'src/m{i}.ts', 'content': body,
+                                          'new_string': body}})
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--inputs', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    inputs = build_inputs(args.inputs)
+    with tempfile.TemporaryDirectory(prefix='hookify-bench-') as root:
+        write_rule_pack(root, args.rules)
+        rules = load_rules(root=root)
+        by_event = {}
+        for input_data in inputs:
+            event = event_for_input(input_data)
+            if event not in by_event:
+                by_event[event] = load_rules(event=event, root=root)
+
+    engine = RuleEngine()
+
+    def per_input():
+        decisions = []
+        for input_data in inputs:
+            result = engine.evaluate_rules(by_event[event_for_input(input_data)], input_data)
+            message = result.get('systemMessage', '')
+            names = [r.name for r in by_event[event_for_input(input_data)]
+                     if f'**[{r.name}]**' in message]
+            decision = 'block' if 'hookSpecificOutput' in result else (
+                'warn' if names else 'allow')
+            decisions.append((decision, names))
+        return decisions
+
+    def timed(fn):
+        start = time.perf_counter()
+        value = fn()
+        return value, time.perf_counter() - start
+
+    expected, reference_s = timed(per_input)
+    expected_hits = {}
+    for _, names in expected:
+        for name in names:
+            expected_hits[name] = expected_hits.get(name, 0) + 1
+
+    runs = [('evaluate_many', 0), (f'processes={args.processes}', args.processes)]
+    print(f"{args.rules} rules x {len(inputs)} inputs, {os.cpu_count()} CPUs")
+    print(f"{'per input':<20} {reference_s:7.2f} s  {len(inputs) / reference_s:9.0f}/s")
+    for label, processes in runs:
+        batch = RuleEngine().evaluate_many(rules, iter(inputs), processes=processes)
+        decisions, seconds = timed(lambda: [(d.decision, d.matched) for d in batch])
+        hits = {name: n for name, n in batch.hit_counts.items() if n}
+        if decisions != expected or hits != expected_hits:
+            sys.exit(f"{label}: results differ from per-input evaluation")
+        print(f"{label:<20} {seconds:7.2f} s  {len(inputs) / seconds:9.0f}/s")
+    print(f"(results identical; {sum(1 for d, _ in expected if d != 'allow')} inputs matched)")
+
+
+if __name__ == '__main__':
+    main()
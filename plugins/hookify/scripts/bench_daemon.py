@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmark hook latency with and without the resident hookify server.
+
+Usage:
+    python3 scripts/bench_daemon.py [--rules 40] [--iterations 500] [--spawns 30]
+
+Measures, against a synthetic rule pack:
+
+  in-process    load_rules() + evaluate_rules(), what each hook did per call
+  socket        evaluate_remote() round trip to `python3 -m hookify serve`
+  hook process  hooks/pretooluse.py end to end (interpreter startup included)
+                with and without the server
+
+Results from the server are checked against in-process evaluation first.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bench_util import PLUGIN_ROOT, percentile, time_call, write_rule_pack  # noqa: E402
+
+from hookify.core import client  # noqa: E402
+from hookify.core.config_loader import load_rules  # noqa: E402
+from hookify.core.rule_engine import RuleEngine  # noqa: E402
+
+INPUTS = [
+    {'hook_event_name': 'PreToolUse', 'tool_name': 'Bash',
+     'tool_input': {'command': 'rm -rf build && sudo make install'}},
+    {'hook_event_name': 'PreToolUse', 'tool_name': 'Bash',
+     'tool_input': {'command': 'git status --short'}},
+    {'hook_event_name': 'PreToolUse', 'tool_name': 'Write',
+     'tool_input': {'file_path': 'src/app.js',
+                    'content': "console.log('x');\n" * 200}},
+]
+
+
+def event_for(input_data: dict):
+    return 'bash' if input_data['tool_name'] == 'Bash' else 'file'
+
+
+def report(label: str, samples: list) -> None:
+    print(f"{label:<24} p50 {percentile(samples, 50):8.3f} ms   "
+          f"p95 {percentile(samples, 95):8.3f} ms   "
+          f"p99 {percentile(samples, 99):8.3f} ms   n={len(samples)}")
+
+
+def wait_for_socket(path: str, proc: subprocess.Popen) -> None:
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"server exited early with code {proc.returncode}")
+        if os.path.exists(path):
+            return
+        time.sleep(0.01)
+    sys.exit("server did not start")
+
+
+def spawn_hook(env: dict, payload: bytes, root: str) -> None:
+    subprocess.run([sys.executable, os.path.join(PLUGIN_ROOT, 'hooks', 'pretooluse.py')],
+                   input=payload, env=env, cwd=root, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=40)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--spawns', type=int, default=30,
+                        help='hook process launches per mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='hookify-bench-') as root:
+        root = os.path.realpath(root)
+        write_rule_pack(root, args.rules)
+        sock = os.path.join(root, 'hookify.sock')
+        os.environ['HOOKIFY_SOCKET'] = sock
+
+        env = dict(os.environ)
+        env['CLAUDE_PLUGIN_ROOT'] = PLUGIN_ROOT
+        env['PYTHONPATH'] = os.path.dirname(PLUGIN_ROOT)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'hookify', 'serve', '--socket', sock,
+             '--idle-timeout', '120'],
+            cwd=root, env=env, stderr=subprocess.DEVNULL)
+        old_cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            wait_for_socket(sock, server)
+            engine = RuleEngine()
+
+            for input_data in INPUTS:
+                local = engine.evaluate_rules(load_rules(event=event_for(input_data)),
+                                              input_data)
+                remote = client.evaluate_remote(input_data, event_for(input_data))
+                if remote != local:
+                    sys.exit(f"server result differs:\n  local  {local}\n  remote {remote}")
+
+            def in_process():
+                for input_data in INPUTS:
+                    engine.evaluate_rules(load_rules(event=event_for(input_data)),
+                                          input_data)
+
+            def over_socket():
+                for input_data in INPUTS:
+                    client.evaluate_remote(input_data, event_for(input_data))
+
+            per_call = len(INPUTS)
+            local_samples = [t / per_call for t in time_call(in_process, args.iterations)]
+            socket_samples = [t / per_call for t in time_call(over_socket, args.iterations)]
+
+            payload = json.dumps(INPUTS[0]).encode('utf-8')
+            with_server = time_call(lambda: spawn_hook(env, payload, root), args.spawns)
+            no_server_env = dict(env, HOOKIFY_DAEMON='0')
+            without_server = time_call(lambda: spawn_hook(no_server_env, payload, root),
+                                       args.spawns)
+        finally:
+            os.chdir(old_cwd)
+            server.terminate()
+            server.wait(timeout=10)
+
+    print(f"{args.rules} rules, per evaluation (results identical)")
+    report("in-process", local_samples)
+    report("socket round trip", socket_samples)
+    report("hook process, no server", without_server)
+    report("hook process, server", with_server)
+
+
+if __name__ == '__main__':
+    main()
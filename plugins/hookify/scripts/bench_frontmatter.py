@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Benchmark frontmatter parsing and load_rules() on 1, 50 and 500 rule files.
+
+Usage:
+    python3 scripts/bench_frontmatter.py [--counts 1 50 500] [--iterations 20]
+
+For each rule pack size, times:
+
+  parser           _parse_simple_frontmatter over every file's frontmatter
+  no cache         load_rules(use_cache=False): read + parse every file
+  stat miss        every file's mtime changed (checkout, touch) since the
+                   cache was written: re-read + re-parse every file, then
+                   rewrite the cache; the mtimes are changed untimed
+  warm cache       load_rules() with an up-to-date cache: stat only
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bench_util import summarize, time_call, write_rule_pack  # noqa: E402
+
+from hookify.core import config_loader  # noqa: E402
+
+
+def frontmatter_texts(root: str) -> list:
+    texts = []
+    for path in config_loader.rule_file_paths(root):
+        with open(path) as f:
+            texts.append(f.read().split('---', 2)[1])
+    return texts
+
+
+def touch_all(root: str) -> None:
+    """New (backdated) mtimes, same content: every stat key misses."""
+    past = time.time() - 60 - time.perf_counter() % 30
+    for path in config_loader.rule_file_paths(root):
+        os.utime(path, (past, past))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 50, 500])
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.counts:
+        with tempfile.TemporaryDirectory(prefix='hookify-bench-') as root:
+            write_rule_pack(root, count)
+            texts = frontmatter_texts(root)
+
+            print(f"\n{count} rule files")
+            print(summarize("parser", time_call(
+                lambda: [config_loader._parse_simple_frontmatter(t) for t in texts],
+                args.iterations)))
+            print(summarize("load_rules, no cache", time_call(
+                lambda: config_loader.load_rules(use_cache=False, root=root),
+                args.iterations)))
+            config_loader.load_rules(root=root)  # prime
+            print(summarize("load_rules, stat miss", time_call(
+                lambda: config_loader.load_rules(root=root), args.iterations,
+                setup=lambda: touch_all(root))))
+            config_loader.load_rules(root=root)
+            assert len(config_loader.load_rules(root=root)) == count
+            print(summarize("load_rules, warm cache", time_call(
+                lambda: config_loader.load_rules(root=root), args.iterations)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark load_rules() with a cold vs warm on-disk rule cache.
+
+Usage:
+    python3 scripts/bench_load_rules.py [--rules 40] [--iterations 200]
+
+Cold: the cache file is deleted before every load, so every rule file is
+read and run through extract_frontmatter. Warm: the cache is up to date and
+load_rules only stats the rule files.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bench_util import summarize, time_call, write_rule_pack  # noqa: E402
+
+from hookify.core import config_loader  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=40)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='hookify-bench-') as root:
+        write_rule_pack(root, args.rules)
+        old_cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            def cold():
+                try:
+                    os.unlink(config_loader.RULE_CACHE_PATH)
+                except OSError:
+                    pass
+                config_loader.load_rules(event='bash')
+
+            def warm():
+                config_loader.load_rules(event='bash')
+
+            uncached = time_call(
+                lambda: config_loader.load_rules(event='bash', use_cache=False),
+                args.iterations)
+            cold_samples = time_call(cold, args.iterations)
+            warm()  # prime
+            assert len(config_loader.load_rules()) == args.rules
+            warm_samples = time_call(warm, args.iterations)
+        finally:
+            os.chdir(old_cwd)
+
+    print(f"load_rules() over {args.rules} rule files")
+    print(summarize("no cache", uncached))
+    print(summarize("cold cache (parse + write)", cold_samples))
+    print(summarize("warm cache", warm_samples))
+
+
+if __name__ == '__main__':
+    main()
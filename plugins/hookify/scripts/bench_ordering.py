@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark cost-ordered condition checking against file order.
+
+Usage:
+    python3 scripts/bench_ordering.py [--rules 50] [--kilobytes 256] [--iterations 50]
+
+Builds rules whose first condition is expensive (a regex over a large file
+body) and whose last is a cheap, selective check on file_path, the shape
+that file-order evaluation handles worst. Evaluates them in file order and
+in RuleEngine.ordered_conditions() order after warming the engine's
+selectivity statistics, checking that both match the same rules.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bench_util import summarize, time_call  # noqa: E402
+
+from hookify.core.config_loader import Condition, Rule  # noqa: E402
+from hookify.core.rule_engine import CompiledRuleSet, RuleEngine  # noqa: E402
+
+
+def build_rules(count: int) -> list:
+    return [
+        Rule(name=f'bench-order-{i}', enabled=True, event='file',
+             conditions=[
+                 Condition(field='content', operator='regex_match',
+                           pattern=rf'(SECRET|TOKEN)_{i}\s*=\s*\S+'),
+                 Condition(field='file_path', operator='contains', pattern='/config/'),
+                 Condition(field='file_path', operator='ends_with', pattern=f'.env{i}'),
+             ],
+             message=f'rule {i}')
+        for i in range(count)
+    ]
+
+
+def build_inputs(kilobytes: int) -> list:
+    body = 'export const value = computeSomething(input, options);\n'
+    body *= kilobytes * 1024 // len(body)
+    return [
+        {'hook_event_name': 'PreToolUse', 'tool_name': 'Write',
+         'tool_input': {'file_path': f'src/module{i}.ts', 'content': body}}
+        for i in range(8)
+    ] + [
+        {'hook_event_name': 'PreToolUse', 'tool_name': 'Write',
+         'tool_input': {'file_path': 'app/config/.env3',
+                        'content': body + 'SECRET_3 = hunter2\n'}},
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=50)
+    parser.add_argument('--kilobytes', type=int, default=256)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    rules = CompiledRuleSet(build_rules(args.rules))
+    inputs = build_inputs(args.kilobytes)
+
+    file_order = RuleEngine()
+    file_order.ordered_conditions = lambda rule: rule.conditions
+    ordered = RuleEngine()
+
+    def run(engine: RuleEngine) -> list:
+        return [engine.evaluate_rules(rules, input_data) for input_data in inputs]
+
+    expected = run(file_order)
+    for _ in range(3):
+        if run(ordered) != expected:
+            sys.exit("ordered evaluation results differ from file order")
+
+    print(f"{args.rules} rules x {len(inputs)} inputs, {args.kilobytes} KB bodies "
+          f"(results identical: {sum(1 for r in expected if r)} inputs match)")
+    print(summarize("file order", time_call(lambda: run(file_order), args.iterations)))
+    print(summarize("cost ordered", time_call(lambda: run(ordered), args.iterations)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Benchmark Stop-rule transcript matching: in-memory, streamed, indexed.
+
+Usage:
+    python3 scripts/bench_transcript.py [--megabytes 32] [--iterations 5]
+
+Builds a synthetic JSONL transcript and evaluates a set of Stop rules with
+transcript conditions: fully in memory, streamed in chunks
+(HOOKIFY_TRANSCRIPT_MAX_BYTES=1), turn-scoped, and through the per-session
+offset index (first Stop vs the next Stop after a turn is appended).
+
+Before timing, results are checked:
+  - streamed against in-memory, including with tiny chunks so matches
+    straddle chunk boundaries
+  - indexed rescans after appends against full scans without the index
+  - a truncated, rotated or rewritten transcript against a full scan
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _bench_util import summarize, time_call  # noqa: E402
+
+from hookify.core import transcript  # noqa: E402
+from hookify.core.config_loader import Condition, Rule  # noqa: E402
+from hookify.core.rule_engine import RuleEngine  # noqa: E402
+
+CONDITIONS = [
+    ('transcript', 'not_contains', 'npm test|pytest|cargo test'),
+    ('transcript', 'contains', 'pytest -q'),
+    ('transcript', 'regex_match', r'(npm test|pytest|cargo test)'),
+    ('transcript', 'regex_match', r'"type":\s*"user".{0,200}deploy to prod'),
+    ('transcript', 'regex_match', r'^\{"type"'),
+    ('transcript', 'regex_match', r'FINAL-MARKER"\}\]\}\}$'),
+    ('transcript', 'regex_match', r'never-appears-anywhere'),
+    ('transcript', 'starts_with', '{"type": "user"'),
+    ('transcript', 'ends_with', 'FINAL-MARKER"}]}}\n'),
+    ('transcript', 'equals', 'short'),
+]
+
+
+def record(kind: str, text: str) -> str:
+    if kind == 'user':
+        return json.dumps({'type': 'user', 'message': {'role': 'user', 'content': text}})
+    if kind == 'tool':
+        return json.dumps({'type': 'user', 'message': {'role': 'user', 'content': [
+            {'type': 'tool_result', 'content': text}]}})
+    return json.dumps({'type': 'assistant', 'message': {'role': 'assistant', 'content': [
+        {'type': 'text', 'text': text}]}})
+
+
+def write_transcript(path: str, megabytes: int) -> None:
+    filler = 'Reading src/module.py and applying the requested refactor. ' * 20
+    target = megabytes * 1024 * 1024
+    written = 0
+    turn = 0
+    with open(path, 'w') as f:
+        while written < target:
+            lines = [
+                record('user', f'turn {turn}: please fix the failing build'),
+                record('assistant', filler),
+                record('tool', 'x' * 2000),
+                record('assistant', filler),
+            ]
+            if turn == 3:
+                lines.append(record('tool', 'ran pytest -q: 120 passed'))
+            chunk = '\n'.join(lines) + '\n'
+            f.write(chunk)
+            written += len(chunk)
+            turn += 1
+        f.write(record('user', 'please deploy to prod') + '\n')
+        f.write(record('assistant', 'FINAL-MARKER') + '\n')
+
+
+def build_rules(scope=None) -> list:
+    return [
+        Rule(name=f'bench-transcript-{i}', enabled=True, event='stop',
+             conditions=[Condition(field=f, operator=o, pattern=p)],
+             message=f'rule {i}', scope=scope)
+        for i, (f, o, p) in enumerate(CONDITIONS)
+    ]
+
+
+def append_turn(path: str, turn: int) -> None:
+    with open(path, 'a') as f:
+        f.write(record('user', f'turn {turn}: run the tests again') + '\n')
+        f.write(record('tool', f'ran cargo test: turn {turn} ok') + '\n')
+        f.write(record('assistant', 'FINAL-MARKER') + '\n')
+
+
+def check_index(engine: RuleEngine, root: str, source: str) -> None:
+    """Indexed evaluations must match full scans as the transcript changes."""
+    path = os.path.join(root, 'indexed.jsonl')
+    shutil.copyfile(source, path)
+    rules = build_rules() + [
+        Rule(name=f'{rule.name}-turn', enabled=True, event='stop',
+             conditions=rule.conditions, message=rule.message, scope='turn')
+        for rule in build_rules()]
+    # Only the contains/regex/not_contains/starts_with rules go incremental
+    incremental = [rule for rule in rules if rule.conditions[0].operator != 'equals']
+    indexed = {'hook_event_name': 'Stop', 'transcript_path': path,
+               'session_id': 'bench-session'}
+    plain = {'hook_event_name': 'Stop', 'transcript_path': path}
+
+    def compare(label: str, rule_set: list) -> list:
+        # Each indexed call is a Stop, so it also ends the turn; only the
+        # session-scope rules are compared against a full scan
+        got = matched_rules(engine, rule_set, indexed)
+        os.environ['HOOKIFY_TRANSCRIPT_INDEX'] = '0'
+        want = [name for name in matched_rules(engine, rule_set, plain)
+                if not name.endswith('-turn')]
+        os.environ.pop('HOOKIFY_TRANSCRIPT_INDEX')
+        got_session = [name for name in got if not name.endswith('-turn')]
+        if got_session != want:
+            sys.exit(f"index mismatch ({label}):\n  indexed {got_session}\n  full    {want}")
+        return got
+
+    compare('first Stop', rules)
+    for turn in range(3):
+        append_turn(path, 1000 + turn)
+        turn_hits = [name for name in compare(f'append {turn}', incremental)
+                     if name.endswith('-turn')]
+        if 'bench-transcript-4-turn' not in turn_hits or \
+                'bench-transcript-1-turn' in turn_hits:
+            sys.exit(f"turn scope did not move to the appended turn: {turn_hits}")
+
+    # Truncated below the scanned offset
+    with open(path, 'r+') as f:
+        f.truncate(os.path.getsize(path) // 2)
+    compare('truncated', incremental)
+    # Rewritten in place with the same size
+    with open(path, 'r+') as f:
+        f.write(record('assistant', 'deploy to prod, cargo test'))
+    compare('rewritten', incremental)
+    # Rotated: a different file at the same path
+    shutil.copyfile(source, path + '.new')
+    os.replace(path + '.new', path)
+    append_turn(path, 2000)
+    compare('rotated', incremental)
+
+
+def matched_rules(engine: RuleEngine, rules: list, input_data: dict) -> list:
+    """Which rules match, evaluated through one shared evaluate_rules()."""
+    result = engine.evaluate_rules(rules, input_data).get('systemMessage', '')
+    return [rule.name for rule in rules if f'**[{rule.name}]**' in result]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megabytes', type=int, default=32)
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = RuleEngine()
+    rules = build_rules()
+    with tempfile.TemporaryDirectory(prefix='hookify-bench-') as root:
+        path = os.path.join(root, 'transcript.jsonl')
+        write_transcript(path, args.megabytes)
+        os.environ['HOOKIFY_STATE_DIR'] = os.path.join(root, 'state')
+        input_data = {'hook_event_name': 'Stop', 'reason': '', 'transcript_path': path}
+
+        def run(max_bytes: str, scope: str = 'session'):
+            os.environ['HOOKIFY_TRANSCRIPT_MAX_BYTES'] = max_bytes
+            os.environ['HOOKIFY_TRANSCRIPT_SCOPE'] = scope
+            return matched_rules(engine, rules, input_data)
+
+        expected = run(str(1 << 40))
+        streamed = run('1')
+        saved = transcript.CHUNK_BYTES, transcript.OVERLAP_CHARS
+        transcript.CHUNK_BYTES, transcript.OVERLAP_CHARS = 4096, 512
+        tiny_chunks = run('1')
+        transcript.CHUNK_BYTES, transcript.OVERLAP_CHARS = saved
+        if not (expected == streamed == tiny_chunks):
+            sys.exit(f"mismatch:\n  in-memory {expected}\n  streamed  {streamed}\n"
+                     f"  tiny      {tiny_chunks}")
+        turn_expected = run(str(1 << 40), 'turn')
+        if turn_expected != run('1', 'turn'):
+            sys.exit("turn-scoped streamed results differ from in-memory")
+        os.environ['HOOKIFY_TRANSCRIPT_SCOPE'] = 'session'
+        if matched_rules(engine, build_rules('turn'), input_data) != turn_expected:
+            sys.exit("per-rule `scope: turn` differs from HOOKIFY_TRANSCRIPT_SCOPE=turn")
+        os.environ['HOOKIFY_TRANSCRIPT_MAX_BYTES'] = str(1 << 40)
+        check_index(engine, root, path)
+
+        def peak(fn) -> float:
+            tracemalloc.start()
+            fn()
+            _, high = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return high / (1024 * 1024)
+
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{size_mb:.1f} MB transcript, {len(rules)} transcript conditions "
+              f"(results identical: {len(expected)} rules match)")
+        print(summarize("in-memory", time_call(lambda: run(str(1 << 40)), args.iterations)))
+        print(summarize("streamed", time_call(lambda: run('1'), args.iterations)))
+        print(summarize("turn scope", time_call(lambda: run(str(1 << 40), 'turn'),
+                                                args.iterations)))
+        print(f"peak memory: in-memory {peak(lambda: run(str(1 << 40))):.1f} MB, "
+              f"streamed {peak(lambda: run('1')):.1f} MB")
+
+        os.environ['HOOKIFY_TRANSCRIPT_SCOPE'] = 'session'
+        indexed = dict(input_data, session_id='bench-timing')
+        # `equals` needs the whole transcript, so it always rescans
+        rules = [rule for rule in rules if rule.conditions[0].operator != 'equals']
+        first, after_append = [], []
+        for i in range(args.iterations):
+            shutil.rmtree(os.environ['HOOKIFY_STATE_DIR'], ignore_errors=True)
+            first += time_call(lambda: matched_rules(engine, rules, indexed), 1)
+            append_turn(path, 3000 + i)
+            after_append += time_call(lambda: matched_rules(engine, rules, indexed), 1)
+        print(summarize("indexed, first Stop", first))
+        print(summarize("indexed, next Stop", after_append))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,9 @@
 Shared low-level helpers for the security-guidance hook modules.
 
 This module exists so that ``patterns``/``session_state``/``gitutil`` can use
-``debug_log`` without importing ``security_reminder_hook`` (which would be a
-circular import). It must stay free of any other intra-plugin imports.
+``debug_log`` (and ``dispatch`` can use ``emit_metrics``) without importing
+``security_reminder_hook`` (which would be a circular import). It must stay
+free of any other intra-plugin imports.
 """
 import json
 import os
@@ -155,3 +156,38 @@ def _usage_metrics():
             "api_calls": _USAGE["n"],
         }
 
+
+def emit_metrics(metrics, rewake_summary=None):
+    """
+    Write a SyncHookJSONOutput line to stdout for Claude Code to pick up.
+    For asyncRewake (Stop) hooks, CC scans stdout for the first {-prefixed line
+    that validates as SyncHookJSONOutput and emits the hook metrics event.
+    For sync (PostToolUse) hooks, the metrics key in the normal JSON response
+    is picked up directly.
+
+    Constraints: keys ^[a-z][a-z0-9_]{0,39}$, values bool|finite-number,
+    20-key cap (was 10 in older CC versions).
+
+    `pv` and the tok_*/cost_usd usage block are PREPENDED so they survive any
+    future overflow — CC keeps only the first 20 keys, so insertion order
+    decides what drops. The old `len(metrics) < 10` guard was load-bearing for
+    the same reason but stale: once `rate_count` was added to every
+    commit-review emit, the with-vulns dict hit 10 keys, `pv` was skipped, and
+    findings metrics landed without a plugin version attached, breaking
+    per-version breakdowns.
+
+    `rewake_summary` (asyncRewake only): per-run override of the static
+    rewakeSummary in hooks.json, shown to the user in the terminal as the
+    task-notification one-liner. Must be in the same JSON line as the metrics
+    because CC stops scanning stdout after the first {-prefixed line.
+    """
+    head = {}
+    if _PV and "pv" not in metrics:
+        head["pv"] = _PV
+    head.update(_usage_metrics())
+    if head:
+        metrics = {**head, **metrics}
+    out = {"metrics": metrics}
+    if rewake_summary:
+        out["rewakeSummary"] = rewake_summary
+    print(json.dumps(out), flush=True)
@@ -0,0 +1,268 @@
+"""
+Streaming unified-diff parser for the security-guidance plugin.
+
+Every review stage used to take the raw `git diff` / `git show -p` text and
+re-split it: parse_diff_into_files split it per file and per line, then
+_prioritize_diff_files counted `\\n+`, filter_preexisting_from_diff and the
+diff-anchor check re-split each file's content to rebuild added/removed
+line lists. On a multi-hundred-KB diff that is several full copies of the
+text per stage.
+
+``iter_diff_files(chunks)`` reads the diff once, in whatever pieces it
+arrives (a git process's stdout can be fed straight in, so the whole output
+never sits in memory as one string), and yields a ``DiffFile`` per file
+section with its hunks and added/removed lines already split out. Work is
+per section and per hunk with str.split / comprehensions, not a Python
+loop per line — that loop would cost more than the copies it saves.
+``DiffFile`` unpacks as the ``(path, content)`` tuple the pipeline has
+always passed around, so code that only wants the text keeps working
+unchanged.
+
+No imports from the rest of the plugin: review_api uses this too and must
+stay importable on its own.
+"""
+import collections
+import re
+
+# "a/<path> b/<path>" after "diff --git ". Non-greedy a-side, so for an
+# unquoted path containing " b/" this picks the first split — same as the
+# parser it replaced.
+_HEADER_RE = re.compile(r"^a/(.+?) b/(.+)$")
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+DiffHunk = collections.namedtuple(
+    "DiffHunk", "header old_start old_count new_start new_count added removed")
+DiffHunk.__doc__ = """One `@@` hunk: its header line (without the newline),
+the line ranges it covers, and how many lines it adds and removes."""
+
+
+class DiffFile(tuple):
+    """One file's section of a diff. Unpacks as ``(path, content)``, where
+    content is the hunk text from the first ``@@`` line on (empty for a
+    binary, mode-only or filtered-out file), plus:
+
+      hunks    [DiffHunk]
+      added    texts of the `+` lines, without the prefix or newline
+      removed  texts of the `-` lines, likewise
+      size     len(content), what the prompt byte caps count
+    """
+
+    def __new__(cls, path, content, hunks=(), added=(), removed=()):
+        self = tuple.__new__(cls, (path, content))
+        self.hunks = list(hunks)
+        self.added = list(added)
+        self.removed = list(removed)
+        return self
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def path(self):
+        return self[0]
+
+    @property
+    def content(self):
+        return self[1]
+
+    @property
+    def size(self):
+        return len(self[1])
+
+
+def unquote_path(quoted):
+    """Undo git's C-style quoting of a path (`"a/caf\\303\\251.py"`, see
+    core.quotePath) into bytes."""
+    out, i, s = bytearray(), 1, quoted.encode("utf-8", errors="surrogateescape")
+    escapes = {ord("n"): 10, ord("t"): 9, ord('"'): 34, ord("\\"): 92,
+               ord("a"): 7, ord("b"): 8, ord("f"): 12, ord("r"): 13, ord("v"): 11}
+    while i < len(s) - 1:
+        c = s[i]
+        if c == 92 and i + 1 < len(s) - 1:
+            nxt = s[i + 1]
+            if 48 <= nxt <= 55:
+                out.append(int(s[i + 1:i + 4], 8))
+                i += 4
+                continue
+            out.append(escapes.get(nxt, nxt))
+            i += 2
+            continue
+        out.append(c)
+        i += 1
+    return bytes(out)
+
+
+def _header_path(header):
+    """The path (b/ side) of a `diff --git ` header line's remainder, or
+    None if it doesn't parse. Git quotes a name with control characters,
+    `"`, `\\` or (by default) non-ASCII bytes, so a `"` means quoting."""
+    if '"' not in header:
+        m = _HEADER_RE.match(header)
+        return (m.group(2) or m.group(1) or "") if m else None
+    if header.endswith('"'):
+        start = header.rfind(' "b/')
+        if start < 0:
+            return None
+        return unquote_path(header[start + 1:])[2:].decode("utf-8", errors="replace")
+    start = header.rfind(" b/")
+    return header[start + 3:] if start >= 0 else None
+
+
+def _first_hunk(text):
+    """Offset of the first line of `text` starting with `@@`, or -1."""
+    if text.startswith("@@"):
+        return 0
+    found = text.find("\n@@")
+    return found + 1 if found >= 0 else -1
+
+
+def iter_sections(chunks):
+    """Regroup `chunks` (str or bytes pieces of a diff, split anywhere —
+    the whole text as one chunk, or reads from a git pipe) into sections:
+    each runs from a line starting with `diff ` to just before the next
+    one. Text before the first such line (e.g. `git show`'s commit header)
+    comes out as a section of its own. Only `diff ` at the start of a line
+    starts a section — every line inside a hunk has a one-character
+    prefix, so it can't — unlike the old `split("diff --git ")`, which
+    also broke on that text in the middle of a line."""
+    parts = []  # complete lines of the current section
+    tail = []   # pieces of an unfinished last line
+    empty = None
+    for chunk in chunks:
+        if empty is None:
+            empty = chunk[:0]
+            nl, head = ("\n", "diff ") if isinstance(chunk, str) else (b"\n", b"diff ")
+            marker = nl + head
+        cut = chunk.rfind(nl) + 1
+        if not cut:
+            tail.append(chunk)  # no line end yet (a long minified line)
+            continue
+        if tail:
+            carried = empty.join(tail)
+            chunk, cut = carried + chunk, cut + len(carried)
+        lines, rest = chunk[:cut], chunk[cut:]
+        tail = [rest] if rest else []
+        bounds = [0] if lines.startswith(head) else []
+        found = lines.find(marker)
+        while found >= 0:
+            bounds.append(found + 1)
+            found = lines.find(marker, found + 1)
+        pos = 0
+        for bound in bounds:
+            parts.append(lines[pos:bound])
+            pos = bound
+            section = empty.join(parts)
+            parts = []
+            if section:
+                yield section
+        parts.append(lines[pos:])
+    if empty is not None:
+        section = empty.join(parts + tail)
+        if section:
+            yield section
+
+
+def iter_diff_files(chunks, keep=None):
+    """Yield a DiffFile for each `diff --git` section of `chunks` (str, as
+    for iter_sections) as soon as the section is complete. Sections whose
+    header doesn't parse are skipped. For a path `keep(path)` rejects, the
+    DiffFile is still yielded (so callers can tell "no changes" from "no
+    reviewable changes") but with empty content and no lines split out.
+    """
+    for section in iter_sections(chunks):
+        if not section.startswith("diff --git "):
+            continue
+        header, _, body = section.partition("\n")
+        path = _header_path(header[len("diff --git "):])
+        if path is None:
+            continue
+        if keep is not None and not keep(path):
+            yield DiffFile(path, "")
+            continue
+        # Hunks start at the first `@@` line; before it are the extended
+        # headers (index, mode, rename, ---/+++), which aren't content
+        start = _first_hunk(body)
+        yield DiffFile(path, "") if start < 0 else diff_file(path, body[start:])
+
+
+def added_removed(diff):
+    """(added, removed) line texts of `diff`: a list of DiffFile / (path,
+    content) pairs, or raw diff text (classified as the diff-anchor check
+    always has: `+`/`-` lines other than `+++`/`---` headers)."""
+    if isinstance(diff, str):
+        added, removed = [], []
+        for ln in diff.splitlines():
+            if ln.startswith("+") and not ln.startswith("+++"):
+                added.append(ln[1:])
+            elif ln.startswith("-") and not ln.startswith("---"):
+                removed.append(ln[1:])
+        return added, removed
+    added, removed = [], []
+    for item in diff:
+        if not isinstance(item, DiffFile):
+            item = diff_file(item[0], item[1])
+        added.extend(item.added)
+        removed.extend(item.removed)
+    return added, removed
+
+
+def diff_file(path, content):
+    """DiffFile for one file's hunk text (content as in a DiffFile), e.g.
+    after filter_preexisting_from_diff rewrote it. Lines inside a hunk are
+    classified by their first character, so an added line that itself
+    starts with `++` counts as added (the old `not startswith("+++")`
+    heuristic dropped it). Anything before the first `@@` is ignored."""
+    hunks, added, removed = [], [], []
+    start = _first_hunk(content)
+    if start >= 0:
+        # One split per hunk, then one pass per line kind: per-line Python
+        # loops are what made the old per-stage re-splitting slow
+        for i, hunk in enumerate(content[start:].split("\n@@")):
+            lines = hunk.split("\n")
+            header = lines[0] if i == 0 else "@@" + lines[0]
+            plus = [ln[1:] for ln in lines if ln.startswith("+")]
+            minus = [ln[1:] for ln in lines if ln.startswith("-")]
+            m = _HUNK_RE.match(header)
+            if m:
+                old_count = int(m.group(2)) if m.group(2) is not None else 1
+                new_count = int(m.group(4)) if m.group(4) is not None else 1
+                hunks.append(DiffHunk(header, int(m.group(1)), old_count, int(m.group(3)), new_count,
+                                      len(plus), len(minus)))
+            else:
+                hunks.append(DiffHunk(header, 0, 0, 0, 0, len(plus), len(minus)))
+            added.extend(plus)
+            removed.extend(minus)
+    return DiffFile(path, content, hunks, added, removed)
+
+
+DiffStat = collections.namedtuple("DiffStat", "path added removed old_path")
+DiffStat.__doc__ = """One file of `git diff --numstat`: lines added and removed
+(None for a binary file) and, for a rename, the path it was renamed from."""
+
+
+def parse_numstat(data):
+    """DiffStats from `git diff --numstat -z` output (bytes), in git's order.
+    Paths are decoded with surrogateescape, so one that isn't UTF-8 still
+    round-trips to the same bytes when passed back to git."""
+    stats = []
+    fields = data.split(b"\0")
+    i = 0
+    while i < len(fields) - 1:
+        counts = fields[i].split(b"\t", 2)
+        i += 1
+        if len(counts) != 3:
+            continue
+        added, removed, path = counts
+        old_path = None
+        if not path:
+            # A rename or copy: -z puts the old and new paths in fields of
+            # their own after the counts
+            if i + 1 >= len(fields):
+                break
+            old_path, path = fields[i].decode("utf-8", "surrogateescape"), fields[i + 1]
+            i += 2
+        binary = added == b"-"
+        stats.append(DiffStat(path.decode("utf-8", "surrogateescape"),
+                              None if binary else int(added),
+                              None if binary else int(removed), old_path))
+    return stats
@@ -15,6 +15,7 @@ from gitutil import (
     _git_dir, _git_toplevel, _git_status_porcelain,
     _git_rev_parse_head, _is_ancestor, _git_name_only,
 )
+from gitsession import session
 from session_state import with_locked_state
 
 
@@ -63,14 +64,19 @@ def record_touched_path(session_id, file_path):
     stale paths so over-retention is harmless, just wasteful.
     """
     def _record(state):
-        paths = state.setdefault("touched_paths", [])
-        if file_path not in paths:
-            paths.append(file_path)
-            if len(paths) > 200:
-                del paths[:len(paths) - 200]
+        _add_touched_path(state, file_path)
     with_locked_state(session_id, _record)
 
 
+def _add_touched_path(state, file_path):
+    """record_touched_path's mutation, for callers already holding the lock."""
+    paths = state.setdefault("touched_paths", [])
+    if file_path not in paths:
+        paths.append(file_path)
+        if len(paths) > 200:
+            del paths[:len(paths) - 200]
+
+
 def consume_stop_state(session_id):
     """Atomically snapshot all state the Stop hook needs and clear touched_paths.
 
@@ -137,9 +143,14 @@ def restore_unreviewed_stop_state(session_id, paths, baseline_sha):
     with_locked_state(session_id, _restore)
 
 
-def get_baseline_file_content(session_id, file_path, cwd):
-    """Get the content of a file at the baseline SHA. Returns None if unavailable."""
-    baseline_sha = load_baseline_sha(session_id)
+def get_baseline_file_content(session_id, file_path, cwd, baseline_sha=None):
+    """Get the content of a file at the baseline SHA. Returns None if unavailable.
+
+    Pass baseline_sha when already holding the state lock; otherwise it is
+    loaded from state (which takes the lock).
+    """
+    if baseline_sha is None:
+        baseline_sha = load_baseline_sha(session_id)
     if not baseline_sha:
         return None
     try:
@@ -149,13 +160,12 @@ def get_baseline_file_content(session_id, file_path, cwd):
             rel_path = os.path.relpath(abs_path, cwd_abs)
         except ValueError:
             return None
-        result = subprocess.run(
-            [*GIT_CMD, "show", f"{baseline_sha}:{rel_path}"],
-            cwd=cwd, capture_output=True, text=True, timeout=5
-        )
-        if result.returncode == 0:
-            return result.stdout
-        return None
+        found = session(cwd).read_object(f"{baseline_sha}:{rel_path}")
+        if found is None or found[1] != "blob":
+            return None
+        # Decoded the way the `git show` this replaces was read (text mode)
+        text = found[2].decode("utf-8", errors="replace")
+        return text.replace("\r\n", "\n").replace("\r", "\n")
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         return None
 
@@ -175,11 +185,7 @@ def capture_git_baseline(cwd):
     """
     try:
         # Check if HEAD exists (i.e., repo has at least one commit)
-        head_check = subprocess.run(
-            [*GIT_CMD, "rev-parse", "HEAD"],
-            cwd=cwd, capture_output=True, text=True, timeout=5
-        )
-        if head_check.returncode != 0:
+        if not _git_rev_parse_head(cwd):
             # No commits yet — skip review rather than creating commits in the user's repo
             debug_log("No commits in repo, skipping baseline capture")
             return None
@@ -193,12 +199,7 @@ def capture_git_baseline(cwd):
             return sha
 
         # Working tree is clean — stash create returns empty. Use HEAD.
-        result = subprocess.run(
-            [*GIT_CMD, "rev-parse", "HEAD"],
-            cwd=cwd, capture_output=True, text=True, timeout=5
-        )
-        sha = result.stdout.strip()
-        return sha if sha else None
+        return _git_rev_parse_head(cwd)
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
         debug_log(f"Failed to capture git baseline: {e}")
         return None
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Hook entrypoint for the security-guidance plugin (what hooks.json runs).
+
+Does the setup every event shares (kill switch, state-file GC, stdin, user
+config, SDK bootstrap) and then imports only the handler for the event: an
+Edit/Write PostToolUse, most of the plugin's invocations, runs
+``edit_hook`` and never imports ``security_reminder_hook``, whose LLM/HTTP
+imports cost several times the pattern check itself. Every other event goes
+to ``security_reminder_hook.handle_event``.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _base import debug_log, emit_metrics  # noqa: E402
+import extensibility  # noqa: E402
+from session_state import cleanup_old_state_files  # noqa: E402
+
+# Master kill switch. Either SECURITY_GUIDANCE_DISABLE=1 or
+# ENABLE_SECURITY_REMINDER=0 disables the plugin entirely. Kept as two names
+# because ENABLE_SECURITY_REMINDER predates the rename and some users already
+# have it baked into shell rc files; SECURITY_GUIDANCE_DISABLE reads correctly
+# as a kill switch (no double-negative).
+_disable_str = os.environ.get("SECURITY_GUIDANCE_DISABLE", "").strip().lower()
+SECURITY_GUIDANCE_DISABLED = (
+    _disable_str in ("1", "true", "yes", "on")
+    or os.environ.get("ENABLE_SECURITY_REMINDER", "1") == "0"
+)
+
+_SDK_BOOTSTRAP_THROTTLE = os.path.join(
+    os.environ.get("SECURITY_WARNINGS_STATE_DIR")
+    or os.path.expanduser("~/.claude/security"),
+    ".sdk_bootstrap_spawned")
+
+def _maybe_bootstrap_agent_sdk_async():
+    """Fire-and-forget SDK bootstrap, for remote-pod environments.
+
+    Under CLAUDE_CODE_SYNC_PLUGIN_INSTALL=true (CCR-style remote pods),
+    plugins are synced *after* SessionStart fires, so the SessionStart
+    `ensure_agent_sdk.py` hook never runs and the agentic commit reviewer
+    falls back 100% of the time. A PostToolUse hook firing is itself proof
+    the plugin is now registered, so re-trigger the bootstrap here.
+    Detached, so the ~17s venv build never blocks the hook — the first
+    1-2 commits of a remote session still fall back while it builds, then
+    every subsequent commit gets the agentic path. ensure_agent_sdk.py
+    is idempotent and O_EXCL-locked, so concurrent/repeat spawns are safe;
+    the throttle file only avoids spawning dozens of subprocesses during
+    the build window. No-ops in ~10ms on local installs (SDK already
+    importable).
+    """
+    try:
+        import importlib.util
+        if importlib.util.find_spec("claude_agent_sdk") is not None:
+            return
+        import time as _t
+        try:
+            if _t.time() - os.path.getmtime(_SDK_BOOTSTRAP_THROTTLE) < 300:
+                return
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(_SDK_BOOTSTRAP_THROTTLE), exist_ok=True)
+        # Touch the throttle BEFORE spawning so a burst of PostToolUse
+        # fires in the same second don't each spawn a subprocess.
+        open(_SDK_BOOTSTRAP_THROTTLE, "w").close()
+        script = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "ensure_agent_sdk.py")
+        subprocess.Popen(
+            [sys.executable, script],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL, start_new_session=True,
+        )
+    except Exception:
+        pass  # best-effort; never break the hook over a bootstrap attempt
+
+# Tools whose PostToolUse is handled by edit_hook alone.
+EDIT_TOOLS = ("Edit", "Write", "MultiEdit", "NotebookEdit")
+
+def main(full=None):
+    """Main hook function. `full` is the already-imported
+    security_reminder_hook module when that file was run directly."""
+    debug_log(f"Hook called with args: {sys.argv}")
+
+    # Master kill switch — honors ENABLE_SECURITY_REMINDER=0 (legacy) and
+    # SECURITY_GUIDANCE_DISABLE=1 (clearer name, no double negative). Emit
+    # empty metrics so asyncRewake hooks (Stop) don't hang waiting for stdout
+    # output that never comes.
+    if SECURITY_GUIDANCE_DISABLED:
+        emit_metrics({"skipped": True, "skip_reason": -1})
+        sys.exit(0)
+
+    # Periodically clean up old state files (10% chance per run)
+    if random.random() < 0.1:
+        cleanup_old_state_files()
+
+    # Read input from stdin
+    try:
+        raw_input = sys.stdin.read()
+        input_data = json.loads(raw_input)
+    except json.JSONDecodeError as e:
+        debug_log(f"JSON decode error: {e}")
+        emit_metrics({"skipped": True, "skip_reason": -2})
+        sys.exit(0)
+
+    tool_name = input_data.get("tool_name", "")
+    hook_event_name = input_data.get("hook_event_name", "")
+    debug_log(f"Processing: hook_event={hook_event_name}, tool={tool_name}")
+
+    # Load project-specific security guidance and custom patterns once
+    # per invocation. Failures are non-fatal (debug-logged) so a malformed
+    # config never prevents the built-in checks from running.
+    extensibility.load_for_session(input_data.get("cwd"))
+
+    # Remote-pod SDK-bootstrap rescue: PostToolUse is the earliest hook event
+    # that is guaranteed to fire *after* async plugin sync (its firing proves
+    # the plugin is registered), so it's where we recover the SessionStart
+    # bootstrap that remote pods miss under CLAUDE_CODE_SYNC_PLUGIN_INSTALL.
+    # Fires on Edit/Write too (not just Bash), so the venv is usually built
+    # before the first `git commit`.
+    if hook_event_name == "PostToolUse":
+        _maybe_bootstrap_agent_sdk_async()
+
+    # Pattern checks on edits: the hot path, kept off the LLM-review imports
+    if tool_name in EDIT_TOOLS:
+        import edit_hook
+        edit_hook.handle_edit_posttooluse(input_data)
+
+    if full is None:
+        import security_reminder_hook as full
+    full.handle_event(input_data)
+
+if __name__ == "__main__":
+    main()
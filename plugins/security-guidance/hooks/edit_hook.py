@@ -0,0 +1,381 @@
+"""
+Edit/Write PostToolUse handler for the security-guidance plugin.
+
+Layer 1 (pattern warnings) runs on every Edit, Write, MultiEdit and
+NotebookEdit, far more often than any other event, and needs none of the LLM
+review machinery. ``dispatch.py`` runs ``handle_edit_posttooluse`` straight
+from here, so an edit's hook process never imports ``security_reminder_hook``
+or, through it, ``llm``/``review_api``/``urllib``/``http.client``.
+``scripts/check_import_budget.py`` enforces that.
+
+``security_reminder_hook`` re-exports every name below, so
+``hook.check_patterns`` etc. keep working. Note that a monkeypatch of
+``hook.with_locked_state`` does not reach ``record_edit``: patch
+``edit_hook.with_locked_state`` for that.
+"""
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from _base import debug_log, emit_metrics, PROVENANCE_TAG, _PV
+import extensibility
+from diffstate import _add_touched_path, get_baseline_file_content, load_baseline_sha
+from patterns import SECURITY_PATTERNS, _RULE_NAME_TO_ID, rule_names_to_mask
+from pattern_scanner import PatternScanner
+from session_state import get_state_file, with_locked_state
+from verdict_cache import VerdictCache, baseline_key, content_key
+
+# Pattern-based rules (enabled by default; set to "0" to use only LLM review)
+# Empty string or unset = enabled (default); "0" = disabled
+_enable_pattern_str = os.environ.get("ENABLE_PATTERN_RULES", "1")
+ENABLE_PATTERN_RULES = _enable_pattern_str != "0"
+
+
+# =====================================================================
+# Session state
+# =====================================================================
+
+def _mark_warning(state, warning_key):
+    """atomic_check_and_mark_warning's check-and-mark, for callers already
+    holding the lock."""
+    warnings = state["shown_warnings"]
+    if warning_key in warnings:
+        return False
+    warnings.append(warning_key)
+    return True
+
+def _file_stamp(file_path):
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return True
+    return [st.st_mtime_ns, st.st_size]
+
+def _add_pending_warnings(state, file_path, rule_names, stamp=True):
+    pending = state.get("pending_warnings")
+    if not isinstance(pending, dict):
+        pending = {}
+        state["pending_warnings"] = pending
+    for rule in rule_names:
+        pending[f"{file_path}:{rule}"] = stamp
+
+def record_edit(session_id, file_path, pattern_matches, baseline_cwd=None, verdicts=None):
+    """
+    All of an Edit/Write PostToolUse's state work under one lock: record the
+    touched path, drop matches that already existed at the git baseline
+    (Write only: pass baseline_cwd), mark each remaining warning shown, and
+    record the matched rules as pending for the Stop-hook sweep.
+
+    Returns (new_matches, guidance): the matches left after the baseline
+    filter, and the reminders not yet shown this session. Same outcome as
+    record_touched_path + atomic_check_and_mark_warning per match +
+    record_pending_warnings, at one flock + JSON load/dump instead of up to
+    2 + N of them. The baseline verdict (a `git show` and rescan, or a
+    lookup in verdicts, a VerdictCache) is worked out before taking that
+    lock, so other hooks of the session don't wait on git; it only happens
+    for a Write that matched. If the state is unavailable this fails open
+    like the per-call helpers: no baseline filter, every reminder shown.
+    """
+    stamp = _file_stamp(file_path) if pattern_matches else True
+    baseline_sha = baseline_matches = None
+    if pattern_matches and baseline_cwd is not None:
+        baseline_sha = load_baseline_sha(session_id)
+        if baseline_sha:
+            baseline_matches = baseline_rule_names(
+                session_id, file_path, baseline_cwd, baseline_sha, verdicts)
+
+    def _record(state):
+        _add_touched_path(state, file_path)
+        matches = pattern_matches
+        # Only trust the verdict if no prompt moved the baseline meanwhile
+        if baseline_matches is not None and state.get("baseline_sha") == baseline_sha:
+            matches = [(r, msg) for r, msg in matches if r not in baseline_matches]
+            if matches:
+                debug_log(f"New patterns (not in baseline): {[r for r, _ in matches]}")
+            else:
+                debug_log("All patterns existed in baseline, skipping")
+        guidance = [reminder for rule_name, reminder in matches
+                    if _mark_warning(state, f"{file_path}-{rule_name}")]
+        # Only runs when patterns match.
+        if matches:
+            _add_pending_warnings(state, file_path, [r for r, _ in matches], stamp)
+        return matches, guidance
+
+    result = with_locked_state(session_id, _record)
+    if result is None:
+        return pattern_matches, [reminder for _, reminder in pattern_matches]
+    return result
+
+# =====================================================================
+# Pattern matching
+# =====================================================================
+
+# Time one search by a user pattern's regex may take before the search is
+# abandoned and the regex disabled for the rest of the session (0 = no
+# limit; built-in rules are never budgeted). Keeps one pathological pattern
+# from stalling every edit's PostToolUse.
+USER_PATTERN_BUDGET_MS = int(os.environ.get("SG_USER_PATTERN_BUDGET_MS", "250"))
+
+# (user pattern list it was built with, scanner). Built-in patterns are
+# compiled on first use; a new user list (load_for_session) rebuilds it.
+_pattern_scanner_cache: Optional[Tuple[List[Dict[str, Any]], PatternScanner]] = None
+
+
+def _pattern_scanner() -> PatternScanner:
+    global _pattern_scanner_cache
+    user = extensibility.user_patterns()
+    cached = _pattern_scanner_cache
+    if cached is None or cached[0] is not user:
+        cached = _pattern_scanner_cache = (user, PatternScanner(
+            list(SECURITY_PATTERNS) + user,
+            user_regex_budget=USER_PATTERN_BUDGET_MS / 1000 if USER_PATTERN_BUDGET_MS > 0 else None))
+    return cached[1]
+
+def get_disabled_patterns_file(session_id):
+    """Session-specific list of over-budget user regexes (swept with the
+    state files)."""
+    return get_state_file(session_id)[:-len(".json")] + ".disabled_patterns.json"
+
+def _load_disabled_patterns(session_id):
+    try:
+        with open(get_disabled_patterns_file(session_id), "r") as f:
+            disabled = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return disabled if isinstance(disabled, dict) else {}
+
+def apply_disabled_patterns(session_id):
+    """Turn off the user regexes that blew their budget earlier in this
+    session. Reads nothing when no user pattern has a regex."""
+    scanner = _pattern_scanner()
+    if scanner.budgeted:
+        scanner.disable(_load_disabled_patterns(session_id))
+
+def record_regex_timeouts(session_id):
+    """Persist the user regexes that blew their budget in this process since
+    the last call, so the session's later hooks skip them. Returns how many.
+    Read-merge-replace without the session lock: a racing hook can drop an
+    entry, which only means that regex times out once more."""
+    scanner = _pattern_scanner()
+    names = scanner.over_budget[:]
+    if not names:
+        return 0
+    del scanner.over_budget[:len(names)]
+    debug_log(f"User pattern regex over the {USER_PATTERN_BUDGET_MS}ms budget, "
+              f"disabled for the session: {names}")
+    disabled = _load_disabled_patterns(session_id)
+    for name in names:
+        source = scanner.regex_source(name)
+        if source is not None:
+            disabled[name] = source
+    path = get_disabled_patterns_file(session_id)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(disabled, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        debug_log(f"Failed to save disabled patterns {path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return len(names)
+
+
+def check_patterns(file_path, content, verdicts=None):
+    """Check if file path or content matches any security patterns. Returns ALL matches.
+
+    With a VerdictCache, an unchanged (path, content, rule set) reuses the
+    previous verdict instead of rescanning.
+    """
+    scanner = _pattern_scanner()
+    normalized_path = file_path.lstrip("/")
+    if verdicts is None:
+        return scanner.scan(normalized_path, content)
+    key = content_key(scanner.version, normalized_path, content)
+    hit, indices = verdicts.lookup(key)
+    if not hit or not isinstance(indices, list) or not all(
+        isinstance(i, int) and 0 <= i < len(scanner.rules) for i in indices
+    ):
+        indices = scanner.scan_indices(normalized_path, content)
+        verdicts.store(key, indices)
+    return scanner.matches(indices)
+
+def baseline_rule_names(session_id, file_path, cwd, baseline_sha, verdicts=None):
+    """Names of the rules file_path matched at baseline_sha, or None if the
+    file isn't available there. The verdict cache skips the `git show` and
+    rescan for a (path, baseline) pair already checked; a missing baseline
+    file is cached too."""
+    key = None
+    if verdicts is not None:
+        key = baseline_key(_pattern_scanner().version, file_path, cwd, baseline_sha)
+        hit, names = verdicts.lookup(key)
+        if hit and (names is None or isinstance(names, list)):
+            return None if names is None else set(names)
+    baseline_content = get_baseline_file_content(
+        session_id, file_path, cwd, baseline_sha=baseline_sha)
+    names = None
+    if baseline_content is not None:
+        names = sorted(set(r for r, _ in check_patterns(file_path, baseline_content)))
+    if key is not None:
+        verdicts.store(key, names)
+    return None if names is None else set(names)
+
+# An Edit whose new_string occurs more often than this in the file (e.g. a
+# one-token change) is checked on new_string alone, as before hunk scanning.
+MAX_EDIT_HUNKS = 64
+
+def edit_hunks(text, tool_name, tool_input):
+    """(start, end) spans of the edited file text holding what an Edit or
+    MultiEdit wrote, sorted. None if any new_string can't be found (the file
+    changed again since) or occurs more than MAX_EDIT_HUNKS times. A
+    new_string that occurs more than once marks every occurrence, since the
+    hook can't tell which one the edit produced. Empty (deletion)
+    new_strings have no known position and are skipped."""
+    if tool_name == "Edit":
+        new_strings = [tool_input.get("new_string", "")]
+    else:
+        new_strings = [edit.get("new_string", "") for edit in tool_input.get("edits", [])]
+    hunks = set()
+    for new_string in new_strings:
+        if not new_string:
+            continue
+        pos = text.find(new_string)
+        if pos == -1:
+            return None
+        while pos != -1:
+            hunks.add((pos, pos + len(new_string)))
+            if len(hunks) > MAX_EDIT_HUNKS:
+                return None
+            pos = text.find(new_string, pos + len(new_string))
+    return sorted(hunks)
+
+def check_edit_patterns(file_path, tool_name, tool_input):
+    """check_patterns() for an Edit/MultiEdit, scoped to what the edit wrote
+    but with the surrounding file as context, so a construct completed by
+    the edit (its dangerous half already in the file) is caught. Reads the
+    edited file (PostToolUse runs after the write). Returns None when the
+    hunks can't be located; callers fall back to checking new_string."""
+    try:
+        with open(file_path, "r", errors="replace") as f:
+            text = f.read()
+    except (OSError, IOError):
+        return None
+    hunks = edit_hunks(text, tool_name, tool_input)
+    if hunks is None:
+        return None
+    scanner = _pattern_scanner()
+    return scanner.matches(scanner.scan_hunks(file_path.lstrip("/"), text, hunks))
+
+def extract_content_from_input(tool_name, tool_input):
+    """Extract content to check from tool input based on tool type."""
+    if tool_name == "Write":
+        return tool_input.get("content", "")
+    elif tool_name == "Edit":
+        return tool_input.get("new_string", "")
+    elif tool_name == "MultiEdit":
+        edits = tool_input.get("edits", [])
+        if edits:
+            return " ".join(edit.get("new_string", "") for edit in edits)
+        return ""
+    return ""
+
+# =====================================================================
+# Hook handler
+# =====================================================================
+
+def handle_edit_posttooluse(input_data):
+    """PostToolUse[Edit|Write|MultiEdit|NotebookEdit]: pattern-based checks
+    only (no LLM review per-edit). Always exits."""
+    session_id = input_data.get("session_id", "default")
+    tool_name = input_data.get("tool_name", "")
+    tool_input = input_data.get("tool_input", {})
+    file_path = tool_input.get("file_path") or tool_input.get("notebook_path") or ""
+    if not file_path:
+        sys.exit(0)
+
+    # Skip plan files
+    plans_dir = os.path.expanduser("~/.claude/plans")
+    if file_path.startswith(plans_dir):
+        sys.exit(0)
+
+    content = extract_content_from_input(tool_name, tool_input)
+
+    raw_pattern_matches = []
+    verdicts = None
+    regex_timeouts = 0
+    if ENABLE_PATTERN_RULES:
+        apply_disabled_patterns(session_id)
+        verdicts = VerdictCache.load(session_id)
+        hunk_matches = None
+        if tool_name in ("Edit", "MultiEdit"):
+            hunk_matches = check_edit_patterns(file_path, tool_name, tool_input)
+        if hunk_matches is not None:
+            raw_pattern_matches = hunk_matches
+        else:
+            raw_pattern_matches = check_patterns(file_path, content, verdicts)
+        if raw_pattern_matches:
+            debug_log(f"Pattern matches for {file_path}: {[r for r, _ in raw_pattern_matches]}")
+        regex_timeouts = record_regex_timeouts(session_id)
+
+    # One locked state transaction for the whole edit. For Write, matches
+    # that already existed in the baseline version are filtered out, so
+    # pre-existing insecure patterns aren't flagged when Claude rewrites a
+    # file; new matches are marked shown and recorded as pending so the
+    # Stop-hook sweep can later tally fixed vs unresolved.
+    baseline_cwd = (os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())
+                    if tool_name == "Write" else None)
+    _, all_guidance = record_edit(session_id, file_path, raw_pattern_matches,
+                                  baseline_cwd=baseline_cwd, verdicts=verdicts)
+    if verdicts is not None:
+        verdicts.save()
+
+    # Pattern-verdict cache lookups this edit (content + baseline), reported
+    # whenever there were any, including on clean edits, so the hit rate
+    # isn't skewed towards files that matched
+    verdict_metrics = {}
+    if verdicts is not None and (verdicts.hits or verdicts.misses):
+        verdict_metrics = {"verdict_hits": verdicts.hits, "verdict_misses": verdicts.misses}
+
+    # Emit the pattern metrics when raw patterns matched (even if all were
+    # baseline-suppressed or dedup'd — pattern_hits reflects warnings
+    # actually shown, may be 0). Gate on raw matches so clean edits don't
+    # flood the metrics event with rule fields.
+    #   rule_id:   RuleId of the first raw match (values stay small/enumerable in telemetry)
+    #   rule_mask: bitmask of ALL raw matches — POPCOUNT gives raw hit count,
+    #              (mask >> N) & 1 tests for a specific rule
+    if raw_pattern_matches:
+        raw_names = [r for r, _ in raw_pattern_matches]
+        output = {"metrics": {
+            "pattern_hits": len(all_guidance),
+            # User-defined patterns (rule_name="user:*") have no static
+            # RuleId; emit -1 so the metrics pipeline can distinguish.
+            "rule_id": int(_RULE_NAME_TO_ID.get(raw_names[0], -1)),
+            "rule_mask": rule_names_to_mask(raw_names),
+            **verdict_metrics,
+            # User-pattern regexes abandoned over budget (now disabled)
+            **({"regex_timeouts": regex_timeouts} if regex_timeouts else {}),
+            **({"pv": _PV} if _PV else {}),
+        }}
+        if all_guidance:
+            output["hookSpecificOutput"] = {
+                "hookEventName": "PostToolUse",
+                "additionalContext": PROVENANCE_TAG + "\n\n" + "\n\n".join(all_guidance),
+            }
+        print(json.dumps(output))
+    elif regex_timeouts or verdict_metrics:
+        emit_metrics({**verdict_metrics,
+                      **({"regex_timeouts": regex_timeouts} if regex_timeouts else {})})
+    elif all_guidance:
+        # Defensive: pattern rules disabled but guidance somehow set (shouldn't happen)
+        print(json.dumps({
+            "hookSpecificOutput": {
+                "hookEventName": "PostToolUse",
+                "additionalContext": PROVENANCE_TAG + "\n\n" + "\n\n".join(all_guidance),
+            }
+        }))
+
+    sys.exit(0)
@@ -30,15 +30,24 @@ Trust model:
     structure and skipped (with a debug log) if they look ReDoS-prone.
   - Built-in patterns cannot be disabled. ``ENABLE_PATTERN_RULES=0`` disables
     all pattern checks; there is no per-rule kill switch in v1.
+
+Every hook invocation is a fresh process, so the loaded result (wrapped
+guidance block and validated patterns) is cached per project in the state
+dir, keyed by the mtime and size of every candidate file (including the
+ones that don't exist). A hit costs a dozen stat() calls and one small JSON
+read instead of re-reading, re-parsing (and importing PyYAML for) the
+configs and re-validating every regex.
 """
 
 import fnmatch
+import hashlib
 import json
 import os
 import re
+import time
 from typing import Any, Dict, List, Optional, Tuple
 
-from _base import debug_log
+from _base import debug_log, _PV
 
 # ── caps ─────────────────────────────────────────────────────────────────────
 
@@ -53,6 +62,16 @@ PATTERNS_BASENAMES = ("security-patterns.yaml", "security-patterns.yml", "securi
 _guidance_block: str = ""
 _user_patterns: List[Dict[str, Any]] = []
 
+# Bumped when the cached record's shape or the validation rules change.
+_CACHE_FORMAT = 1
+# A config file modified this recently may be rewritten again within the
+# filesystem's mtime granularity without its stamp changing, so a load that
+# read one isn't cached (the next invocation caches it instead).
+_RACY_WINDOW_NS = 2 * 10**9
+# Set by _read_config when a YAML file was skipped for want of PyYAML: that
+# result depends on more than the files, so it isn't cached.
+_yaml_unavailable = False
+
 
 # ── public API ───────────────────────────────────────────────────────────────
 
@@ -61,19 +80,32 @@ def load_for_session(cwd: Optional[str]) -> None:
     """Load project-specific guidance and patterns once per hook invocation.
 
     Called from the hook's main() before dispatching. Failures are non-fatal —
-    a malformed config file produces a debug_log entry, never a crash.
+    a malformed config file produces a debug_log entry, never a crash. Served
+    from the per-project cache when no config file changed since it was
+    written.
     """
-    global _guidance_block, _user_patterns
+    global _guidance_block, _user_patterns, _yaml_unavailable
+    stamps = _config_stamps(cwd)
+    cached = _load_cached(cwd, stamps)
+    if cached is not None:
+        _guidance_block, _user_patterns = cached
+        return
+    _yaml_unavailable = False
+    complete = True
     try:
         _guidance_block = _wrap_guidance(_load_guidance(cwd))
     except Exception as e:
         debug_log(f"extensibility: failed to load claude-security-guidance.md: {e}")
         _guidance_block = ""
+        complete = False
     try:
         _user_patterns = _load_user_patterns(cwd)
     except Exception as e:
         debug_log(f"extensibility: failed to load security-patterns: {e}")
         _user_patterns = []
+        complete = False
+    if complete and not _yaml_unavailable:
+        _save_cached(cwd, stamps, _guidance_block, _user_patterns)
 
 
 def guidance_block() -> str:
@@ -170,6 +202,7 @@ def _load_user_patterns(cwd: Optional[str]) -> List[Dict[str, Any]]:
 
 def _read_config(path: str) -> Optional[Dict[str, Any]]:
     """Read a YAML or JSON config file. Returns None on missing/malformed."""
+    global _yaml_unavailable
     try:
         with open(path, encoding="utf-8") as f:
             raw = f.read()
@@ -187,6 +220,7 @@ def _read_config(path: str) -> Optional[Dict[str, Any]]:
     try:
         import yaml  # type: ignore
     except ImportError:
+        _yaml_unavailable = True
         debug_log(f"extensibility: skipping {path}: PyYAML not installed (use .json)")
         return None
     try:
@@ -237,13 +271,15 @@ def _validate_pattern(entry: Any, source: str) -> Optional[Dict[str, Any]]:
         if not isinstance(paths, list) or not isinstance(exclude, list):
             debug_log(f"extensibility: skipping {name}: paths/exclude_paths must be lists")
             return None
-        # Capture as defaults so the lambda doesn't share state across rules.
-        rule["path_filter"] = (
-            lambda p, _inc=tuple(paths), _exc=tuple(exclude): _glob_match(p, _inc, _exc)
-        )
+        rule["path_filter"] = _path_filter(paths, exclude)
     return rule
 
 
+def _path_filter(paths: List[str], exclude: List[str]):
+    # Capture as defaults so the lambda doesn't share state across rules.
+    return lambda p, _inc=tuple(paths), _exc=tuple(exclude): _glob_match(p, _inc, _exc)
+
+
 def _glob_match(path: str, include: Tuple[str, ...], exclude: Tuple[str, ...]) -> bool:
     """Match a path against include/exclude globs. ``**`` matches any depth."""
     norm = path.replace(os.sep, "/")
@@ -287,3 +323,83 @@ def _has_redos_structure(regex: str) -> bool:
                 if a.startswith(b) or b.startswith(a):
                     return True
     return False
+
+
+# ── load cache ───────────────────────────────────────────────────────────────
+
+
+def get_cache_file(cwd: Optional[str]) -> str:
+    """Per-project load cache path (swept with the state files)."""
+    state_dir = os.environ.get("SECURITY_WARNINGS_STATE_DIR", os.path.expanduser("~/.claude/security"))
+    key = hashlib.sha1((cwd or "").encode("utf-8", "surrogatepass")).hexdigest()[:16]
+    return os.path.join(state_dir, f"extensibility_cache_{key}.json")
+
+
+def _config_stamps(cwd: Optional[str]) -> Dict[str, Optional[List[int]]]:
+    """[mtime_ns, size] of every file load_for_session() may read, None for
+    the ones that don't exist. Taken before reading, so a file changed in
+    between has a newer stamp than the cached content."""
+    paths = [path for _, path in _config_paths(cwd, GUIDANCE_BASENAME)]
+    for _, stem in _config_paths(cwd, "security-patterns"):
+        paths.extend(stem + ext for ext in (".yaml", ".yml", ".json"))
+    stamps: Dict[str, Optional[List[int]]] = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps[path] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            stamps[path] = None
+    return stamps
+
+
+def _rule_record(rule: Dict[str, Any]) -> Dict[str, Any]:
+    """A validated rule as JSON: path_filter is stored as the globs it was
+    built from (its captured defaults) and rebuilt by _rule_from_record."""
+    record = {k: v for k, v in rule.items() if k != "path_filter"}
+    if "path_filter" in rule:
+        include, exclude = rule["path_filter"].__defaults__
+        record["paths"], record["exclude_paths"] = list(include), list(exclude)
+    return record
+
+
+def _rule_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    rule = dict(record)
+    if "paths" in rule:
+        rule["path_filter"] = _path_filter(rule.pop("paths"), rule.pop("exclude_paths"))
+    return rule
+
+
+def _load_cached(cwd: Optional[str], stamps) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """(guidance block, user patterns) if the cache matches stamps, else None."""
+    try:
+        with open(get_cache_file(cwd), encoding="utf-8") as f:
+            record = json.load(f)
+        if (record.get("format") != _CACHE_FORMAT or record.get("pv") != _PV
+                or record.get("cwd") != (cwd or "") or record.get("stamps") != stamps):
+            return None
+        return record["guidance_block"], [_rule_from_record(r) for r in record["patterns"]]
+    except (OSError, ValueError, AttributeError, KeyError, TypeError):
+        return None
+
+
+def _save_cached(cwd: Optional[str], stamps, guidance: str, patterns: List[Dict[str, Any]]) -> None:
+    racy_after = time.time_ns() - _RACY_WINDOW_NS
+    if any(stamp is not None and stamp[0] > racy_after for stamp in stamps.values()):
+        return
+    path = get_cache_file(cwd)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        record = {
+            "format": _CACHE_FORMAT, "pv": _PV, "cwd": cwd or "", "stamps": stamps,
+            "guidance_block": guidance, "patterns": [_rule_record(r) for r in patterns],
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as e:
+        debug_log(f"extensibility: failed to save load cache {path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
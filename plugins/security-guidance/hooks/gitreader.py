@@ -0,0 +1,551 @@
+"""
+Read-only, in-process reader for the parts of a git repository the hooks
+look at: repository layout, loose and packed refs, the HEAD reflog, and
+loose and packed objects (zlib, pack .idx v2 lookup over mmap, ofs/ref
+deltas). ``gitsession`` tries it before forking git; it answers only what
+it can answer exactly as git would and raises ``Unsupported`` for the rest,
+which sends the question to the git CLI:
+
+  - GIT_DIR and the other discovery/object env vars, bare repos, a
+    `.git` that isn't a plain repo or linked worktree, core.worktree,
+    config includes, any repository extension (sha256, reftable, partial
+    clone, ...), a repo or git dir owned by another user (safe.directory)
+  - object reads in repos with alternates or replace refs
+  - revision syntax other than `<ref>`, `<full sha>` and `<rev>:<path>`
+  - anything that doesn't parse (a truncated pack, a broken ref)
+
+A missing object is also deferred rather than reported missing: a partial
+clone fetches it on demand, and a pack written after the scan is git's to
+find. A missing ref, or a path not in a tree, is a definite answer.
+"""
+import mmap
+import os
+import re
+import struct
+import zlib
+
+# Env vars that change where or how git finds the repository or objects
+_GIT_ENV = (
+    "GIT_DIR", "GIT_WORK_TREE", "GIT_COMMON_DIR", "GIT_OBJECT_DIRECTORY",
+    "GIT_ALTERNATE_OBJECT_DIRECTORIES", "GIT_CEILING_DIRECTORIES",
+    "GIT_DISCOVERY_ACROSS_FILESYSTEM", "GIT_NAMESPACE", "GIT_REPLACE_REF_BASE",
+    "GIT_NO_REPLACE_OBJECTS", "GIT_CONFIG_PARAMETERS", "GIT_CONFIG_COUNT",
+)
+
+_HEX40 = re.compile(r"[0-9a-f]{40}")
+_SHORT_HEX = re.compile(r"[0-9a-fA-F]{4,39}")
+# Ref shorthands resolved here; other syntax (^, ~, @{...}) goes to git
+_REF_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9._/-]*")
+_PSEUDOREF = re.compile(r"[A-Z_]+")
+# git's ref_rev_parse_rules, in order
+_DWIM_RULES = ("{}", "refs/{}", "refs/tags/{}", "refs/heads/{}", "refs/remotes/{}", "refs/remotes/{}/HEAD")
+_PER_WORKTREE_PREFIXES = ("refs/bisect/", "refs/worktree/", "refs/rewritten/")
+_SECTION = re.compile(r'\[\s*([A-Za-z0-9.-]+)(?:\s+"(?:[^"\\]|\\.)*")?\s*\]\s*(?:[#;].*)?')
+
+_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+_OFS_DELTA, _REF_DELTA = 6, 7
+_MAX_SYMREF_DEPTH = 5
+_MAX_DELTA_CHAIN = 4096
+_INFLATE_CHUNK = 64 * 1024
+
+
+class Unsupported(Exception):
+    """The reader can't answer this exactly as git would; ask git."""
+
+
+def _read_config(path):
+    """{(section, key): value} for the simple keys of a git config file.
+    Values are raw (no quote or escape processing) — only used to compare
+    against plain words."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise Unsupported(f"config: {e}")
+    config, section = {}, None
+    for raw in lines:
+        line = raw.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            m = _SECTION.fullmatch(line)
+            if not m:
+                raise Unsupported(f"config line {line!r}")
+            section = m.group(1).lower()
+            continue
+        key, eq, value = line.partition("=")
+        key = key.strip().lower()
+        if section is None or not re.fullmatch(r"[a-z][a-z0-9-]*", key):
+            raise Unsupported(f"config line {line!r}")
+        config[(section, key)] = value.strip() if eq else "true"
+    return config
+
+
+def _valid_ref_name(name):
+    return bool(_REF_NAME.fullmatch(name)) and ".." not in name and "//" not in name \
+        and "/." not in name and not name.endswith((".", "/", ".lock"))
+
+
+def _is_git_dir(path):
+    return os.path.isfile(os.path.join(path, "HEAD")) and (
+        os.path.isfile(os.path.join(path, "commondir"))
+        or (os.path.isdir(os.path.join(path, "objects")) and os.path.isdir(os.path.join(path, "refs"))))
+
+
+def _varint(data, pos):
+    value = shift = 0
+    while True:
+        c = data[pos]
+        pos += 1
+        value |= (c & 0x7F) << shift
+        shift += 7
+        if not c & 0x80:
+            return value, pos
+
+
+def _apply_delta(base, delta):
+    src_size, pos = _varint(delta, 0)
+    dst_size, pos = _varint(delta, pos)
+    if src_size != len(base):
+        raise Unsupported("delta base size mismatch")
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise Unsupported("delta opcode 0")
+    if len(out) != dst_size:
+        raise Unsupported("delta result size mismatch")
+    return bytes(out)
+
+
+class _Pack:
+    """One pack's .idx (v2) and .pack, mmapped on first use."""
+
+    def __init__(self, idx_path):
+        self.idx_path = idx_path
+        self._idx = self._data = None
+
+    @staticmethod
+    def _map(path):
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def find(self, sha):
+        """Offset of the 20-byte `sha` in the pack, or None."""
+        idx = self._idx
+        if idx is None:
+            idx = self._idx = self._map(self.idx_path)
+            if idx[:8] != b"\xfftOc\x00\x00\x00\x02":
+                raise Unsupported(f"pack index version: {self.idx_path}")
+            self.count = struct.unpack_from(">I", idx, 8 + 255 * 4)[0]
+        first = sha[0]
+        lo = struct.unpack_from(">I", idx, 8 + (first - 1) * 4)[0] if first else 0
+        hi = struct.unpack_from(">I", idx, 8 + first * 4)[0]
+        names = 8 + 256 * 4
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = names + mid * 20
+            probe = idx[at:at + 20]
+            if probe == sha:
+                offsets = names + self.count * 24
+                offset = struct.unpack_from(">I", idx, offsets + mid * 4)[0]
+                if offset & 0x80000000:
+                    large = offsets + self.count * 4 + (offset & 0x7FFFFFFF) * 8
+                    offset = struct.unpack_from(">Q", idx, large)[0]
+                return offset
+            if probe < sha:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def data(self):
+        if self._data is None:
+            self._data = self._map(self.idx_path[:-len(".idx")] + ".pack")
+        return self._data
+
+    def close(self):
+        for m in (self._idx, self._data):
+            if m is not None:
+                m.close()
+        self._idx = self._data = None
+
+
+class Repository:
+    """A discovered non-bare repository (or linked worktree) containing `cwd`.
+
+    Raises Unsupported from the constructor when discovery would need
+    anything git does that this doesn't.
+    """
+
+    def __init__(self, cwd):
+        for var in _GIT_ENV:
+            if os.environ.get(var):
+                raise Unsupported(f"{var} is set")
+        if cwd == "":
+            raise Unsupported("empty cwd")  # git itself fails to start there
+        start = os.path.realpath(cwd if cwd is not None else os.getcwd())
+        if not os.path.isdir(start):
+            raise Unsupported("cwd is not a directory")
+        self.toplevel, self.git_dir = self._discover(start)
+        commondir = os.path.join(self.git_dir, "commondir")
+        if os.path.isfile(commondir):
+            with open(commondir, "r", encoding="utf-8") as f:
+                target = f.read().strip()
+            self.common_dir = os.path.normpath(os.path.join(self.git_dir, target))
+            if not os.path.isdir(os.path.join(self.common_dir, "objects")):
+                raise Unsupported("commondir has no objects")
+        else:
+            self.common_dir = self.git_dir
+        self._check_config()
+        if hasattr(os, "geteuid"):
+            euid = os.geteuid()
+            if os.stat(self.toplevel).st_uid != euid or os.stat(self.git_dir).st_uid != euid:
+                raise Unsupported("owned by another user")
+        self.objects_dir = os.path.join(self.common_dir, "objects")
+        self._packs = None
+        self._pack_names = None
+        self._packed_refs = None
+        self._packed_refs_stamp = None
+
+    # ── discovery ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _discover(start):
+        d = start
+        dev = os.stat(d).st_dev
+        while True:
+            dotgit = os.path.join(d, ".git")
+            if os.path.isdir(dotgit):
+                if not _is_git_dir(dotgit):
+                    raise Unsupported(f"{dotgit} isn't a git dir")
+                return d, dotgit
+            if os.path.isfile(dotgit):
+                with open(dotgit, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+                if not content.startswith("gitdir:"):
+                    raise Unsupported(f"{dotgit}: no gitdir line")
+                git_dir = os.path.normpath(os.path.join(d, content[len("gitdir:"):].strip()))
+                if not _is_git_dir(git_dir):
+                    raise Unsupported(f"{git_dir} isn't a git dir")
+                return d, git_dir
+            if _is_git_dir(d):
+                raise Unsupported("bare repository or inside a git dir")
+            parent = os.path.dirname(d)
+            if parent == d:
+                raise Unsupported("no repository found")
+            if os.stat(parent).st_dev != dev:
+                raise Unsupported("repository search crossed a filesystem")
+            d = parent
+
+    def _check_config(self):
+        if os.path.exists(os.path.join(self.git_dir, "config.worktree")):
+            raise Unsupported("per-worktree config")
+        if os.path.isdir(os.path.join(self.common_dir, "reftable")):
+            raise Unsupported("reftable")
+        config = _read_config(os.path.join(self.common_dir, "config"))
+        for (section, key), value in config.items():
+            if section in ("include", "includeif") or section.startswith(("include.", "includeif.")):
+                raise Unsupported("config includes")
+            if section == "extensions" and key != "worktreeconfig":
+                raise Unsupported(f"extensions.{key}")
+        if config.get(("core", "bare"), "false").lower() in ("true", "yes", "on", "1"):
+            raise Unsupported("core.bare")
+        if ("core", "worktree") in config:
+            raise Unsupported("core.worktree")
+        if config.get(("core", "repositoryformatversion"), "0") not in ("0", "1"):
+            raise Unsupported("repository format version")
+
+    # ── refs ─────────────────────────────────────────────────────────────
+
+    def _packed(self):
+        path = os.path.join(self.common_dir, "packed-refs")
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return {}
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp != self._packed_refs_stamp:
+            refs = {}
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f.read().splitlines():
+                    if not line or line.startswith("#") or line.startswith("^"):
+                        continue
+                    sha, _, name = line.partition(" ")
+                    if not _HEX40.fullmatch(sha) or not name:
+                        raise Unsupported(f"packed-refs line {line!r}")
+                    refs[name] = sha
+            self._packed_refs, self._packed_refs_stamp = refs, stamp
+        return self._packed_refs
+
+    def read_ref(self, refname, depth=0):
+        """SHA a full ref name points to (following symrefs), or None if it
+        doesn't exist or is a symref to a missing ref."""
+        per_worktree = "/" not in refname or refname.startswith(_PER_WORKTREE_PREFIXES)
+        path = os.path.join(self.git_dir if per_worktree else self.common_dir, *refname.split("/"))
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            if content.startswith("ref:"):
+                target = content[len("ref:"):].strip()
+                if depth >= _MAX_SYMREF_DEPTH or not _valid_ref_name(target):
+                    raise Unsupported(f"symref {refname} -> {target[:60]!r}")
+                return self.read_ref(target, depth + 1)
+            if not _HEX40.fullmatch(content):
+                raise Unsupported(f"ref {refname}: {content[:60]!r}")
+            return content
+        return self._packed().get(refname)
+
+    def resolve(self, rev):
+        """Full SHA for a ref shorthand or full SHA, or None if no ref by
+        that name exists."""
+        if _HEX40.fullmatch(rev):
+            return rev
+        if not _valid_ref_name(rev) or _SHORT_HEX.fullmatch(rev):
+            raise Unsupported(f"revision syntax {rev!r}")
+        for rule in _DWIM_RULES:
+            if rule == "{}" and not (rev.startswith("refs/") or _PSEUDOREF.fullmatch(rev)):
+                continue
+            sha = self.read_ref(rule.format(rev))
+            if sha:
+                return sha
+        return None
+
+    def head_reflog(self, max_n):
+        """[(sha, committer time, reflog subject)] for the newest `max_n`
+        HEAD reflog entries, newest first, as `git log -g --format=%H|%ct|%gs`
+        shows them."""
+        try:
+            return self._head_reflog(max_n)
+        except (OSError, ValueError, IndexError, struct.error, zlib.error) as e:
+            raise Unsupported(f"HEAD reflog: {e}")
+
+    def _head_reflog(self, max_n):
+        path = os.path.join(self.git_dir, "logs", "HEAD")
+        if not os.path.isfile(path):
+            raise Unsupported("no HEAD reflog")
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            block = 4096
+            while True:
+                f.seek(max(0, size - block))
+                data = f.read()
+                lines = data.split(b"\n")
+                if block >= size or len(lines) > max_n + 1:
+                    break
+                block *= 4
+        if block < size:
+            lines = lines[1:]  # first line may be partial
+        entries = []
+        for raw in reversed([line for line in lines if line]):
+            if len(entries) >= max_n:
+                break
+            meta, _, message = raw.decode("utf-8", errors="replace").partition("\t")
+            fields = meta.split(" ")
+            if len(fields) < 2 or not _HEX40.fullmatch(fields[1]) or fields[1] == "0" * 40:
+                raise Unsupported(f"reflog line {meta[:100]!r}")
+            kind, body = self.read(fields[1])
+            if kind != "commit":
+                raise Unsupported("reflog entry is not a commit")
+            entries.append((fields[1], self._committer_time(body), message))
+        return entries
+
+    @staticmethod
+    def _committer_time(body):
+        for line in body.split(b"\n"):
+            if not line:
+                break
+            if line.startswith(b"committer "):
+                fields = line.rsplit(b" ", 2)
+                return fields[1].decode("ascii")
+        raise Unsupported("commit without committer")
+
+    # ── objects ──────────────────────────────────────────────────────────
+
+    def _scan_packs(self):
+        pack_dir = os.path.join(self.objects_dir, "pack")
+        try:
+            names = sorted(n for n in os.listdir(pack_dir) if n.endswith(".idx"))
+        except FileNotFoundError:
+            names = []
+        if names == self._pack_names:
+            return False
+        for pack in self._packs or ():
+            pack.close()
+        self._packs = [_Pack(os.path.join(pack_dir, n)) for n in names]
+        self._pack_names = names
+        return True
+
+    def _check_objects_supported(self):
+        if self._packs is not None:
+            return
+        if os.path.exists(os.path.join(self.objects_dir, "info", "alternates")):
+            raise Unsupported("alternates")
+        replace = os.path.join(self.common_dir, "refs", "replace")
+        if (os.path.isdir(replace) and any(os.scandir(replace))) or any(
+                name.startswith("refs/replace/") for name in self._packed()):
+            raise Unsupported("replace refs")
+        self._scan_packs()
+
+    def _read_loose(self, hex_sha):
+        path = os.path.join(self.objects_dir, hex_sha[:2], hex_sha[2:])
+        try:
+            with open(path, "rb") as f:
+                raw = zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        header, _, body = raw.partition(b"\0")
+        kind, _, size = header.decode("ascii").partition(" ")
+        if kind not in _TYPES.values() or int(size) != len(body):
+            raise Unsupported(f"loose object {hex_sha}")
+        return kind, body
+
+    def _inflate(self, data, pos, size):
+        d = zlib.decompressobj()
+        out = []
+        while not d.eof:
+            chunk = data[pos:pos + _INFLATE_CHUNK]
+            if not chunk:
+                raise Unsupported("truncated pack")
+            pos += len(chunk)
+            out.append(d.decompress(chunk))
+        result = b"".join(out)
+        if len(result) != size:
+            raise Unsupported("pack entry size mismatch")
+        return result
+
+    def _read_packed(self, pack, offset):
+        data = pack.data()
+        deltas = []
+        while True:
+            c = data[offset]
+            pos = offset + 1
+            kind, size, shift = (c >> 4) & 7, c & 15, 4
+            while c & 0x80:
+                c = data[pos]
+                pos += 1
+                size |= (c & 0x7F) << shift
+                shift += 7
+            if kind == _OFS_DELTA:
+                c = data[pos]
+                pos += 1
+                distance = c & 0x7F
+                while c & 0x80:
+                    c = data[pos]
+                    pos += 1
+                    distance = ((distance + 1) << 7) | (c & 0x7F)
+                deltas.append(self._inflate(data, pos, size))
+                offset -= distance
+            elif kind == _REF_DELTA:
+                base = data[pos:pos + 20].hex()
+                deltas.append(self._inflate(data, pos + 20, size))
+                base_kind, body = self.read(base)
+                break
+            elif kind in _TYPES:
+                base_kind, body = _TYPES[kind], self._inflate(data, pos, size)
+                break
+            else:
+                raise Unsupported(f"pack entry type {kind}")
+            if len(deltas) > _MAX_DELTA_CHAIN:
+                raise Unsupported("delta chain too long")
+        for delta in reversed(deltas):
+            body = _apply_delta(body, delta)
+        return base_kind, body
+
+    def read(self, hex_sha):
+        """(type, body) of an object. Raises Unsupported if it isn't in a
+        pack or loose — git may still be able to get it."""
+        self._check_objects_supported()
+        sha = bytes.fromhex(hex_sha)
+        for attempt in range(2):
+            for pack in self._packs:
+                offset = pack.find(sha)
+                if offset is not None:
+                    return self._read_packed(pack, offset)
+            found = self._read_loose(hex_sha)
+            if found is not None:
+                return found
+            # A repack may have moved it into a pack written since the scan
+            if attempt or not self._scan_packs():
+                break
+        raise Unsupported(f"object {hex_sha} not found")
+
+    def lookup(self, name):
+        """(sha, type, body) for `<rev>` or `<rev>:<path>`, or None if the
+        ref or path doesn't exist — what `git cat-file --batch` answers."""
+        try:
+            return self._lookup(name)
+        except (OSError, ValueError, IndexError, struct.error, zlib.error) as e:
+            raise Unsupported(f"{name}: {e}")
+
+    def _lookup(self, name):
+        rev, colon, path = name.partition(":")
+        if not rev:
+            raise Unsupported("index lookup")
+        sha = self.resolve(rev)
+        if sha is None:
+            return None
+        kind, body = self.read(sha)
+        if not colon:
+            return sha, kind, body
+        if path.startswith(("./", "../")) or path in (".", ".."):
+            raise Unsupported("cwd-relative path")
+        while kind in ("tag", "commit"):
+            target = body.split(b"\n", 1)[0].split(b" ")
+            expected = b"object" if kind == "tag" else b"tree"
+            if len(target) != 2 or target[0] != expected:
+                raise Unsupported(f"{kind} {sha} header")
+            sha = target[1].decode("ascii")
+            kind, body = self.read(sha)
+        if kind != "tree":
+            return None
+        if not path:
+            return sha, kind, body
+        parts = path.split("/")
+        if "" in parts:
+            raise Unsupported(f"path {path!r}")
+        for part in parts:
+            if kind != "tree":
+                return None
+            entry = self._tree_entry(body, part.encode("utf-8", "surrogateescape"))
+            if entry is None:
+                return None
+            mode, sha = entry
+            if mode == b"160000":
+                raise Unsupported("submodule path")
+            kind, body = self.read(sha)
+        return sha, kind, body
+
+    @staticmethod
+    def _tree_entry(tree, name):
+        pos, end = 0, len(tree)
+        while pos < end:
+            space = tree.index(b" ", pos)
+            nul = tree.index(b"\0", space)
+            if tree[space + 1:nul] == name:
+                return tree[pos:space], tree[nul + 1:nul + 21].hex()
+            pos = nul + 21
+        return None
+
+    def close(self):
+        for pack in self._packs or ():
+            pack.close()
+        self._packs = self._pack_names = None
@@ -0,0 +1,292 @@
+"""
+Per-invocation git session for the security-guidance plugin.
+
+A hook process asks git many small questions about the same checkout — the
+toplevel, the git dir, HEAD, a file at the baseline SHA, whether a ref
+exists — and each used to cost a `git` fork (~5-10 ms, more on a large repo
+or a slow filesystem). ``session(cwd)`` returns one ``GitSession`` per
+working directory for the life of the process, which:
+
+  - resolves toplevel, git dir and common git dir with ONE `git rev-parse`
+    and remembers them (they don't change under a running hook)
+  - serves object lookups (``HEAD``, ``origin/main``, ``<sha>:<path>``)
+    through one long-lived `git cat-file --batch` process, started on first
+    use and closed at exit. Refs are resolved per request, so a commit or
+    `stash create` made mid-hook is seen by the next lookup
+  - memoizes what can't change: lookups by full SHA and ancestry between
+    two full SHAs
+
+Before any of that it tries ``gitreader``, which reads the layout, refs,
+HEAD reflog and objects of an ordinary repository straight from disk: in
+the common case a hook answers these without forking git at all, and git
+is asked only what the reader declines (see its docstring).
+
+The helpers in ``gitutil``/``diffstate`` keep their names and signatures and
+route through here, so monkeypatching them keeps working. SG_GIT_READER=0
+turns the in-process reader off; SG_GIT_BATCH=0 runs each object lookup as
+its own one-shot `git cat-file --batch` instead of keeping the process open
+(the rev-parse and memos still apply).
+"""
+import atexit
+import io
+import os
+import re
+import select
+import subprocess
+import threading
+
+from _base import debug_log
+import gitreader
+
+
+GIT_CMD = [
+    "git",
+    "-c", "core.fsmonitor=false",
+    "-c", "core.hooksPath=/dev/null",
+]
+
+ENABLE_GIT_BATCH = os.environ.get("SG_GIT_BATCH", "1") != "0"
+ENABLE_GIT_READER = os.environ.get("SG_GIT_READER", "1") != "0"
+
+# Same budget the one-shot `git rev-parse`/`git show` calls had
+LOOKUP_TIMEOUT_S = 5
+
+_FULL_SHA = re.compile(r"[0-9a-f]{40}(?:[0-9a-f]{24})?")
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _immutable(name):
+    """True for `<full sha>` and `<full sha>:<path>`, whose object can't change."""
+    return bool(_FULL_SHA.fullmatch(name.split(":", 1)[0]))
+
+
+def _read_response(stream):
+    """(oid, type, body) for one --batch response, or None for a missing or
+    ambiguous name. Raises OSError if the stream ends mid-response."""
+    header = stream.readline()
+    if not header.endswith(b"\n"):
+        raise OSError("git cat-file --batch closed its output")
+    fields = header.split()
+    if len(fields) != 3 or not fields[2].isdigit():
+        return None
+    size = int(fields[2])
+    body = stream.read(size + 1)
+    if len(body) != size + 1:
+        raise OSError("git cat-file --batch closed its output")
+    return fields[0].decode("ascii"), fields[1].decode("ascii"), body[:-1]
+
+
+class GitSession:
+    """Git state for one working directory, for the life of the hook process.
+
+    Thread-safe: UPS resolves the baseline and lists untracked files from
+    two threads.
+    """
+
+    def __init__(self, cwd):
+        self.cwd = cwd
+        self._lock = threading.Lock()
+        self._dirs = None
+        self._batch = None
+        self._reader = None
+        self._memo = {}
+
+    def _repository(self):
+        """The gitreader.Repository for cwd, or None if the reader is off or
+        declines this repo. Called with the lock held."""
+        if self._reader is None:
+            self._reader = False
+            if ENABLE_GIT_READER:
+                try:
+                    self._reader = gitreader.Repository(self.cwd)
+                except (gitreader.Unsupported, OSError) as e:
+                    debug_log(f"git reader: {self.cwd}: {e}")
+        return self._reader or None
+
+    # ── repository layout ────────────────────────────────────────────────
+
+    def _layout(self):
+        """(toplevel, git_dir, common_dir), each absolute or None, from the
+        reader or one `git rev-parse`. --show-toplevel goes last: in a bare
+        repo or inside .git it fails after the two dirs are printed."""
+        with self._lock:
+            if self._dirs is not None:
+                return self._dirs
+            repo = self._repository()
+            if repo is not None:
+                self._dirs = (repo.toplevel, repo.git_dir, repo.common_dir)
+                return self._dirs
+            r = subprocess.run(
+                [*GIT_CMD, "rev-parse", "--git-dir", "--git-common-dir", "--show-toplevel"],
+                cwd=self.cwd, capture_output=True, text=True, timeout=LOOKUP_TIMEOUT_S,
+            )
+            lines = r.stdout.splitlines()
+            dirs = [None, None, None]
+            if len(lines) >= 2:
+                dirs[1:] = [d if os.path.isabs(d) else os.path.join(self.cwd or "", d) for d in lines[:2]]
+            if r.returncode == 0 and len(lines) == 3 and lines[2]:
+                dirs[0] = lines[2]
+            self._dirs = tuple(dirs)
+            return self._dirs
+
+    def toplevel(self):
+        return self._layout()[0]
+
+    def git_dir(self):
+        """Per-worktree git dir (where the index lives)."""
+        return self._layout()[1]
+
+    def common_dir(self):
+        """Shared git dir (the main repo's .git for linked worktrees)."""
+        return self._layout()[2]
+
+    # ── objects ──────────────────────────────────────────────────────────
+
+    def _batch_process(self):
+        proc = self._batch
+        if proc is None or proc.poll() is not None:
+            proc = self._batch = subprocess.Popen(
+                [*GIT_CMD, "cat-file", "--batch"], cwd=self.cwd,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            )
+        return proc
+
+    def _wait_readable(self, proc):
+        if os.name == "nt":
+            return  # select() doesn't take pipes there
+        ready, _, _ = select.select([proc.stdout], [], [], LOOKUP_TIMEOUT_S)
+        if not ready:
+            self._close_batch(kill=True)
+            raise subprocess.TimeoutExpired("git cat-file --batch", LOOKUP_TIMEOUT_S)
+
+    def _lookup(self, name):
+        repo = self._repository()
+        if repo is not None:
+            try:
+                return repo.lookup(name)
+            except gitreader.Unsupported as e:
+                debug_log(f"git reader: {name}: {e}")
+        if not ENABLE_GIT_BATCH:
+            r = subprocess.run(
+                [*GIT_CMD, "cat-file", "--batch"], cwd=self.cwd, input=os.fsencode(name) + b"\n",
+                capture_output=True, timeout=LOOKUP_TIMEOUT_S,
+            )
+            return _read_response(io.BytesIO(r.stdout)) if r.returncode == 0 else None
+        proc = self._batch_process()
+        try:
+            proc.stdin.write(os.fsencode(name) + b"\n")
+            proc.stdin.flush()
+            self._wait_readable(proc)
+            return _read_response(proc.stdout)
+        except OSError:
+            # A half-read response would desync every later lookup
+            self._close_batch(kill=True)
+            raise
+
+    def read_object(self, name):
+        """(oid, type, raw bytes) of the object `name` resolves to, or None
+        if it doesn't. Raises OSError / subprocess.TimeoutExpired if git
+        can't be run, like the subprocess calls it replaces."""
+        if "\n" in name:
+            # The batch protocol is line-based; no ref or path we look up
+            # legitimately contains a newline
+            return None
+        memo_key = ("object", name) if _immutable(name) else None
+        with self._lock:
+            if memo_key in self._memo:
+                return self._memo[memo_key]
+            found = self._lookup(name)
+            if memo_key is not None:
+                self._memo[memo_key] = found
+            return found
+
+    def resolve(self, name, kind=None):
+        """Full SHA `name` resolves to (of type `kind` if given), or None."""
+        found = self.read_object(name)
+        if found is None or (kind and found[1] != kind):
+            return None
+        return found[0]
+
+    def head_reflog(self, max_n):
+        """[(sha, committer time, reflog subject)] for the newest `max_n`
+        HEAD reflog entries, newest first, or None if git fails."""
+        with self._lock:
+            repo = self._repository()
+            if repo is not None:
+                try:
+                    return repo.head_reflog(max_n)
+                except gitreader.Unsupported as e:
+                    debug_log(f"git reader: HEAD reflog: {e}")
+        # %gs (the reflog subject) is `commit: <commit-msg first line>` and can
+        # contain `|`; put it LAST so split("|", 2) leaves it intact. %H is
+        # hex and %ct is integer, so the first two fields are delimiter-safe.
+        r = subprocess.run(
+            [*GIT_CMD, "log", "-g", "-n", str(max_n), "--format=%H|%ct|%gs", "HEAD"],
+            cwd=self.cwd, capture_output=True, text=True, timeout=LOOKUP_TIMEOUT_S,
+        )
+        if r.returncode != 0:
+            return None
+        return [tuple(parts) for parts in (line.split("|", 2) for line in r.stdout.splitlines())
+                if len(parts) == 3]
+
+    def is_ancestor(self, maybe_ancestor, descendant):
+        key = ("ancestor", maybe_ancestor, descendant)
+        memoizable = _immutable(maybe_ancestor) and _immutable(descendant)
+        with self._lock:
+            if memoizable and key in self._memo:
+                return self._memo[key]
+        r = subprocess.run(
+            [*GIT_CMD, "merge-base", "--is-ancestor", maybe_ancestor, descendant],
+            cwd=self.cwd, capture_output=True, text=True, timeout=LOOKUP_TIMEOUT_S,
+        )
+        result = r.returncode == 0
+        if memoizable and r.returncode in (0, 1):
+            with self._lock:
+                self._memo[key] = result
+        return result
+
+    # ── lifecycle ────────────────────────────────────────────────────────
+
+    def _close_batch(self, kill=False):
+        proc, self._batch = self._batch, None
+        if proc is None:
+            return
+        try:
+            if kill:
+                proc.kill()
+            else:
+                proc.stdin.close()
+            proc.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            debug_log(f"git cat-file --batch shutdown: {e}")
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._close_batch()
+            if self._reader:
+                self._reader.close()
+            self._reader = None
+
+
+def session(cwd):
+    """The GitSession for `cwd` (created on first use)."""
+    with _sessions_lock:
+        s = _sessions.get(cwd)
+        if s is None:
+            s = _sessions[cwd] = GitSession(cwd)
+        return s
+
+
+@atexit.register
+def close_all():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for s in sessions:
+        s.close()
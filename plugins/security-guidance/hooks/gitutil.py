@@ -1,7 +1,8 @@
 """
 Leaf git/subprocess helpers and diff parsing for the security-guidance plugin.
 
-Everything here is a thin wrapper over ``git``/``subprocess`` plus pure
+Everything here is a thin wrapper over ``git``/``subprocess`` (rev-parse and
+object lookups go through the per-process ``gitsession``) plus pure
 diff-text parsing and source-file classification. None of these functions
 reference any name that the test suite monkeypatches on
 ``security_reminder_hook`` and then calls *through* another function in this
@@ -14,37 +15,26 @@ Functions that DO compose patched leaves (``compute_v2_review_set``,
 ``_list_untracked``, ``_append_reviewed_shas``) deliberately remain in
 ``security_reminder_hook.py`` for that reason.
 """
+import collections
 import contextlib
+import heapq
 import os
-import re
 import subprocess
 
 from _base import debug_log
-
-
-GIT_CMD = [
-    "git",
-    "-c", "core.fsmonitor=false",
-    "-c", "core.hooksPath=/dev/null",
-]
+from diffparse import (DiffFile, DiffStat, diff_file, iter_diff_files, iter_sections, parse_numstat,
+                       unquote_path)
+from gitsession import GIT_CMD, session
 
 
 def _git_rev_parse_head(cwd):
     """Return the current HEAD SHA, or None if not a git repo / no commits."""
     try:
-        result = subprocess.run(
-            [*GIT_CMD, "rev-parse", "HEAD"],
-            cwd=cwd, capture_output=True, text=True, timeout=5
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            return result.stdout.strip()
-        return None
+        return session(cwd).resolve("HEAD")
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         return None
 
 
-
-
 def _find_git_index(cwd):
     """
     Find the real index file for a git repo. Handles worktrees where .git
@@ -52,15 +42,9 @@ def _find_git_index(cwd):
     Returns the absolute path to the index file, or None.
     """
     try:
-        result = subprocess.run(
-            [*GIT_CMD, "rev-parse", "--git-dir"],
-            cwd=cwd, capture_output=True, text=True, timeout=5
-        )
-        if result.returncode != 0:
+        git_dir = session(cwd).git_dir()
+        if not git_dir:
             return None
-        git_dir = result.stdout.strip()
-        if not os.path.isabs(git_dir):
-            git_dir = os.path.join(cwd, git_dir)
         index_path = os.path.join(git_dir, "index")
         return index_path if os.path.isfile(index_path) else None
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
@@ -141,14 +125,150 @@ def _temp_index(cwd, untracked_paths=None):
             pass
 
 
-def _git_toplevel(cwd):
-    """Absolute repo root for `cwd`, or None if not in a work tree."""
+# Untracked files are diffed one `git diff --no-index /dev/null <file>` each
+# (in parallel) instead of through _temp_index, whose copy of the index plus
+# `add -N` rewrite of it costs more than the diff itself in a monorepo with a
+# tens-of-MB index. Past this many files the forks cost more than the copy.
+# SG_UNTRACKED_NO_INDEX=0 always uses the temp index.
+ENABLE_UNTRACKED_NO_INDEX = os.environ.get("SG_UNTRACKED_NO_INDEX", "1") != "0"
+UNTRACKED_NO_INDEX_MAX = 64
+_UNTRACKED_DIFF_WORKERS = 8
+
+
+def _untracked_without_index(cwd, base, untracked_paths):
+    """The surviving `untracked_paths` if they can be diffed without a temp
+    index, else None. They can't when `base` is a range, when there are more
+    than UNTRACKED_NO_INDEX_MAX, or when one exists in `base` (e.g. a file
+    `git rm --cached` this turn): through the temp index that diffs as a
+    modification of the base version, not as a new file."""
+    if not ENABLE_UNTRACKED_NO_INDEX or ".." in base:
+        return None
+    # lexists so dangling symlinks count; status can list a directory (an
+    # embedded repo) as `sub/`, whose gitlink has no content to review
+    surviving = [p for p in untracked_paths
+                 if not p.endswith("/") and os.path.lexists(os.path.join(cwd, p))]
+    if len(surviving) > UNTRACKED_NO_INDEX_MAX:
+        return None
+    git = session(cwd)
     try:
+        if any(git.read_object(f"{base}:{p}") is not None for p in surviving):
+            return None
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
+        debug_log(f"_untracked_without_index({base!r}) error: {e}")
+        return None
+    return surviving
+
+
+def _diff_untracked(cwd, paths, full_context=False):
+    """{path: `git diff` section showing it as a new file} for `paths`
+    (relative to cwd). A file that can't be diffed (removed since `git
+    status`) is left out, as _temp_index leaves it out. --no-index output
+    matches what an intent-to-add entry produces: same header, blob id,
+    mode, quoting, and .gitattributes/autocrlf conversion."""
+    def _one(path):
         r = subprocess.run(
-            [*GIT_CMD, "rev-parse", "--show-toplevel"],
-            cwd=cwd, capture_output=True, text=True, timeout=5,
+            [*GIT_CMD, "diff", "--no-index", "--no-color", "--no-ext-diff"]
+            + (["--unified=99999"] if full_context else []) + ["--", os.devnull, path],
+            cwd=cwd, capture_output=True, timeout=30,
         )
-        return r.stdout.strip() if r.returncode == 0 and r.stdout.strip() else None
+        # --no-index exits 1 when the files differ, which they always do here
+        if r.returncode not in (0, 1):
+            debug_log(f"git diff --no-index {path!r} rc={r.returncode}: "
+                      f"{r.stderr[:200].decode('utf-8', errors='replace')}")
+            return None
+        return r.stdout
+
+    if not paths:
+        return {}
+    if len(paths) == 1:
+        results = [_one(paths[0])]
+    else:
+        import concurrent.futures as _cf
+        with _cf.ThreadPoolExecutor(max_workers=min(_UNTRACKED_DIFF_WORKERS, len(paths))) as ex:
+            results = list(ex.map(_one, paths))
+    return {p: r for p, r in zip(paths, results) if r is not None}
+
+
+def _diff_section_key(section):
+    """Sort key for one `diff --git` section: its path as bytes, the order
+    git itself emits files in. Uses the b/ side (the a/ side only differs
+    for renames)."""
+    header = section.split(b"\n", 1)[0].decode("utf-8", errors="surrogateescape")[len("diff --git "):]
+    if header.endswith('"'):
+        start = header.rfind(' "b/')
+        return unquote_path(header[start + 1:])[2:] if start >= 0 else b""
+    half = (len(header) - 1) // 2
+    if header[half] == " " and header[2:half] == header[half + 3:]:
+        return header[half + 3:].encode("utf-8", errors="surrogateescape")
+    start = header.rfind(" b/")
+    return header[start + 3:].encode("utf-8", errors="surrogateescape")
+
+
+def _merge_diff_sections(sections, untracked):
+    """Interleave untracked-file sections into the sections of a tracked
+    `git diff` as they stream past, in git's path order, so the result
+    reads like one `git diff` over a temp index (where MAX_DIFF_FILES /
+    byte caps cut the tail, order matters)."""
+    pending = sorted((s for s in untracked.values() if s), key=_diff_section_key)
+    for section in sections:
+        if pending and section.startswith(b"diff --git "):
+            key = _diff_section_key(section)
+            while pending and _diff_section_key(pending[0]) < key:
+                yield pending.pop(0)
+        yield section
+    yield from pending
+
+
+def _stream_output(cmd, cwd, timeout, status, env=None):
+    """Yield the stdout of `cmd` in chunks (bytes) as git writes it, so a
+    big diff is parsed while it's produced instead of buffered whole. Once
+    exhausted, status["rc"] and status["stderr"] (first 200 bytes) are
+    set. Raises subprocess.TimeoutExpired if git runs past `timeout` (it's
+    killed), like subprocess.run(timeout=...)."""
+    import tempfile
+    import threading
+
+    # stderr to a file, not a pipe: nobody reads a pipe until stdout ends,
+    # and a chatty git (CRLF warnings per file) would block on a full one
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=err)
+        expired = threading.Event()
+
+        def _kill():
+            expired.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield from iter(lambda: proc.stdout.read1(_STREAM_CHUNK), b"")
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            rc = proc.wait()
+        if expired.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        err.seek(0)
+        status["rc"] = rc
+        status["stderr"] = err.read(200)
+
+
+_STREAM_CHUNK = 1 << 16
+
+
+def _decoded(sections):
+    # Per section is the same as decoding the whole output: sections end
+    # at a newline, which never falls inside a UTF-8 sequence.
+    # errors='replace' so binary diffs don't crash
+    for section in sections:
+        yield section.decode("utf-8", errors="replace")
+
+
+def _git_toplevel(cwd):
+    """Absolute repo root for `cwd`, or None if not in a work tree."""
+    try:
+        return session(cwd).toplevel()
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         return None
 
@@ -164,14 +284,7 @@ def _git_dir(repo_root):
     callers can degrade (push-sweep state is best-effort).
     """
     try:
-        r = subprocess.run(
-            [*GIT_CMD, "rev-parse", "--git-common-dir"],
-            cwd=repo_root, capture_output=True, text=True, timeout=5,
-        )
-        if r.returncode != 0:
-            return None
-        d = r.stdout.strip()
-        return d if os.path.isabs(d) else os.path.join(repo_root, d)
+        return session(repo_root).common_dir()
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         return None
 
@@ -210,14 +323,21 @@ def _git_diff_range(repo_root, base, head="HEAD"):
         return None
 
 
+def _git_diff_range_files(repo_root, base, head="HEAD"):
+    """_git_diff_range() parsed as it streams: a DiffFile per file on
+    success (unreviewable or hunkless ones with empty content), None on
+    error — same failure contract."""
+    try:
+        return _git_diff_files(
+            [*GIT_CMD, "diff", "-p", "--no-color", "--no-ext-diff", base, head], repo_root, 30)
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return None
+
+
 def _detect_main_branch(repo_root):
     for ref in ("origin/HEAD", "origin/main", "origin/master", "main", "master"):
         try:
-            r = subprocess.run(
-                [*GIT_CMD, "rev-parse", "--verify", "-q", ref],
-                cwd=repo_root, capture_output=True, text=True, timeout=5,
-            )
-            if r.returncode == 0 and r.stdout.strip():
+            if session(repo_root).resolve(ref):
                 return ref
         except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
             pass
@@ -256,26 +376,15 @@ def _git_reflog_recent_commits(repo_root, max_age_s=120, max_n=5):
     if not repo_root:
         return [], 0
     try:
-        # %gs (the reflog subject) is `commit: <commit-msg first line>` and can
-        # contain `|`; put it LAST so split("|", 2) leaves it intact. %H is
-        # hex and %ct is integer, so the first two fields are delimiter-safe.
-        r = subprocess.run(
-            [*GIT_CMD, "log", "-g", "-n", str(max_n),
-             "--format=%H|%ct|%gs", "HEAD"],
-            cwd=repo_root, capture_output=True, text=True, timeout=5,
-        )
+        entries = session(repo_root).head_reflog(max_n)
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         return [], 0
-    if r.returncode != 0:
+    if entries is None:
         return [], 0
     import time as _time
     now = int(_time.time())
     fresh, stale = [], 0
-    for idx, line in enumerate(r.stdout.splitlines()):
-        parts = line.split("|", 2)
-        if len(parts) != 3:
-            continue
-        sha, ct, subject = parts
+    for idx, (sha, ct, subject) in enumerate(entries):
         # `commit: msg`, `commit (amend): msg`, `commit (initial): msg`,
         # `commit (merge): msg` — all create a reviewable commit object.
         if not subject.startswith("commit"):
@@ -300,6 +409,26 @@ def _git_reflog_recent_commits(repo_root, max_age_s=120, max_n=5):
     return fresh, stale
 
 
+def _untracked_names_without_index(cwd, base):
+    """Repo-root-relative untracked paths under cwd (what `add -N .` in
+    _temp_index would add), or None if the temp index is still needed for
+    `git diff --name-only base` (see _untracked_without_index)."""
+    if not ENABLE_UNTRACKED_NO_INDEX or ".." in base:
+        return None
+    r = subprocess.run(
+        [*GIT_CMD, "-c", "core.quotePath=false", "ls-files", "--others",
+         "--exclude-standard", "--full-name", "-z"],
+        cwd=cwd, capture_output=True, text=True, timeout=30,
+    )
+    if r.returncode != 0:
+        return None
+    untracked = {p for p in r.stdout.split("\0") if p and not p.endswith("/")}
+    git = session(cwd)
+    if any(git.read_object(f"{base}:{p}") is not None for p in untracked):
+        return None
+    return untracked
+
+
 def _git_name_only(cwd, base, include_untracked=False):
     """Return the set of repo-root-relative paths that differ from `base`,
     or None if git failed (unresolvable ref, not a repo, timeout). Callers
@@ -320,6 +449,10 @@ def _git_name_only(cwd, base, include_untracked=False):
     try:
         if not include_untracked:
             return _run(None)
+        untracked = _untracked_names_without_index(cwd, base)
+        if untracked is not None:
+            changed = _run(None)
+            return None if changed is None else changed | untracked
         with _temp_index(cwd) as env:
             return _run(env)
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
@@ -378,16 +511,24 @@ def _is_ancestor(cwd, maybe_ancestor, descendant):
     """True if `maybe_ancestor` is reachable from `descendant` (i.e. HEAD
     moved forward via commit/merge, not sideways via checkout)."""
     try:
-        result = subprocess.run(
-            [*GIT_CMD, "merge-base", "--is-ancestor", maybe_ancestor, descendant],
-            cwd=cwd, capture_output=True, text=True, timeout=5,
-        )
-        return result.returncode == 0
+        return session(cwd).is_ancestor(maybe_ancestor, descendant)
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         return False
 
 
 
+def _in_pathspec(rel_paths, pathspec):
+    """The `rel_paths` (relative to cwd) a _diff_pathspec result selects:
+    all of them for an unrestricted diff, else those equal to or under one
+    of its paths."""
+    if not pathspec:
+        return list(rel_paths)
+    specs = [s.rstrip("/") for s in pathspec[1:]]
+    if "." in specs:
+        return list(rel_paths)
+    return [p for p in rel_paths if any(p == s or p.startswith(s + "/") for s in specs)]
+
+
 def get_git_diff(cwd, baseline_sha, full_context=False, paths=None, untracked_paths=None):
     """
     Get the git diff between the baseline SHA and the current working tree,
@@ -401,7 +542,10 @@ def get_git_diff(cwd, baseline_sha, full_context=False, paths=None, untracked_pa
     If `paths` is given, the diff is restricted to those paths (relative to
     cwd; absolute paths are converted, paths outside cwd are dropped).
     `untracked_paths` (repo-root-relative) is forwarded to _temp_index so it
-    can add only those files instead of scanning the whole worktree.
+    can add only those files instead of scanning the whole worktree. When
+    the caller knows the untracked set there is usually no temp index at
+    all: the tracked diff runs against the real index and each untracked
+    file is diffed against /dev/null (see _untracked_without_index).
     """
     pathspec = _diff_pathspec(cwd, paths)
     if paths and not pathspec:
@@ -411,22 +555,314 @@ def get_git_diff(cwd, baseline_sha, full_context=False, paths=None, untracked_pa
         # change exists to fix.
         return ""
 
-    cmd = [*GIT_CMD, "diff", "--no-color", "--no-ext-diff", baseline_sha] + (["--unified=99999"] if full_context else []) + pathspec
+    status = {}
+    try:
+        out = b"".join(_git_diff_sections(cwd, baseline_sha, full_context, pathspec, untracked_paths, status))
+        if status["rc"] != 0:
+            debug_log(f"git diff failed: {status['stderr'].decode('utf-8', errors='replace')}")
+            return None
+        # Decode with errors='replace' so binary diffs don't crash
+        return out.decode("utf-8", errors="replace")
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
+        debug_log(f"git diff error: {e}")
+        return None
+
+
+def get_git_diff_files(cwd, baseline_sha, full_context=False, paths=None, untracked_paths=None):
+    """get_git_diff() parsed as git streams it: a DiffFile per changed file
+    ([] for no changes), or None on error. Files that aren't reviewable
+    source, or have no hunks (binary, mode-only), come back with empty
+    content — see parse_diff_into_files for the filtered list."""
+    pathspec = _diff_pathspec(cwd, paths)
+    if paths and not pathspec:
+        return []
+    status = {}
     try:
+        sections = _decoded(_git_diff_sections(cwd, baseline_sha, full_context, pathspec, untracked_paths, status))
+        files = list(iter_diff_files(sections, keep=_is_reviewable_source))
+        if status["rc"] != 0:
+            debug_log(f"git diff failed: {status['stderr'].decode('utf-8', errors='replace')}")
+            return None
+        return files
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
+        debug_log(f"git diff error: {e}")
+        return None
+
+
+def _git_diff_sections(cwd, baseline_sha, full_context, pathspec, untracked_paths, status):
+    """Per-file sections (bytes) of get_git_diff's diff, as git produces
+    them; `status` as for _stream_output once exhausted."""
+    cmd = [*GIT_CMD, "diff", "--no-color", "--no-ext-diff", baseline_sha] + (["--unified=99999"] if full_context else []) + pathspec
+    untracked = None
+    if untracked_paths is not None:
+        untracked = _untracked_without_index(cwd, baseline_sha, _in_pathspec(untracked_paths, pathspec))
+    if untracked is not None:
+        # No temp index: untracked files aren't in the real index, so the
+        # plain diff leaves them out and _diff_untracked adds them
+        untracked_diffs = _diff_untracked(cwd, untracked, full_context)
+        yield from _merge_diff_sections(iter_sections(_stream_output(cmd, cwd, 30, status)), untracked_diffs)
+    else:
         with _temp_index(cwd, untracked_paths) as env:
             # env is None when no index could be found (bare repo / not a
             # repo) — diff still runs, just without untracked-file support.
-            result = subprocess.run(cmd, cwd=cwd, capture_output=True, timeout=30, env=env)
-        if result.returncode != 0:
-            debug_log(f"git diff failed: {result.stderr[:200].decode('utf-8', errors='replace')}")
-            return None
-        # Decode with errors='replace' so binary diffs don't crash
-        return result.stdout.decode("utf-8", errors="replace")
+            yield from iter_sections(_stream_output(cmd, cwd, 30, status, env=env))
+
+
+def _git_diff_files(cmd, cwd, timeout, env=None):
+    """Run a git command that prints a diff (`git show -p`, `git diff A B`)
+    and parse its output as it streams: a DiffFile per file, or None if git
+    exits non-zero. Raises like subprocess.run(timeout=...)."""
+    status = {}
+    sections = _decoded(iter_sections(_stream_output(cmd, cwd, timeout, status, env=env)))
+    files = list(iter_diff_files(sections, keep=_is_reviewable_source))
+    if status["rc"] != 0:
+        debug_log(f"git diff failed: {status['stderr'].decode('utf-8', errors='replace')}")
+        return None
+    return files
+
+
+# The Stop review sends at most MAX_DIFF_FILES files and DIFF_TOTAL_BYTES of
+# hunks; on a scaffolding turn the full diff is megabytes of which the prompt
+# keeps a few hundred KB. select_git_diff_files ranks files from `--numstat`
+# and fetches hunks in that order until the budget is spent.
+# SG_DIFF_BUDGET=0 parses the whole diff instead.
+ENABLE_DIFF_BUDGET = os.environ.get("SG_DIFF_BUDGET", "1") != "0"
+_DIFF_FETCH_WORKERS = 8
+# Bytes per changed line, to guess from --numstat counts how many files the
+# remaining budget covers. Low on purpose: a guess that's too small fetches
+# a few files the prompt omits; one that's too big costs another round.
+_DIFF_LINE_BYTES = 40
+# Below about this much diff per process, another parallel `git diff` costs
+# more (process start, index read) than it saves.
+_DIFF_FETCH_SPLIT_BYTES = 64 * 1024
+
+DiffSelection = collections.namedtuple("DiffSelection", "files changed reviewable dropped skipped_bytes",
+                                       defaults=(0,))
+DiffSelection.__doc__ = """What select_git_diff_files picked: the DiffFiles to
+review, how many files the diff touches at all, how many of those are
+reviewable source with hunks, how many of those `max_files` cut, and an
+estimate (from --numstat) of the hunk bytes of the files returned empty
+because the budget ran out. The prompt caps would have cut those bytes
+from the whole diff, so they belong in the `diff_truncated` metric."""
+
+
+def select_git_diff_files(cwd, baseline_sha, paths=None, untracked_paths=None, max_files=30,
+                          max_reviewable=None, per_file_bytes=80000, total_bytes=400000,
+                          filter_base=None):
+    """
+    The files the Stop review sends, as a DiffSelection (None on error):
+    get_git_diff's reviewable files with hunks, the top `max_files` of them
+    by _prioritize_diff_files, run through filter_preexisting_from_diff
+    against `filter_base` (if given). Over `max_reviewable` reviewable
+    files, nothing is fetched and `files` is empty.
+
+    Only as much diff as the prompt can use is generated: `git diff
+    --numstat` lists the files and their line counts, which rank them
+    exactly as their hunks would, then the hunks are fetched in review
+    order, a round of files at a time with up to _DIFF_FETCH_WORKERS `git
+    diff -- <paths>` processes in parallel, until `total_bytes` (counting
+    each file up to `per_file_bytes`, as the prompt caps do) is spent. The
+    files after that are returned with empty content: the prompt caps omit
+    them either way, so the prompt is the same as from the whole diff. When
+    everything fits, the files are the same as from the whole diff.
+
+    `cwd` must be the repo root (as in the Stop review): --numstat paths are
+    root-relative and go back to git as pathspecs from there.
+    """
+    pathspec = _diff_pathspec(cwd, paths)
+    if paths and not pathspec:
+        return DiffSelection([], 0, 0, 0)
+    if not ENABLE_DIFF_BUDGET:
+        return _select_from_full_diff(cwd, baseline_sha, paths, untracked_paths, max_files,
+                                      max_reviewable, filter_base)
+    untracked = None
+    if untracked_paths is not None:
+        untracked = _untracked_without_index(cwd, baseline_sha, _in_pathspec(untracked_paths, pathspec))
+    limits = (max_files, max_reviewable, per_file_bytes, total_bytes)
+    try:
+        if untracked is not None:
+            return _select_within_budget(cwd, baseline_sha, pathspec, untracked, None, limits, filter_base)
+        with _temp_index(cwd, untracked_paths) as env:
+            return _select_within_budget(cwd, baseline_sha, pathspec, None, env, limits, filter_base)
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
         debug_log(f"git diff error: {e}")
         return None
 
 
+def _select_from_full_diff(cwd, baseline_sha, paths, untracked_paths, max_files, max_reviewable,
+                           filter_base):
+    """select_git_diff_files by parsing the whole diff (SG_DIFF_BUDGET=0)."""
+    sections = get_git_diff_files(cwd, baseline_sha, paths=paths, untracked_paths=untracked_paths)
+    if sections is None:
+        return None
+    files = parse_diff_into_files(sections)
+    if max_reviewable is not None and len(files) > max_reviewable:
+        return DiffSelection([], len(sections), len(files), 0)
+    selected, dropped = _prioritize_diff_files(files, max_files)
+    if filter_base:
+        selected = filter_preexisting_from_diff(selected, cwd, filter_base)
+    return DiffSelection(selected, len(sections), len(files), dropped)
+
+
+def _select_within_budget(cwd, baseline_sha, pathspec, untracked, env, limits, filter_base):
+    max_files, max_reviewable, per_file_bytes, total_bytes = limits
+    r = subprocess.run(
+        [*GIT_CMD, "diff", "--numstat", "-z", "--no-color", "--no-ext-diff", baseline_sha] + pathspec,
+        cwd=cwd, env=env, capture_output=True, timeout=30,
+    )
+    if r.returncode != 0:
+        debug_log(f"git diff --numstat failed: {r.stderr[:200].decode('utf-8', errors='replace')}")
+        return None
+    stats = parse_numstat(r.stdout)
+    if untracked:
+        stats = _merge_numstat(stats, _untracked_numstat(cwd, untracked))
+
+    # Binary, mode-only and rename-only changes have no hunks
+    candidates = [s for s in stats
+                  if s.added is not None and (s.added or s.removed) and _is_reviewable_source(s.path)]
+    if max_reviewable is not None and len(candidates) > max_reviewable:
+        return DiffSelection([], len(stats), len(candidates), 0)
+    order, dropped = candidates, 0
+    if len(candidates) > max_files:
+        # The whole ranking, not just the top max_files: a file that comes
+        # back without hunks after all leaves its slot to the next one, as
+        # if it had never been ranked — which is what parsing the whole
+        # diff gives
+        order = sorted(candidates, key=_diff_priority, reverse=True)
+        dropped = len(candidates) - max_files
+
+    files, total, pos = [], 0, 0
+    seen_bytes, seen_lines = 0, 0  # hunk bytes per changed line, as fetched
+    while pos < len(order) and len(files) < max_files and total < total_bytes:
+        window, guess = [], 0
+        while pos < len(order) and len(files) + len(window) < max_files \
+                and (not window or total + guess < total_bytes):
+            stat = order[pos]
+            pos += 1
+            window.append(stat)
+            guess += min(per_file_bytes, (stat.added + stat.removed) * _DIFF_LINE_BYTES)
+        fetched = _fetch_diff_files(cwd, baseline_sha, window, untracked, env)
+        if fetched is None:
+            return None
+        for stat in window:
+            item = fetched.get(_header_decoded(stat.path))
+            if item is None or not item.content:
+                continue
+            if filter_base:
+                item = filter_preexisting_from_diff([item], cwd, filter_base)[0]
+            files.append(item)
+            total += min(item.size, per_file_bytes)
+            seen_bytes += item.size
+            seen_lines += stat.added + stat.removed
+    # Past the budget: the prompt caps print these as "[omitted ...]"
+    # whatever their content, so there's no need to generate it. Their size
+    # for the diff_truncated metric is estimated at the bytes per changed
+    # line (context included) of the files that were fetched
+    skipped = order[pos:pos + max(0, max_files - len(files))]
+    files.extend(DiffFile(_header_decoded(stat.path), "") for stat in skipped)
+    line_bytes = seen_bytes / seen_lines if seen_lines else _DIFF_LINE_BYTES
+    skipped_bytes = int(sum(stat.added + stat.removed for stat in skipped) * line_bytes)
+    return DiffSelection(files, len(stats), len(candidates), dropped, skipped_bytes)
+
+
+def _header_decoded(path):
+    """A --numstat path (surrogateescape, so it goes back to git as the
+    same bytes) decoded the way DiffFile paths from diff headers are, with
+    errors='replace'. Identical for any UTF-8 name."""
+    return path.encode("utf-8", errors="surrogateescape").decode("utf-8", errors="replace")
+
+
+def _fetch_diff_files(cwd, baseline_sha, stats, untracked, env):
+    """{path: DiffFile} for the files in `stats`, keyed by DiffFile path
+    (see _header_decoded), fetched in parallel: the tracked ones split
+    across up to _DIFF_FETCH_WORKERS `git diff -- <paths>` runs (one per
+    _DIFF_FETCH_SPLIT_BYTES or so of expected diff), the untracked ones (no
+    temp index) through _diff_untracked. None if a git run fails."""
+    import concurrent.futures as _cf
+
+    new = set(untracked or ())
+    tracked = [s for s in stats if s.path not in new]
+    guess = sum((s.added + s.removed) * _DIFF_LINE_BYTES for s in tracked)
+    n = max(1, min(_DIFF_FETCH_WORKERS, len(tracked), guess // _DIFF_FETCH_SPLIT_BYTES))
+    size = -(-len(tracked) // n) or 1
+    groups = [tracked[i:i + size] for i in range(0, len(tracked), size)]
+
+    def _tracked(group):
+        # Both sides of a rename, or it diffs as an added file; literal so
+        # a `*` or `[` in a name isn't a glob
+        specs = []
+        for stat in group:
+            specs.append(f":(top,literal){stat.path}")
+            if stat.old_path:
+                specs.append(f":(top,literal){stat.old_path}")
+        cmd = [*GIT_CMD, "diff", "--no-color", "--no-ext-diff", baseline_sha, "--"] + specs
+        return _git_diff_files(cmd, cwd, 30, env=env)
+
+    def _untracked():
+        diffs = _diff_untracked(cwd, [s.path for s in stats if s.path in new])
+        return list(iter_diff_files(_decoded(diffs.values()), keep=_is_reviewable_source))
+
+    jobs = [(_tracked, group) for group in groups]
+    if any(s.path in new for s in stats):
+        jobs.append((_untracked,))
+    if len(jobs) == 1:
+        results = [jobs[0][0](*jobs[0][1:])]
+    else:
+        with _cf.ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+            results = list(ex.map(lambda job: job[0](*job[1:]), jobs))
+    if any(r is None for r in results):
+        return None
+    return {f.path: f for r in results for f in r}
+
+
+def _untracked_numstat(cwd, paths):
+    """DiffStats for untracked files as new files, counted here rather than
+    by a `git diff --no-index --numstat` per file. Binary as git decides it
+    by default: a NUL in the first 8000 bytes, or a `-diff` / `binary`
+    attribute (one `git check-attr` for all of them)."""
+    no_diff = set()
+    try:
+        r = subprocess.run(
+            [*GIT_CMD, "check-attr", "-z", "--stdin", "diff"],
+            input=b"".join(os.fsencode(p) + b"\0" for p in paths),
+            cwd=cwd, capture_output=True, timeout=10,
+        )
+        fields = r.stdout.split(b"\0")
+        no_diff = {os.fsdecode(fields[i]) for i in range(0, len(fields) - 2, 3) if fields[i + 2] == b"unset"}
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
+        debug_log(f"git check-attr error: {e}")
+
+    stats = []
+    for p in paths:
+        full = os.path.join(cwd, p)
+        try:
+            if os.path.islink(full):
+                added = 1  # the link target, as one line
+            elif p in no_diff:
+                added = None
+            else:
+                with open(full, "rb") as f:
+                    data = f.read()
+                if b"\0" in data[:8000]:
+                    added = None
+                else:
+                    added = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+        except OSError:
+            continue
+        stats.append(DiffStat(p, added, None if added is None else 0, None))
+    return stats
+
+
+def _merge_numstat(stats, new):
+    """Interleave untracked-file stats into git's --numstat order, the way
+    _merge_diff_sections interleaves their sections."""
+    def _key(stat):
+        return stat.path.encode("utf-8", errors="surrogateescape")
+
+    # Stable: on equal keys git's entry comes first
+    return list(heapq.merge(stats, sorted(new, key=_key), key=_key))
+
+
 # Source file extensions worth reviewing for security
 SOURCE_CODE_EXTENSIONS = {
     '.py', '.js', '.ts', '.jsx', '.tsx', '.go', '.java', '.rb', '.php',
@@ -509,13 +945,45 @@ _LOW_PRIORITY_PATH_TOKENS = (
 )
 
 
+def _diff_priority(item):
+    """Sort key (higher first) for _prioritize_diff_files: (risk_tokens_in_path,
+    not_low_priority, added_lines), for a DiffFile, a DiffStat or a plain
+    (path, content) tuple."""
+    fp = item[0]
+    low = fp.lower()
+    # Prepend "/" so leading-slash patterns in _LOW_PRIORITY_PATH_TOKENS
+    # match top-level dirs (git diff paths are repo-root-relative, e.g.
+    # `migrations/001.py` not `/migrations/001.py`). Same trick as
+    # _is_reviewable_source.
+    low_slashed = "/" + low
+    risk = sum(1 for t in _SECURITY_RISK_PATH_TOKENS if t in low)
+    low_prio = (
+        fp.endswith(_LOW_PRIORITY_SUFFIXES)
+        or any(t in low_slashed for t in _LOW_PRIORITY_PATH_TOKENS)
+    )
+    # added_lines: for a plain tuple, count('\n+') over-counts by
+    # including a '+++' header and any literal '+' at line start in
+    # context, but it's a consistent ordinal across files in the same
+    # diff which is all we need. A DiffFile's added lines and a DiffStat's
+    # --numstat count are the same number, so ranking a diff by either
+    # gives the same order.
+    if isinstance(item, DiffStat):
+        added = item.added or 0
+    elif isinstance(item, DiffFile):
+        added = len(item.added)
+    else:
+        added = item[1].count("\n+")
+    return (risk, not low_prio, added)
+
+
 def _prioritize_diff_files(diff_files, cap):
     """When `diff_files` exceeds `cap`, return the top-`cap` by security
     relevance plus the count dropped. Otherwise return (diff_files, 0).
 
-    Score = (risk_tokens_in_path, not_low_priority, added_lines). The
-    added-lines proxy is `content.count('\\n+')` which counts diff additions
-    cheaply without re-parsing hunks. This is a heuristic, not a guarantee —
+    Score = (risk_tokens_in_path, not_low_priority, added_lines). A
+    DiffFile carries its added lines already; for a plain tuple the proxy is
+    `content.count('\\n+')`, which counts diff additions cheaply without
+    re-parsing hunks. This is a heuristic, not a guarantee —
     the goal is to review the likely-dangerous subset of an over-cap diff
     instead of reviewing nothing. Diffs that exceed the cap are typically
     large multi-file scaffolds, and the cross-file source→sink vulnerabilities
@@ -524,26 +992,7 @@ def _prioritize_diff_files(diff_files, cap):
     if len(diff_files) <= cap:
         return diff_files, 0
 
-    def _score(item):
-        fp, content = item
-        low = fp.lower()
-        # Prepend "/" so leading-slash patterns in _LOW_PRIORITY_PATH_TOKENS
-        # match top-level dirs (git diff paths are repo-root-relative, e.g.
-        # `migrations/001.py` not `/migrations/001.py`). Same trick as
-        # _is_reviewable_source.
-        low_slashed = "/" + low
-        risk = sum(1 for t in _SECURITY_RISK_PATH_TOKENS if t in low)
-        low_prio = (
-            fp.endswith(_LOW_PRIORITY_SUFFIXES)
-            or any(t in low_slashed for t in _LOW_PRIORITY_PATH_TOKENS)
-        )
-        # added_lines: count('\n+') over-counts by including '+++' header and
-        # any literal '+' at line start in context, but it's a consistent
-        # ordinal across files in the same diff which is all we need.
-        added = content.count("\n+")
-        return (risk, not low_prio, added)
-
-    ranked = sorted(diff_files, key=_score, reverse=True)
+    ranked = sorted(diff_files, key=_diff_priority, reverse=True)
     return ranked[:cap], len(diff_files) - cap
 
 
@@ -592,66 +1041,24 @@ def extract_file_paths_from_diff(diff_output):
     """
     if not diff_output or not diff_output.strip():
         return []
-
-    paths = []
-    file_diffs = diff_output.split("diff --git ")
-
-    for file_diff in file_diffs:
-        if not file_diff.strip():
-            continue
-        lines = file_diff.split('\n')
-        header_match = re.match(r'^a/(.+?) b/(.+)$', lines[0])
-        if not header_match:
-            continue
-        file_path = header_match.group(2) or header_match.group(1) or ''
-        if not _is_reviewable_source(file_path):
-            continue
-        paths.append(file_path)
-
-    return paths
-
+    # keep=False: only the headers are needed, don't accumulate hunks
+    return [f.path for f in iter_diff_files([diff_output], keep=lambda _: False)
+            if _is_reviewable_source(f.path)]
 
 
 def parse_diff_into_files(diff_output):
     """
-    Parse unified diff output into a list of (file_path, diff_content) tuples.
-    Only includes files with source code extensions.
+    Parse unified diff output into a list of (file_path, diff_content)
+    tuples — DiffFiles, with hunks and added/removed lines split out.
+    Only includes files with source code extensions and at least one hunk.
+    `diff_output` is the diff text, or the DiffFiles get_git_diff_files /
+    _git_diff_files already parsed (filtered here the same way).
     """
-    if not diff_output or not diff_output.strip():
+    if not diff_output:
         return []
-
-    files = []
-    file_diffs = diff_output.split("diff --git ")
-
-    for file_diff in file_diffs:
-        if not file_diff.strip():
-            continue
-
-        # Extract filename from first line: "a/path/to/file b/path/to/file"
-        lines = file_diff.split('\n')
-        header_match = re.match(r'^a/(.+?) b/(.+)$', lines[0])
-        if not header_match:
-            continue
-
-        file_path = header_match.group(2) or header_match.group(1) or ''
-
-        # Filter to source code files only
-        if not _is_reviewable_source(file_path):
-            continue
-
-        # Extract the diff content (from first @@ onwards)
-        diff_lines = []
-        in_hunks = False
-        for line in lines[1:]:
-            if line.startswith('@@'):
-                in_hunks = True
-            if in_hunks:
-                diff_lines.append(line)
-
-        if diff_lines:
-            files.append((file_path, '\n'.join(diff_lines)))
-
-    return files
+    if isinstance(diff_output, str):
+        diff_output = iter_diff_files([diff_output], keep=_is_reviewable_source)
+    return [f for f in diff_output if f.content]
 
 
 def filter_preexisting_from_diff(diff_files, cwd, baseline_sha):
@@ -666,27 +1073,25 @@ def filter_preexisting_from_diff(diff_files, cwd, baseline_sha):
         return diff_files
 
     filtered = []
-    for file_path, diff_content in diff_files:
-        lines = diff_content.split('\n')
-
-        # Collect removed and added lines (stripping the +/- prefix)
-        removed_lines = set()
-        added_lines = []
-        for line in lines:
-            if line.startswith('-') and not line.startswith('---'):
-                removed_lines.add(line[1:].strip())
-            elif line.startswith('+') and not line.startswith('+++'):
-                added_lines.append(line[1:].strip())
+    for item in diff_files:
+        if not isinstance(item, DiffFile):
+            item = diff_file(*item)
+        file_path, diff_content = item
+
+        # Added and removed lines (without the +/- prefix), split out once
+        # by the parser
+        removed_lines = {line.strip() for line in item.removed}
+        added_lines = [line.strip() for line in item.added]
 
         if not removed_lines:
             # New file, no pre-existing content to filter
-            filtered.append((file_path, diff_content))
+            filtered.append(item)
             continue
 
         # Check what fraction of added lines were pre-existing
         preexisting_count = sum(1 for l in added_lines if l in removed_lines)
         if preexisting_count == 0:
-            filtered.append((file_path, diff_content))
+            filtered.append(item)
             continue
 
         added_lines_set = set(added_lines)
@@ -699,15 +1104,15 @@ def filter_preexisting_from_diff(diff_files, cwd, baseline_sha):
         # miss everything; the diff-review prompt's previous-findings recheck
         # is the backstop.
         new_lines = []
-        for line in lines:
-            if line.startswith('+') and not line.startswith('+++'):
+        for line in diff_content.split('\n'):
+            if line.startswith('+'):
                 content = line[1:].strip()
                 if content in removed_lines:
                     # Convert to context line (pre-existing, not new)
                     new_lines.append(' ' + line[1:])
                 else:
                     new_lines.append(line)
-            elif line.startswith('-') and not line.startswith('---'):
+            elif line.startswith('-'):
                 content = line[1:].strip()
                 if content in added_lines_set:
                     # Skip removed lines that were re-added (they become context)
@@ -717,7 +1122,7 @@ def filter_preexisting_from_diff(diff_files, cwd, baseline_sha):
             else:
                 new_lines.append(line)
 
-        filtered.append((file_path, '\n'.join(new_lines)))
+        filtered.append(diff_file(file_path, '\n'.join(new_lines)))
 
     return filtered
 
@@ -25,6 +25,7 @@ import sys
 import urllib.request
 from typing import Optional, Tuple, Dict, Any, List
 
+import diffparse
 import extensibility
 import review_api
 from _base import debug_log, _record_usage, _PV, PROVENANCE_TAG  # noqa: F401
@@ -1388,10 +1389,10 @@ def agentic_review(
     # normalized whitespace; keep if any non-trivial token from the cited code
     # appears on a +-line (lenient — only drops obvious unchanged-context hits).
     if os.environ.get("SG_AGENTIC_DIFF_INTERSECT") != "0":
-        added = [ln[1:] for ln in diff_text.splitlines()
-                 if ln.startswith("+") and not ln.startswith("+++")]
-        removed = [ln[1:] for ln in diff_text.splitlines()
-                   if ln.startswith("-") and not ln.startswith("---")]
+        # From the parsed files, not diff_text: their +/- lines are already
+        # split out, and a line cut from the prompt by the byte cap is still
+        # part of the change.
+        added, removed = diffparse.added_removed(diff_files)
 
         def _norm(s: str) -> str:
             return " ".join(t for t in " ".join(s.split()).split() if len(t) > 2)
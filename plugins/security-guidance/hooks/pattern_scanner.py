@@ -0,0 +1,361 @@
+"""
+Precompiled scanner for SECURITY_PATTERNS-shaped rules.
+
+check_patterns() used to loop over every rule, run its substring loop, and
+call an uncompiled re.search() over the whole content, i.e. one full scan
+per rule, 25-75 per edit, with the regexes dominating (about 3s on a 5 MB
+Write). A PatternScanner compiles each rule once and shares one literal-hit
+table across all of them:
+
+  - every rule substring, plus the literals each regex cannot match without
+    (one of an any-of set, derived from the parsed regex), is a key in the
+    table
+  - each distinct literal is searched for at most once per content, and only
+    when a rule that survived its path_filter asks for it
+  - a regex runs only when one of its required literals is present
+
+The literal searches use str.__contains__ rather than a pure-Python
+Aho-Corasick automaton: per character, C substring search is roughly a
+hundred times cheaper than a Python-level state machine, and a combined
+regex alternation measured slower than separate searches.
+
+scan_hunks() is the incremental form for Edit/MultiEdit: given the edited
+file and the spans the edit wrote, it reports the rules with a match that
+touches a span, searching only a window around each one. The window is
+sized from each rule's longest possible match (plus lookahead) so that the
+result equals the same check run over the whole file.
+
+User rules (the ones extensibility tags with a ``_source``) can be given a
+per-search time budget: their regex runs through regex_budget, and a rule
+whose search blows the budget has its regex disabled for the rest of the
+scanner's life and is listed in ``over_budget`` for the caller to persist
+and report. Apart from that, pure and side-effect-free like patterns.py;
+scan() returns exactly what the per-rule loop returns.
+"""
+import hashlib
+import re
+from types import CodeType
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from regex_budget import RegexBudgetExceeded, budgeted_search
+
+try:
+    from re import _constants as _sre, _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants as _sre  # type: ignore
+    import sre_parse as _sre_parse  # type: ignore
+
+_REPEATS = tuple(op for op in (
+    _sre.MAX_REPEAT, _sre.MIN_REPEAT, getattr(_sre, "POSSESSIVE_REPEAT", None),
+) if op is not None)
+_ATOMIC_GROUP = getattr(_sre, "ATOMIC_GROUP", None)
+
+# Alternations with more branches than this aren't worth gating on
+_MAX_ALTERNATIVES = 8
+
+# Longest match scan_hunks() allows for. Unbounded repeats (`\s*`, `[^)]*`)
+# are taken as this long, so a longer match is only found when it starts
+# within this distance of the edit.
+SPAN_CAP = 2048
+
+Requirement = Optional[FrozenSet[str]]
+
+
+def _strength(requirement: FrozenSet[str]) -> int:
+    """How selective an any-of set is: its shortest literal's length."""
+    return min(len(s) for s in requirement)
+
+
+def _sequence_requirement(items: Any, ignorecase: bool) -> Requirement:
+    """Any-of literal set every match of the parsed sequence contains, or
+    None if no useful one is known. Literal runs are case-sensitive, so
+    anything under IGNORECASE contributes nothing."""
+    best: Requirement = None
+    run: List[str] = []
+
+    def consider(requirement: Requirement) -> None:
+        nonlocal best
+        if requirement and (best is None or _strength(requirement) > _strength(best)):
+            best = requirement
+
+    def flush() -> None:
+        if run:
+            consider(frozenset(["".join(run)]))
+            run.clear()
+
+    for op, av in items:
+        if op is _sre.LITERAL and not ignorecase:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is _sre.SUBPATTERN:
+            _, add_flags, _, sub = av
+            consider(_sequence_requirement(
+                sub, ignorecase or bool(add_flags & _sre.SRE_FLAG_IGNORECASE)))
+        elif op in _REPEATS:
+            low, _, sub = av
+            if low >= 1:
+                consider(_sequence_requirement(sub, ignorecase))
+        elif op is _ATOMIC_GROUP:
+            consider(_sequence_requirement(av, ignorecase))
+        elif op is _sre.BRANCH:
+            branches = [_sequence_requirement(b, ignorecase) for b in av[1]]
+            if all(branches):
+                union = frozenset().union(*branches)
+                if len(union) <= _MAX_ALTERNATIVES:
+                    consider(union)
+    flush()
+    return best
+
+
+def _parse(regex: "re.Pattern[str]") -> Any:
+    try:
+        return _sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return None
+
+
+def required_literals(regex: "re.Pattern[str]") -> Requirement:
+    """Literals one of which must occur in any text regex matches, or None."""
+    parsed = _parse(regex)
+    if parsed is None:
+        return None
+    return _sequence_requirement(parsed, bool(regex.flags & re.IGNORECASE))
+
+
+def _lookahead_width(items: Any) -> int:
+    """Upper bound on how far past a match its lookaheads can read."""
+    width = 0
+    for op, av in items:
+        if op in (_sre.ASSERT, _sre.ASSERT_NOT):
+            direction, sub = av
+            if direction > 0:
+                width += min(sub.getwidth()[1], SPAN_CAP) + _lookahead_width(sub)
+        for value in av if isinstance(av, (tuple, list)) else ():
+            if isinstance(value, _sre_parse.SubPattern):
+                width += _lookahead_width(value)
+            elif isinstance(value, (tuple, list)):
+                width += sum(_lookahead_width(v) for v in value
+                             if isinstance(v, _sre_parse.SubPattern))
+    return width
+
+
+def match_reach(regex: "re.Pattern[str]") -> Tuple[int, int]:
+    """(span, lookahead): the longest match regex can make, capped at
+    SPAN_CAP, and how much further its lookaheads can read."""
+    parsed = _parse(regex)
+    if parsed is None:
+        return SPAN_CAP, SPAN_CAP
+    return min(parsed.getwidth()[1], SPAN_CAP), min(_lookahead_width(parsed), SPAN_CAP)
+
+
+def _fingerprint(value: Any) -> str:
+    """Stable text for a rule field; functions by their code, constants and
+    captured defaults, so an edited or re-parameterized filter changes it."""
+    code = value if isinstance(value, CodeType) else getattr(value, "__code__", None)
+    if code is None:
+        return repr(value)
+    # Nested code objects repr with their address; fingerprint them instead
+    consts = tuple(_fingerprint(c) for c in code.co_consts)
+    return repr((code.co_code, consts, code.co_names,
+                 getattr(value, "__defaults__", None)))
+
+
+def rule_set_version(patterns: List[Dict[str, Any]]) -> str:
+    """Digest of a rule list, for caching scan() results across processes."""
+    h = hashlib.sha1()
+    for pattern in patterns:
+        for key in sorted(pattern):
+            h.update(f"{key}={_fingerprint(pattern[key])}\0".encode("utf-8", "replace"))
+        h.update(b"\1")
+    return h.hexdigest()[:16]
+
+
+class _CompiledRule:
+    __slots__ = ("name", "reminder", "path_filter", "path_check",
+                 "substrings", "regex", "gate", "span", "lookahead", "budget", "disabled")
+
+    def __init__(self, pattern: Dict[str, Any], budget: Optional[float] = None):
+        self.name = pattern["ruleName"]
+        self.reminder = pattern["reminder"]
+        self.path_filter: Optional[Callable[[str], bool]] = pattern.get("path_filter")
+        self.path_check: Optional[Callable[[str], bool]] = pattern.get("path_check")
+        self.substrings: Tuple[str, ...] = tuple(pattern.get("substrings") or ())
+        self.regex = None
+        self.gate: Requirement = None
+        self.span = self.lookahead = 0
+        self.budget = budget
+        self.disabled = False
+        if "regex" in pattern:
+            try:
+                self.regex = re.compile(pattern["regex"])
+            except Exception:
+                pass  # never matched, as re.search() raising was ignored
+            else:
+                self.gate = required_literals(self.regex)
+                self.span, self.lookahead = match_reach(self.regex)
+
+    def search(self, text: str, pos: int = 0, endpos: Optional[int] = None):
+        """self.regex.search(), under the rule's budget if it has one."""
+        if endpos is None:
+            endpos = len(text)
+        if self.budget is None:
+            return self.regex.search(text, pos, endpos)
+        return budgeted_search(self.regex, text, pos, endpos, self.budget,
+                               self.span + self.lookahead)
+
+    def regex_touches(self, text: str, start: int, end: int) -> bool:
+        """Whether the regex matches text at a start position whose match,
+        with its lookahead, reaches into text[start:end] (inclusive of the
+        edges, so a deletion point between two halves counts)."""
+        reach = self.span + 2 * self.lookahead
+        # +1 so no match that counts can end on the window edge, where \b
+        # and $ would see the end of the string instead of the next char
+        lo, hi = max(0, start - reach), min(len(text), end + reach + 1)
+        if self.gate is not None and all(text.find(s, lo, hi) == -1 for s in self.gate):
+            return False
+        pos = lo
+        while True:
+            m = self.search(text, pos, hi)
+            if m is None or m.start() - self.lookahead > end:
+                return False
+            if m.end() + self.lookahead >= start:
+                return True
+            pos = m.start() + 1
+
+    def substring_touches(self, text: str, start: int, end: int) -> bool:
+        for substring in self.substrings:
+            if text.find(substring, max(0, start - len(substring)), end + len(substring)) != -1:
+                return True
+        return False
+
+
+class PatternScanner:
+    """Rules from SECURITY_PATTERNS / extensibility.user_patterns(), compiled
+    once and checked against a path and content with scan()."""
+
+    def __init__(self, patterns: List[Dict[str, Any]], user_regex_budget: Optional[float] = None):
+        """user_regex_budget: seconds each search by a user rule's regex may
+        take; None for no limit."""
+        self.rules = [_CompiledRule(p, user_regex_budget if "_source" in p else None)
+                      for p in patterns]
+        self.version = rule_set_version(patterns)
+        # Rules whose regex blew its budget in this scanner, in order
+        self.over_budget: List[str] = []
+
+    @property
+    def budgeted(self) -> bool:
+        """Whether any rule's regex runs under a budget."""
+        return any(rule.budget is not None and rule.regex is not None for rule in self.rules)
+
+    def disable(self, regexes: Dict[str, str]) -> None:
+        """Stop running the regexes of rules named in regexes ({ruleName:
+        regex source}) while they still have that regex, e.g. ones over
+        budget earlier in the session. Their substrings and path checks
+        still apply."""
+        for rule in self.rules:
+            if rule.regex is not None and regexes.get(rule.name) == rule.regex.pattern:
+                rule.disabled = True
+
+    def regex_source(self, name: str) -> Optional[str]:
+        for rule in self.rules:
+            if rule.name == name and rule.regex is not None:
+                return rule.regex.pattern
+        return None
+
+    def _regex_matches(self, rule: _CompiledRule, search: Callable[[], bool]) -> bool:
+        try:
+            return search()
+        except RegexBudgetExceeded:
+            rule.disabled = True
+            self.over_budget.append(rule.name)
+        except Exception:
+            pass
+        return False
+
+    def scan(self, normalized_path: str, content: str) -> List[Tuple[str, str]]:
+        """(ruleName, reminder) for every matching rule, in rule order."""
+        return self.matches(self.scan_indices(normalized_path, content))
+
+    def matches(self, indices: List[int]) -> List[Tuple[str, str]]:
+        """(ruleName, reminder) for rule indices from scan_indices()."""
+        return [(self.rules[i].name, self.rules[i].reminder) for i in indices]
+
+    def scan_hunks(self, normalized_path: str, text: str,
+                   hunks: List[Tuple[int, int]]) -> List[int]:
+        """Like scan_indices(), but for an edit: a rule's substrings and
+        regex count only where a match touches one of the (start, end)
+        spans of text that the edit wrote, checked in a window around each.
+        Equal to the same check over the whole file for any match no longer
+        than SPAN_CAP."""
+        matches = []
+        for index, rule in enumerate(self.rules):
+            if rule.path_filter is not None:
+                try:
+                    if not rule.path_filter(normalized_path):
+                        continue
+                except Exception:
+                    continue
+
+            matched = False
+
+            if rule.path_check is not None:
+                try:
+                    if rule.path_check(normalized_path):
+                        matched = True
+                except Exception:
+                    pass
+
+            if not matched and rule.substrings and text:
+                matched = any(rule.substring_touches(text, start, end) for start, end in hunks)
+
+            if not matched and rule.regex is not None and not rule.disabled and text:
+                matched = self._regex_matches(rule, lambda: any(
+                    rule.regex_touches(text, start, end) for start, end in hunks))
+
+            if matched:
+                matches.append(index)
+        return matches
+
+    def scan_indices(self, normalized_path: str, content: str) -> List[int]:
+        """Indices into self.rules of every matching rule, in rule order."""
+        hits: Dict[str, bool] = {}
+
+        def present(literal: str) -> bool:
+            found = hits.get(literal)
+            if found is None:
+                found = hits[literal] = literal in content
+            return found
+
+        matches = []
+        for index, rule in enumerate(self.rules):
+            # path_filter is a gate: when present, the rule only applies to
+            # matching paths. Distinct from path_check, which is itself a
+            # positive match condition (e.g. .github/workflows/).
+            if rule.path_filter is not None:
+                try:
+                    if not rule.path_filter(normalized_path):
+                        continue
+                except Exception:
+                    continue
+
+            matched = False
+
+            if rule.path_check is not None:
+                try:
+                    if rule.path_check(normalized_path):
+                        matched = True
+                except Exception:
+                    pass
+
+            if not matched and rule.substrings and content:
+                matched = any(present(s) for s in rule.substrings)
+
+            if not matched and rule.regex is not None and not rule.disabled and content:
+                if rule.gate is None or any(present(s) for s in rule.gate):
+                    matched = self._regex_matches(
+                        rule, lambda: rule.search(content) is not None)
+
+            if matched:
+                matches.append(index)
+        return matches
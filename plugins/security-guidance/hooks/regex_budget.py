@@ -0,0 +1,76 @@
+"""
+Time-bounded regex search for user-supplied security patterns.
+
+User regexes from ``security-patterns.{yaml,json}`` are screened by
+``extensibility._has_redos_structure``, a heuristic: polynomial blowups such
+as ``.*.*.*=`` or ``\\w*\\w*\\w*X`` pass it and can run for minutes on a large
+Write. ``budgeted_search`` runs one ``regex.search`` under a deadline and
+raises ``RegexBudgetExceeded`` when it passes:
+
+  - on the main thread of a POSIX process, an ITIMER_REAL alarm interrupts
+    the match itself (the ``re`` engine checks for signals while matching),
+    so a search never runs more than the budget past its start
+  - elsewhere (Windows, worker threads, or an alarm already armed by the
+    caller) the search runs in ``CHUNK``-sized windows and the deadline is
+    checked between them, which bounds a search that is slow because the
+    text is long but not one that blows up within a single window
+
+Windows overlap by the regex's reach (see ``pattern_scanner.match_reach``),
+so the chunked search finds the same leftmost match as a plain search for
+any match no longer than ``pattern_scanner.SPAN_CAP``.
+
+No linear-time engine is used: ``re2`` is not a dependency of the plugin and
+differs from ``re`` on lookarounds and Unicode classes, so verdicts would
+change with what happens to be installed.
+"""
+import threading
+import time
+
+try:
+    import signal
+except ImportError:  # pragma: no cover
+    signal = None  # type: ignore
+
+# Window length for the chunked fallback
+CHUNK = 16 * 1024
+
+
+class RegexBudgetExceeded(Exception):
+    """A budgeted search ran past its deadline and was abandoned."""
+
+
+def _alarm_available() -> bool:
+    return (signal is not None and hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+            and signal.getitimer(signal.ITIMER_REAL)[0] == 0)
+
+
+def _raise_exceeded(signum, frame):
+    raise RegexBudgetExceeded()
+
+
+def budgeted_search(regex, text, pos, endpos, budget_s, overlap):
+    """regex.search(text, pos, endpos), abandoned with RegexBudgetExceeded
+    after budget_s seconds. overlap is how far past a window's end a match
+    starting inside it can read (span + lookahead)."""
+    if _alarm_available():
+        previous = signal.signal(signal.SIGALRM, _raise_exceeded)
+        try:
+            signal.setitimer(signal.ITIMER_REAL, budget_s)
+            return regex.search(text, pos, endpos)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    deadline = time.perf_counter() + budget_s
+    start = pos
+    while True:
+        hi = min(endpos, start + CHUNK + overlap + 1)
+        m = regex.search(text, start, hi)
+        # Past start + CHUNK a match may be cut short, or exist only
+        # because of, the window edge; the next window decides it
+        if hi == endpos or (m is not None and m.start() < start + CHUNK):
+            return m
+        start += CHUNK
+        if time.perf_counter() > deadline:
+            raise RegexBudgetExceeded()
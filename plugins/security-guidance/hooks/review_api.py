@@ -16,8 +16,9 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any
+from typing import Any, Sequence
 
+import diffparse
 import extensibility
 
 # ---------------------------------------------------------------------------
@@ -289,7 +290,8 @@ def build_refute_prompt(candidates: list[dict[str, Any]], diff_text: str) -> str
 
 
 def tag_diff_anchor(
-    candidates: list[dict[str, Any]], diff_text: str
+    candidates: list[dict[str, Any]],
+    diff_text: str | Sequence[tuple[str, str]],
 ) -> list[dict[str, Any]]:
     """SOFT diff-intersect: tag each candidate ``_diff_anchor: "in_diff" |
     "off_diff"`` and sort in_diff first; do NOT drop.
@@ -301,18 +303,13 @@ def tag_diff_anchor(
     keys on the ``_diff_anchor`` tag to apply stricter evidence to
     off_diff candidates instead of dropping them.
 
+    ``diff_text`` is the diff as text, or the ``(path, content)`` files the
+    review ran on — for ``diffparse.DiffFile`` items the added/removed
+    lines are already split out and aren't re-derived from the text.
+
     Mutates ``candidates`` in place; returns it for chaining.
     """
-    added = [
-        ln[1:]
-        for ln in diff_text.splitlines()
-        if ln.startswith("+") and not ln.startswith("+++")
-    ]
-    removed = [
-        ln[1:]
-        for ln in diff_text.splitlines()
-        if ln.startswith("-") and not ln.startswith("---")
-    ]
+    added, removed = diffparse.added_removed(diff_text)
 
     def _norm(s: str) -> str:
         return " ".join(t for t in " ".join(s.split()).split() if len(t) > 2)
@@ -60,7 +60,6 @@ import contextlib
 import glob
 import json
 import os
-import random
 import re
 import subprocess
 import sys
@@ -82,6 +81,7 @@ from _base import (  # noqa: E402,F401
     PROVENANCE_TAG, PROVENANCE_BANNER,
     _read_plugin_version_int, _PV, _USAGE, _USAGE_LOCK,
     _PRICE_PER_MTOK, _PRICE_DEFAULT, _record_usage, _usage_metrics,
+    emit_metrics,
 )
 import extensibility  # noqa: E402
 from patterns import (  # noqa: E402,F401
@@ -90,6 +90,8 @@ from patterns import (  # noqa: E402,F401
     _UNSAFE_TORCH_LOAD_REMINDER, SECURITY_PATTERNS, RuleId,
     _RULE_NAME_TO_ID, rule_names_to_mask,
 )
+from pattern_scanner import PatternScanner  # noqa: E402,F401
+from verdict_cache import VerdictCache, baseline_key, content_key  # noqa: E402,F401
 from session_state import (  # noqa: E402,F401
     _state_key, get_state_file, get_lock_file, cleanup_old_state_files,
     load_state, save_state, with_locked_state,
@@ -98,8 +100,10 @@ from gitutil import (  # noqa: E402,F401
     GIT_CMD,
     _git_rev_parse_head, _find_git_index, _diff_pathspec, _temp_index,
     _git_toplevel, _git_dir, _git_rev_list_range, _git_diff_range,
+    _git_diff_range_files, _git_diff_files,
     _detect_main_branch, _git_reflog_recent_commits, _git_name_only,
-    _git_status_porcelain, _is_ancestor, get_git_diff,
+    _git_status_porcelain, _is_ancestor, get_git_diff, get_git_diff_files,
+    select_git_diff_files,
     SOURCE_CODE_EXTENSIONS, SOURCE_CODE_BASENAMES,
     NON_SOURCE_EXTENSIONLESS_BASENAMES, SKIP_PATH_PATTERNS,
     SKIP_FILE_SUFFIXES, _SECURITY_RISK_PATH_TOKENS,
@@ -110,7 +114,7 @@ from gitutil import (  # noqa: E402,F401
 )
 from diffstate import (  # noqa: E402,F401
     STOP_LOOP_STATE_TTL_SEC, PREVIOUS_FINDINGS_TTL_SEC,
-    save_baseline_sha, load_baseline_sha, record_touched_path,
+    save_baseline_sha, load_baseline_sha, record_touched_path, _add_touched_path,
     consume_stop_state, restore_unreviewed_stop_state,
     get_baseline_file_content, capture_git_baseline,
     _REVIEWED_SHAS_BASENAME, _REVIEWED_SHAS_CAP,
@@ -131,17 +135,24 @@ from llm import (  # noqa: E402,F401
     analyze_code_security, _agentic_commit_review_enabled, agentic_review,
     analyze_security_concerns,
 )
+from edit_hook import (  # noqa: E402,F401
+    ENABLE_PATTERN_RULES, _mark_warning, _file_stamp, _add_pending_warnings,
+    record_edit, _pattern_scanner, check_patterns, baseline_rule_names,
+    MAX_EDIT_HUNKS, edit_hunks, check_edit_patterns, extract_content_from_input,
+    USER_PATTERN_BUDGET_MS, get_disabled_patterns_file, apply_disabled_patterns,
+    record_regex_timeouts, handle_edit_posttooluse,
+)
+import dispatch  # noqa: E402
+from dispatch import (  # noqa: E402,F401
+    SECURITY_GUIDANCE_DISABLED, EDIT_TOOLS,
+    _SDK_BOOTSTRAP_THROTTLE, _maybe_bootstrap_agent_sdk_async,
+)
 
 # LLM-based code security review (enabled by default when API key is available)
 # Empty string or unset = enabled (default); "0" = disabled
 _enable_code_review_str = os.environ.get("ENABLE_CODE_SECURITY_REVIEW", "1")
 ENABLE_CODE_SECURITY_REVIEW = _enable_code_review_str != "0"
 
-# Pattern-based rules (enabled by default; set to "0" to use only LLM review)
-# Empty string or unset = enabled (default); "0" = disabled
-_enable_pattern_str = os.environ.get("ENABLE_PATTERN_RULES", "1")
-ENABLE_PATTERN_RULES = _enable_pattern_str != "0"
-
 # Per-feature kill switches. Each defaults to enabled. Set to "0" to disable
 # just that one feature without touching the rest. Motivated by feedback that
 # autonomous-agent setups sometimes need to disable specific injection points
@@ -160,17 +171,6 @@ ENABLE_COMMIT_REVIEW = os.environ.get("ENABLE_COMMIT_REVIEW", "1") != "0"
 # and stays for backwards compat as the all-LLM-review master switch.
 ENABLE_STOP_REVIEW = os.environ.get("ENABLE_STOP_REVIEW", "1") != "0"
 
-# Master kill switch. Either SECURITY_GUIDANCE_DISABLE=1 or
-# ENABLE_SECURITY_REMINDER=0 disables the plugin entirely. Kept as two names
-# because ENABLE_SECURITY_REMINDER predates the rename and some users already
-# have it baked into shell rc files; SECURITY_GUIDANCE_DISABLE reads correctly
-# as a kill switch (no double-negative).
-_disable_str = os.environ.get("SECURITY_GUIDANCE_DISABLE", "").strip().lower()
-SECURITY_GUIDANCE_DISABLED = (
-    _disable_str in ("1", "true", "yes", "on")
-    or os.environ.get("ENABLE_SECURITY_REMINDER", "1") == "0"
-)
-
 # Maximum number of times the stop hook can fire per user turn.
 # Allows iterative fixing: Claude stops → review → fix → stop → review again.
 # Set to 0 for unlimited (like the old plugin). Default 3 for iterative fixing.
@@ -190,41 +190,6 @@ CONTINUATION_SUFFIX = (
     "response."
 )
 
-def emit_metrics(metrics, rewake_summary=None):
-    """
-    Write a SyncHookJSONOutput line to stdout for Claude Code to pick up.
-    For asyncRewake (Stop) hooks, CC scans stdout for the first {-prefixed line
-    that validates as SyncHookJSONOutput and emits the hook metrics event.
-    For sync (PostToolUse) hooks, the metrics key in the normal JSON response
-    is picked up directly.
-
-    Constraints: keys ^[a-z][a-z0-9_]{0,39}$, values bool|finite-number,
-    20-key cap (was 10 in older CC versions).
-
-    `pv` and the tok_*/cost_usd usage block are PREPENDED so they survive any
-    future overflow — CC keeps only the first 20 keys, so insertion order
-    decides what drops. The old `len(metrics) < 10` guard was load-bearing for
-    the same reason but stale: once `rate_count` was added to every
-    commit-review emit, the with-vulns dict hit 10 keys, `pv` was skipped, and
-    findings metrics landed without a plugin version attached, breaking
-    per-version breakdowns.
-
-    `rewake_summary` (asyncRewake only): per-run override of the static
-    rewakeSummary in hooks.json, shown to the user in the terminal as the
-    task-notification one-liner. Must be in the same JSON line as the metrics
-    because CC stops scanning stdout after the first {-prefixed line.
-    """
-    head = {}
-    if _PV and "pv" not in metrics:
-        head["pv"] = _PV
-    head.update(_usage_metrics())
-    if head:
-        metrics = {**head, **metrics}
-    out = {"metrics": metrics}
-    if rewake_summary:
-        out["rewakeSummary"] = rewake_summary
-    print(json.dumps(out), flush=True)
-
 # =====================================================================
 # State management
 # =====================================================================
@@ -241,11 +206,7 @@ def atomic_check_and_mark_warning(session_id, warning_key):
     False if it was already shown (should skip it).
     """
     def _check(state):
-        warnings = state["shown_warnings"]
-        if warning_key in warnings:
-            return False
-        warnings.append(warning_key)
-        return True
+        return _mark_warning(state, warning_key)
 
     result = with_locked_state(session_id, _check)
     return result if result is not None else True
@@ -315,65 +276,113 @@ def atomic_check_rate_limit(session_id, key, max_per_window, window_s):
 # fixed-vs-unresolved tally. No per-edit work — pending is recorded only
 # when a pattern matches (rare), and the sweep runs once at session end.
 #
-# State key: pending_warnings: {"<file>:<rule>": true}
+# State key: pending_warnings: {"<file>:<rule>": [mtime_ns, size]}, the
+# file's stat when the warning fired (true if it couldn't be taken, and in
+# state written by older versions). The sweep skips re-reading a file whose
+# stat still matches: its content, and so the verdict, hasn't changed.
 # =====================================================================
 
+# Threads the Stop sweep re-reads pending files with (I/O-bound on slow or
+# network filesystems), and how much of each file it reads.
+SWEEP_MAX_WORKERS = 8
+SWEEP_READ_MAX_BYTES = 4 * 1024 * 1024
+
 def record_pending_warnings(session_id, file_path, rule_names):
     """Mark file:rule pairs as pending for the Stop-hook outcome sweep."""
+    stamp = _file_stamp(file_path)
+
     def _record(state):
-        pending = state.get("pending_warnings")
-        if not isinstance(pending, dict):
-            pending = {}
-            state["pending_warnings"] = pending
-        for rule in rule_names:
-            pending[f"{file_path}:{rule}"] = True
+        _add_pending_warnings(state, file_path, rule_names, stamp)
     with_locked_state(session_id, _record)
 
+def _read_if_changed(file_path, stamps):
+    """(unchanged, content) for the rules in stamps ({rule: stamp}):
+    unchanged holds the rules recorded at the file's current stat, which
+    still match without reading it; content is the file's text when some
+    rule needs re-checking, else None (also for a deleted or unreadable
+    file, which matches nothing)."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return set(), None
+    current = [st.st_mtime_ns, st.st_size]
+    unchanged = {rule for rule, stamp in stamps.items() if stamp == current}
+    if len(unchanged) == len(stamps):
+        return unchanged, None
+    try:
+        with open(file_path, "r", errors="replace") as f:
+            return unchanged, f.read(SWEEP_READ_MAX_BYTES)
+    except (OSError, IOError):
+        return unchanged, None
+
 def sweep_pending_warnings(session_id):
     """
     Stop-hook final sweep. Re-read every file in pending_warnings, re-check
     patterns, and return (fixed, unresolved, unresolved_mask). Clears state.
     A file that's been deleted counts as fixed — the dangerous code is gone.
     Never raises — this is telemetry and must not break the Stop hook.
+
+    The session lock is held only to snapshot pending_warnings and, after
+    the files are checked (read in parallel, outside the lock, skipping
+    files unchanged since their warning), to remove the swept entries. An
+    entry re-recorded by a PostToolUse in between is left for the next
+    sweep. The pattern checks themselves run on this thread, where user
+    regexes get a hard time budget (regex_budget).
     """
-    def _sweep(state):
-        try:
-            pending = state.get("pending_warnings")
-            if not isinstance(pending, dict) or not pending:
-                return 0, 0, 0
-
-            by_file = {}
-            for key in pending:
-                if not isinstance(key, str) or ":" not in key:
-                    continue
-                fp, _, rule = key.rpartition(":")
-                by_file.setdefault(fp, set()).add(rule)
-
-            unresolved = []
-            fixed = 0
-            for fp, rules in by_file.items():
-                try:
-                    with open(fp, "r", errors="replace") as f:
-                        still_matching = {r for r, _ in check_patterns(fp, f.read())}
-                except (OSError, IOError):
-                    still_matching = set()
-                for rule in rules:
-                    if rule in still_matching:
-                        unresolved.append(rule)
-                    else:
-                        fixed += 1
-
-            state["pending_warnings"] = {}
-            # Filter to known rules so a renamed/removed rule in old state
-            # doesn't KeyError rule_names_to_mask.
-            known = [r for r in unresolved if r in _RULE_NAME_TO_ID]
-            return fixed, len(unresolved), rule_names_to_mask(known)
-        except Exception as e:
-            debug_log(f"sweep_pending_warnings failed: {e}")
-            return 0, 0, 0
-
-    result = with_locked_state(session_id, _sweep)
-    return result if result is not None else (0, 0, 0)
+    def _snapshot(state):
+        pending = state.get("pending_warnings")
+        return dict(pending) if isinstance(pending, dict) else {}
+
+    snapshot = with_locked_state(session_id, _snapshot)
+    if not snapshot:
+        return 0, 0, 0
+
+    try:
+        by_file = {}
+        for key, stamp in snapshot.items():
+            if not isinstance(key, str) or ":" not in key:
+                continue
+            fp, _, rule = key.rpartition(":")
+            by_file.setdefault(fp, {})[rule] = stamp
+
+        workers = min(SWEEP_MAX_WORKERS, len(by_file))
+        if workers > 1:
+            import concurrent.futures as _cf
+            with _cf.ThreadPoolExecutor(max_workers=workers) as _ex:
+                reads = list(_ex.map(_read_if_changed, by_file, by_file.values()))
+        else:
+            reads = [_read_if_changed(fp, stamps) for fp, stamps in by_file.items()]
+
+        apply_disabled_patterns(session_id)
+        unresolved = []
+        fixed = 0
+        for (fp, stamps), (still_matching, content) in zip(by_file.items(), reads):
+            if content is not None:
+                still_matching |= {r for r, _ in check_patterns(fp, content)}
+            for rule in stamps:
+                if rule in still_matching:
+                    unresolved.append(rule)
+                else:
+                    fixed += 1
+    except Exception as e:
+        debug_log(f"sweep_pending_warnings failed: {e}")
+        return 0, 0, 0
+
+    def _commit(state):
+        pending = state.get("pending_warnings")
+        if isinstance(pending, dict):
+            for key, stamp in snapshot.items():
+                if key in pending and pending[key] == stamp:
+                    del pending[key]
+        return True
+
+    if with_locked_state(session_id, _commit) is None:
+        # Not cleared, so these are counted by the next sweep instead
+        return 0, 0, 0
+    # Filter to known rules so a renamed/removed rule in old state
+    # doesn't KeyError rule_names_to_mask.
+    known = [r for r in unresolved if r in _RULE_NAME_TO_ID]
+    return fixed, len(unresolved), rule_names_to_mask(known)
 
 # =====================================================================
 # Git baseline management
@@ -383,61 +392,10 @@ def sweep_pending_warnings(session_id):
 # Pattern matching
 # =====================================================================
 
-def check_patterns(file_path, content):
-    """Check if file path or content matches any security patterns. Returns ALL matches."""
-    normalized_path = file_path.lstrip("/")
-    matches = []
-
-    for pattern in list(SECURITY_PATTERNS) + extensibility.user_patterns():
-        # path_filter is a gate: when present, the rule only applies to
-        # matching paths. Distinct from path_check, which is itself a
-        # positive match condition (e.g. .github/workflows/).
-        if "path_filter" in pattern:
-            try:
-                if not pattern["path_filter"](normalized_path):
-                    continue
-            except Exception:
-                continue
-
-        matched = False
-
-        if "path_check" in pattern:
-            try:
-                if pattern["path_check"](normalized_path):
-                    matched = True
-            except Exception:
-                pass
-
-        if not matched and "substrings" in pattern and content:
-            for substring in pattern["substrings"]:
-                if substring in content:
-                    matched = True
-                    break
-
-        if not matched and "regex" in pattern and content:
-            try:
-                if re.search(pattern["regex"], content):
-                    matched = True
-            except Exception:
-                pass
-
-        if matched:
-            matches.append((pattern["ruleName"], pattern["reminder"]))
-
-    return matches
-
-def extract_content_from_input(tool_name, tool_input):
-    """Extract content to check from tool input based on tool type."""
-    if tool_name == "Write":
-        return tool_input.get("content", "")
-    elif tool_name == "Edit":
-        return tool_input.get("new_string", "")
-    elif tool_name == "MultiEdit":
-        edits = tool_input.get("edits", [])
-        if edits:
-            return " ".join(edit.get("new_string", "") for edit in edits)
-        return ""
-    return ""
+#
+# check_patterns and the rest of the Edit/Write PostToolUse path
+# (record_edit, edit_hunks, check_edit_patterns, ...) moved to edit_hook.py,
+# which dispatch.py runs without importing this module. Re-exported above.
 
 # =====================================================================
 # Hook handlers
@@ -1111,38 +1069,32 @@ def handle_commit_review_posttooluse(input_data):
         )
 
     # --no-color: `color.ui=always` would emit ANSI escapes that corrupt
-    # parse_diff_into_files' header match. Bytes + errors='replace': commits
-    # can contain non-UTF8 source (latin-1, cp1252) and text=True would raise
-    # UnicodeDecodeError outside the except clause.
+    # the parser's header match. _git_diff_files reads bytes and decodes
+    # with errors='replace': commits can contain non-UTF8 source (latin-1,
+    # cp1252) that a strict decode would raise on.
     diff_files = []
     resolved = 0
     for sha in shas:
+        if pre_amend_sha:
+            # Delta review: pre-amend → post-amend. `git diff` (not show)
+            # so the output is a pure unified diff with no commit header.
+            _cmd = "git diff"
+            argv = [*GIT_CMD, "diff", "--no-color", "--no-ext-diff", pre_amend_sha, sha, "--"]
+        else:
+            _cmd = "git show"
+            argv = [*GIT_CMD, "show", "-p", "--no-color", "--no-ext-diff", sha, "--"]
         try:
-            if pre_amend_sha:
-                # Delta review: pre-amend → post-amend. `git diff` (not show)
-                # so the output is a pure unified diff with no commit header.
-                result = subprocess.run(
-                    [*GIT_CMD, "diff", "--no-color", "--no-ext-diff", pre_amend_sha, sha, "--"],
-                    cwd=repo_root, capture_output=True, timeout=15
-                )
-            else:
-                result = subprocess.run(
-                    [*GIT_CMD, "show", "-p", "--no-color", "--no-ext-diff", sha, "--"],
-                    cwd=repo_root, capture_output=True, timeout=15
-                )
+            sections = _git_diff_files(argv, repo_root, 15)
         except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
-            _cmd = "git diff" if pre_amend_sha else "git show"
             debug_log(f"Commit review: {_cmd} {sha} error: {e}")
             continue
-        if result.returncode != 0:
+        if sections is None:
             # SHA not in this repo (cross-repo commit) or already gc'd. Better
             # to skip than to fall back to HEAD and review the wrong commit.
-            _cmd = "git diff" if pre_amend_sha else "git show"
-            debug_log(f"Commit review: {_cmd} {sha} rc={result.returncode}")
+            debug_log(f"Commit review: {_cmd} {sha} failed")
             continue
         resolved += 1
-        diff_files.extend(parse_diff_into_files(
-            result.stdout.decode("utf-8", errors="replace")))
+        diff_files.extend(parse_diff_into_files(sections))
 
     # Dedup by path. The widened reflog scan can return >1 SHA (e.g.
     # `git commit && git commit --amend` within 120s); a path that appears in
@@ -1546,8 +1498,8 @@ def handle_push_sweep_posttooluse(input_data):
     debug_log(f"Push sweep: range={len(push_range)} prefix_advanced="
               f"{prefix_advanced} base={base[:12]} tail={len(tail)}")
 
-    diff_text = _git_diff_range(repo_root, base, "HEAD")
-    if diff_text is None:
+    diff_sections = _git_diff_range_files(repo_root, base, "HEAD")
+    if diff_sections is None:
         # Diff failed (non-zero exit / 30s timeout / git missing). Do NOT
         # mark `tail` reviewed — we did not actually review it. Marking
         # them would silently advance the prefix past unreviewed commits
@@ -1559,7 +1511,7 @@ def handle_push_sweep_posttooluse(input_data):
         emit_metrics({**_base, "pushed": len(push_range),
                       "unreviewed": len(tail), "skip_reason": 45})
         sys.exit(0)
-    diff_files = parse_diff_into_files(diff_text)
+    diff_files = parse_diff_into_files(diff_sections)
     if not diff_files:
         emit_metrics({**_base, "pushed": len(push_range),
                       "unreviewed": len(tail), "skip_reason": 30})
@@ -1744,6 +1696,9 @@ def handle_stop_hook(input_data):
             "warn_unresolved": warn_unresolved,
             "warn_unresolved_mask": warn_unresolved_mask,
         }
+    regex_timeouts = record_regex_timeouts(session_id)
+    if regex_timeouts:
+        sweep["regex_timeouts"] = regex_timeouts
 
     v2_metrics = {}
 
@@ -1805,46 +1760,45 @@ def handle_stop_hook(input_data):
     # caught either way. Fall back to diff_base (HEAD/head_at_capture)
     # when the stash is missing or pruned.
     content_base = baseline_sha or diff_base
-    diff_output = get_git_diff(repo_root, content_base, full_context=False,
-                               paths=review_paths, untracked_paths=untracked)
-    if diff_output is None and content_base != diff_base:
-        debug_log(f"Stop hook: diff against {content_base[:12]} failed — falling back to {diff_base}")
-        diff_output = get_git_diff(repo_root, diff_base, full_context=False,
-                                   paths=review_paths, untracked_paths=untracked)
     # filter_preexisting_from_diff needs a resolvable pre-turn ref; fall
     # back to HEAD when UPS never captured a baseline (print mode).
     if not baseline_sha:
         baseline_sha = "HEAD"
 
-    if not diff_output or not diff_output.strip():
-        debug_log("Stop hook: no changes since baseline")
-        _skip(6)
-
-    # Parse diff into per-file content
-    diff_files = parse_diff_into_files(diff_output)
-    if not diff_files:
-        debug_log("Stop hook: no source code files in diff")
-        _skip(7)
-
     # Mirror commit-review: hard-bail only on pathological diffs (>300 files,
     # usually a bad baseline), otherwise prioritize by security-risk path
     # tokens and review the top MAX_DIFF_FILES. Stop is the only surface for
     # uncommitted edits; the old hard-skip at >30 files dropped the 31-300
     # bucket entirely, which is where cross-file source→sink vulns hide.
-    # _cap_files_for_prompt already bounds bytes downstream.
-    _stop_dropped = 0
-    if len(diff_files) > 10 * MAX_DIFF_FILES:
-        debug_log(f"Stop hook: pathological diff ({len(diff_files)} files > "
+    # _cap_files_for_prompt still bounds bytes downstream; the selection
+    # only generates the hunks that fit under the same caps, and applies
+    # filter_preexisting_from_diff (rewrites) to the files it picked.
+    def _select(base):
+        return select_git_diff_files(
+            repo_root, base, paths=review_paths, untracked_paths=untracked,
+            max_files=MAX_DIFF_FILES, max_reviewable=10 * MAX_DIFF_FILES,
+            per_file_bytes=DIFF_PER_FILE_BYTES, total_bytes=DIFF_TOTAL_BYTES,
+            filter_base=baseline_sha)
+
+    selection = _select(content_base)
+    if selection is None and content_base != diff_base:
+        debug_log(f"Stop hook: diff against {content_base[:12]} failed — falling back to {diff_base}")
+        selection = _select(diff_base)
+
+    if not selection or not selection.changed:
+        debug_log("Stop hook: no changes since baseline")
+        _skip(6)
+    if selection.reviewable > 10 * MAX_DIFF_FILES:
+        debug_log(f"Stop hook: pathological diff ({selection.reviewable} files > "
                   f"{10 * MAX_DIFF_FILES}), skipping")
-        _skip(8, diff_files_count=len(diff_files))
-    if len(diff_files) > MAX_DIFF_FILES:
-        diff_files, _stop_dropped = _prioritize_diff_files(
-            diff_files, MAX_DIFF_FILES)
+        _skip(8, diff_files_count=selection.reviewable)
+    diff_files = selection.files
+    if not diff_files:
+        debug_log("Stop hook: no source code files in diff")
+        _skip(7)
+    if selection.dropped:
         debug_log(f"Stop hook: prioritized to {len(diff_files)} files "
-                  f"(dropped {_stop_dropped} lower-risk)")
-
-    # Filter out pre-existing content from file rewrites
-    diff_files = filter_preexisting_from_diff(diff_files, cwd, baseline_sha)
+                  f"(dropped {selection.dropped} lower-risk)")
 
     debug_log(f"Stop hook: reviewing {len(diff_files)} changed files (standard diff)")
 
@@ -1861,6 +1815,10 @@ def handle_stop_hook(input_data):
     # on pre-existing patterns in starter code. The concrete vulnerability analysis
     # is more precise and has severity filtering (high/critical only).
 
+    # Bytes the prompt caps cut, plus the estimated hunks of files past the
+    # byte budget, which were never generated (so the caps saw them empty)
+    truncated_bytes = llm._last_review_truncated_bytes + selection.skipped_bytes
+
     stop_review_elapsed = _time.time() - stop_review_start
     debug_log(f"Stop hook: LLM reviews took {stop_review_elapsed:.1f}s total")
 
@@ -1937,8 +1895,7 @@ def handle_stop_hook(input_data):
             "touched_paths_count": len(touched_paths),
             "review_ms": review_ms,
             "fire_index": fire_index,
-            **({"diff_truncated": llm._last_review_truncated_bytes}
-               if llm._last_review_truncated_bytes else {}),
+            **({"diff_truncated": truncated_bytes} if truncated_bytes else {}),
             **sweep_trimmed,
         }, rewake_summary=_format_vulns_summary(vulns))
 
@@ -1965,101 +1922,17 @@ def handle_stop_hook(input_data):
         "review_ms": review_ms,
         "fire_index": fire_index,
         **({"api_error": llm._last_call_claude_http_error} if llm._last_call_claude_http_error is not None else {}),
-        **({"diff_truncated": llm._last_review_truncated_bytes}
-           if llm._last_review_truncated_bytes else {}),
+        **({"diff_truncated": truncated_bytes} if truncated_bytes else {}),
         **v2_metrics,
     })
     sys.exit(0)
 
-_SDK_BOOTSTRAP_THROTTLE = os.path.join(
-    os.environ.get("SECURITY_WARNINGS_STATE_DIR")
-    or os.path.expanduser("~/.claude/security"),
-    ".sdk_bootstrap_spawned")
-
-def _maybe_bootstrap_agent_sdk_async():
-    """Fire-and-forget SDK bootstrap, for remote-pod environments.
-
-    Under CLAUDE_CODE_SYNC_PLUGIN_INSTALL=true (CCR-style remote pods),
-    plugins are synced *after* SessionStart fires, so the SessionStart
-    `ensure_agent_sdk.py` hook never runs and the agentic commit reviewer
-    falls back 100% of the time. A PostToolUse hook firing is itself proof
-    the plugin is now registered, so re-trigger the bootstrap here.
-    Detached, so the ~17s venv build never blocks the hook — the first
-    1-2 commits of a remote session still fall back while it builds, then
-    every subsequent commit gets the agentic path. ensure_agent_sdk.py
-    is idempotent and O_EXCL-locked, so concurrent/repeat spawns are safe;
-    the throttle file only avoids spawning dozens of subprocesses during
-    the build window. No-ops in ~10ms on local installs (SDK already
-    importable).
-    """
-    try:
-        import importlib.util
-        if importlib.util.find_spec("claude_agent_sdk") is not None:
-            return
-        import time as _t
-        try:
-            if _t.time() - os.path.getmtime(_SDK_BOOTSTRAP_THROTTLE) < 300:
-                return
-        except OSError:
-            pass
-        os.makedirs(os.path.dirname(_SDK_BOOTSTRAP_THROTTLE), exist_ok=True)
-        # Touch the throttle BEFORE spawning so a burst of PostToolUse
-        # fires in the same second don't each spawn a subprocess.
-        open(_SDK_BOOTSTRAP_THROTTLE, "w").close()
-        script = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "ensure_agent_sdk.py")
-        subprocess.Popen(
-            [sys.executable, script],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-            stdin=subprocess.DEVNULL, start_new_session=True,
-        )
-    except Exception:
-        pass  # best-effort; never break the hook over a bootstrap attempt
-
-def main():
-    """Main hook function."""
-    debug_log(f"Hook called with args: {sys.argv}")
-
-    # Master kill switch — honors ENABLE_SECURITY_REMINDER=0 (legacy) and
-    # SECURITY_GUIDANCE_DISABLE=1 (clearer name, no double negative). Emit
-    # empty metrics so asyncRewake hooks (Stop) don't hang waiting for stdout
-    # output that never comes.
-    if SECURITY_GUIDANCE_DISABLED:
-        emit_metrics({"skipped": True, "skip_reason": -1})
-        sys.exit(0)
-
-    # Periodically clean up old state files (10% chance per run)
-    if random.random() < 0.1:
-        cleanup_old_state_files()
-
-    # Read input from stdin
-    try:
-        raw_input = sys.stdin.read()
-        input_data = json.loads(raw_input)
-    except json.JSONDecodeError as e:
-        debug_log(f"JSON decode error: {e}")
-        emit_metrics({"skipped": True, "skip_reason": -2})
-        sys.exit(0)
-
-    session_id = input_data.get("session_id", "default")
+def handle_event(input_data):
+    """Route a UserPromptSubmit, Stop or PostToolUse[Bash] event to its
+    handler. dispatch.main() has already done the shared setup and handled
+    Edit/Write PostToolUse itself."""
     tool_name = input_data.get("tool_name", "")
-    tool_input = input_data.get("tool_input", {})
     hook_event_name = input_data.get("hook_event_name", "")
-    debug_log(f"Processing: hook_event={hook_event_name}, tool={tool_name}")
-
-    # Load project-specific security guidance and custom patterns once
-    # per invocation. Failures are non-fatal (debug-logged) so a malformed
-    # config never prevents the built-in checks from running.
-    extensibility.load_for_session(input_data.get("cwd"))
-
-    # Remote-pod SDK-bootstrap rescue: PostToolUse is the earliest hook event
-    # that is guaranteed to fire *after* async plugin sync (its firing proves
-    # the plugin is registered), so it's where we recover the SessionStart
-    # bootstrap that remote pods miss under CLAUDE_CODE_SYNC_PLUGIN_INSTALL.
-    # Fires on Edit/Write too (not just Bash), so the venv is usually built
-    # before the first `git commit`.
-    if hook_event_name == "PostToolUse":
-        _maybe_bootstrap_agent_sdk_async()
 
     # Handle UserPromptSubmit — capture git baseline
     if hook_event_name == "UserPromptSubmit":
@@ -2108,85 +1981,13 @@ def main():
             handle_push_sweep_posttooluse(input_data)
         return
 
-    # Handle PostToolUse — pattern-based checks only (no LLM review per-edit)
-    if tool_name in ["Edit", "Write", "MultiEdit", "NotebookEdit"]:
-        file_path = tool_input.get("file_path") or tool_input.get("notebook_path") or ""
-        if not file_path:
-            sys.exit(0)
-
-        # Skip plan files
-        plans_dir = os.path.expanduser("~/.claude/plans")
-        if file_path.startswith(plans_dir):
-            sys.exit(0)
-
-        record_touched_path(session_id, file_path)
-
-        content = extract_content_from_input(tool_name, tool_input)
-
-        all_guidance = []
-        raw_pattern_matches = []
-        if ENABLE_PATTERN_RULES:
-            pattern_matches = check_patterns(file_path, content)
-            raw_pattern_matches = pattern_matches
-            if pattern_matches:
-                debug_log(f"Pattern matches for {file_path}: {[r for r, _ in pattern_matches]}")
-
-            # For Write tool, filter out patterns that existed in the baseline version
-            # This prevents flagging pre-existing insecure patterns when Claude rewrites a file
-            if tool_name == "Write" and pattern_matches:
-                cwd = os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())
-                baseline_content = get_baseline_file_content(session_id, file_path, cwd)
-                if baseline_content is not None:
-                    baseline_matches = set(r for r, _ in check_patterns(file_path, baseline_content))
-                    pattern_matches = [(r, msg) for r, msg in pattern_matches if r not in baseline_matches]
-                    if pattern_matches:
-                        debug_log(f"New patterns (not in baseline): {[r for r, _ in pattern_matches]}")
-                    else:
-                        debug_log("All patterns existed in baseline, skipping")
-
-            for rule_name, reminder in pattern_matches:
-                warning_key = f"{file_path}-{rule_name}"
-                if atomic_check_and_mark_warning(session_id, warning_key):
-                    all_guidance.append(reminder)
-
-            # Record matched rules as pending so the Stop-hook sweep can
-            # later tally fixed vs unresolved. Only runs when patterns match.
-            if pattern_matches:
-                record_pending_warnings(session_id, file_path,
-                                        [r for r, _ in pattern_matches])
-
-        # Emit metrics when raw patterns matched (even if all were baseline-suppressed
-        # or dedup'd — pattern_hits reflects warnings actually shown, may be 0).
-        # Gate on raw matches so clean edits don't flood the metrics event.
-        #   rule_id:   RuleId of the first raw match (values stay small/enumerable in telemetry)
-        #   rule_mask: bitmask of ALL raw matches — POPCOUNT gives raw hit count,
-        #              (mask >> N) & 1 tests for a specific rule
-        if raw_pattern_matches:
-            raw_names = [r for r, _ in raw_pattern_matches]
-            output = {"metrics": {
-                "pattern_hits": len(all_guidance),
-                # User-defined patterns (rule_name="user:*") have no static
-                # RuleId; emit -1 so the metrics pipeline can distinguish.
-                "rule_id": int(_RULE_NAME_TO_ID.get(raw_names[0], -1)),
-                "rule_mask": rule_names_to_mask(raw_names),
-                **({"pv": _PV} if _PV else {}),
-            }}
-            if all_guidance:
-                output["hookSpecificOutput"] = {
-                    "hookEventName": "PostToolUse",
-                    "additionalContext": PROVENANCE_TAG + "\n\n" + "\n\n".join(all_guidance),
-                }
-            print(json.dumps(output))
-        elif all_guidance:
-            # Defensive: pattern rules disabled but guidance somehow set (shouldn't happen)
-            print(json.dumps({
-                "hookSpecificOutput": {
-                    "hookEventName": "PostToolUse",
-                    "additionalContext": PROVENANCE_TAG + "\n\n" + "\n\n".join(all_guidance),
-                }
-            }))
-
     sys.exit(0)
 
+def main():
+    """Main hook function. hooks.json runs dispatch.py, which only imports
+    this module for events other than an edit; running this file directly
+    handles every event the same way."""
+    dispatch.main(sys.modules[__name__])
+
 if __name__ == "__main__":
     main()
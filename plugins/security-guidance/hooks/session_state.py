@@ -1,10 +1,19 @@
 """
 Per-session state-file plumbing for the security-guidance plugin.
 
-Holds the JSON state file location, fcntl-locked read-modify-write helper,
+Holds the state file locations, fcntl-locked read-modify-write helper,
 and old-file GC. Side-effect-free at import time (no env-var reads beyond
 ``CLAUDE_CODE_REMOTE_SESSION_ID`` inside the helpers).
 
+State starts as one JSON file rewritten whole on every transaction, which
+is cheapest for the usual small session. Once ``shown_warnings`` outgrows
+``SQLITE_MIN_WARNINGS`` the JSON file is migrated into a SQLite database
+in WAL mode (append-only log, checkpointed by SQLite as it grows):
+``shown_warnings`` becomes an indexed table that a transaction queries and
+appends to without loading it, and the other keys are stored as JSON
+values rewritten only when they change. ``with_locked_state`` semantics
+are the same for both stores.
+
 The ``atomic_check_*`` helpers that build on ``with_locked_state`` deliberately
 remain in ``security_reminder_hook.py`` so that tests which monkeypatch
 ``hook.with_locked_state`` and then call a handler still see the patched
@@ -21,6 +30,19 @@ from datetime import datetime
 
 from _base import debug_log
 
+# Migrate a session's JSON state file to SQLite once shown_warnings has this
+# many entries. Below it, importing sqlite3 and opening the database (~3.5ms
+# in a fresh hook process, whatever the size) costs more than loading and
+# rewriting the JSON file. One edit in a fresh process measured 1.7ms on JSON
+# vs 3.5ms on SQLite at 1000 entries, 3.8 vs 3.9ms at 4000 and 6.1 vs 4.1ms at
+# 6000 (scripts/bench_state_transaction.py, --fresh-sizes).
+SQLITE_MIN_WARNINGS = 4000
+
+_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS shown_warnings (seq INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE);
+"""
+
 
 def _state_key(session_id):
     # In CCR each user turn is a new CC process with a fresh session_id; the
@@ -40,6 +62,12 @@ def get_state_file(session_id):
     return os.path.join(state_dir, f"security_warnings_state_{_state_key(session_id)}.json")
 
 
+def get_state_db(session_id):
+    """Get session-specific SQLite state path (used once the state is large)."""
+    state_dir = os.environ.get("SECURITY_WARNINGS_STATE_DIR", os.path.expanduser("~/.claude/security"))
+    return os.path.join(state_dir, f"security_warnings_state_{_state_key(session_id)}.db")
+
+
 def get_lock_file(session_id):
     """Get session-specific lock file path."""
     state_dir = os.environ.get("SECURITY_WARNINGS_STATE_DIR", os.path.expanduser("~/.claude/security"))
@@ -47,7 +75,8 @@ def get_lock_file(session_id):
 
 
 def cleanup_old_state_files():
-    """Remove state files and lock files older than 30 days."""
+    """Remove state files, lock files and extensibility load caches older
+    than 30 days."""
     try:
         state_dir = os.environ.get("SECURITY_WARNINGS_STATE_DIR", os.path.expanduser("~/.claude/security"))
         if not os.path.exists(state_dir):
@@ -57,9 +86,9 @@ def cleanup_old_state_files():
         thirty_days_ago = current_time - (30 * 24 * 60 * 60)
 
         for filename in os.listdir(state_dir):
-            if filename.startswith("security_warnings_state_") and (
-                filename.endswith(".json") or filename.endswith(".lock")
-            ):
+            if (filename.startswith("security_warnings_state_") and filename.endswith(
+                (".json", ".lock", ".db", ".db-wal", ".db-shm")
+            )) or (filename.startswith("extensibility_cache_") and filename.endswith(".json")):
                 file_path = os.path.join(state_dir, filename)
                 try:
                     file_mtime = os.path.getmtime(file_path)
@@ -85,8 +114,7 @@ def cleanup_old_state_files():
         pass
 
 
-def load_state(session_id):
-    """Load the full state dict from file."""
+def _load_json_state(session_id):
     state_file = get_state_file(session_id)
     try:
         with open(state_file, "r") as f:
@@ -101,8 +129,7 @@ def load_state(session_id):
     return {"shown_warnings": []}
 
 
-def save_state(session_id, state):
-    """Save the full state dict to file."""
+def _save_json_state(session_id, state):
     state_file = get_state_file(session_id)
     try:
         state_dir = os.path.dirname(state_file)
@@ -115,12 +142,204 @@ def save_state(session_id, state):
         debug_log(f"Failed to save state file {state_file}: {e}")
 
 
+class _ShownWarnings:
+    """``state["shown_warnings"]`` under the SQLite store.
+
+    List-like enough for the hook's use (``in``, ``append``, iteration,
+    ``len``) but set-based: membership is an indexed lookup, appends are
+    buffered and inserted on commit, and re-appending a shown key is a
+    no-op. Assigning a plain list to ``state["shown_warnings"]`` instead
+    replaces the table on commit.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.added = []
+        self._added_set = set()
+
+    def __contains__(self, key):
+        if key in self._added_set:
+            return True
+        if not isinstance(key, str):
+            return False
+        return self._conn.execute(
+            "SELECT 1 FROM shown_warnings WHERE key = ?", (key,)).fetchone() is not None
+
+    def append(self, key):
+        if key not in self:
+            self.added.append(key)
+            self._added_set.add(key)
+
+    def extend(self, keys):
+        for key in keys:
+            self.append(key)
+
+    def __iter__(self):
+        for (key,) in self._conn.execute("SELECT key FROM shown_warnings ORDER BY seq"):
+            yield key
+        yield from self.added
+
+    def __len__(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM shown_warnings").fetchone()
+        return count + len(self.added)
+
+
+def _open_db(session_id):
+    """Open the session's state database in autocommit mode (transactions
+    are explicit)."""
+    import sqlite3
+
+    conn = sqlite3.connect(get_state_db(session_id), timeout=10, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_DB_SCHEMA)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def _write_db_state(conn, state, stored):
+    """Write state into the database; stored is {key: JSON text} as loaded,
+    so unchanged keys are skipped."""
+    warnings = state.get("shown_warnings")
+    if isinstance(warnings, _ShownWarnings):
+        rows = warnings.added
+    else:
+        conn.execute("DELETE FROM shown_warnings")
+        rows = [key for key in warnings or [] if isinstance(key, str)]
+    conn.executemany("INSERT OR IGNORE INTO shown_warnings (key) VALUES (?)",
+                     [(key,) for key in rows])
+    for key, value in state.items():
+        if key == "shown_warnings":
+            continue
+        text = json.dumps(value)
+        if stored.get(key) != text:
+            conn.execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (key, text))
+    for key in stored.keys() - state.keys():
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+
+def _remove_db(session_id):
+    """Delete the session's database with its WAL and shared-memory files,
+    so a half-made one isn't picked up as the session's store."""
+    db = get_state_db(session_id)
+    for path in (db, db + "-wal", db + "-shm"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _migrate_to_db(session_id, state):
+    """Move state (loaded from the JSON file) into a new database, then
+    remove the JSON file. Called with the session lock held. On failure no
+    database file is left behind and the JSON file is untouched."""
+    try:
+        conn = _open_db(session_id)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM kv")
+            _write_db_state(conn, state, {})
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+    except Exception:
+        _remove_db(session_id)
+        raise
+    debug_log(f"Migrated session state to {get_state_db(session_id)}")
+    try:
+        os.remove(get_state_file(session_id))
+    except OSError:
+        pass
+
+
+def _db_transaction(session_id, callback):
+    """One transaction on the state database. SQLite errors are re-raised
+    as OSError so callers handle them like state-file I/O errors."""
+    import sqlite3
+
+    try:
+        conn = _open_db(session_id)
+    except sqlite3.Error as e:
+        raise OSError(f"state database: {e}") from e
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        stored = dict(conn.execute("SELECT key, value FROM kv"))
+        state = {key: json.loads(value) for key, value in stored.items()}
+        state["shown_warnings"] = _ShownWarnings(conn)
+        try:
+            result = callback(state)
+            _write_db_state(conn, state, stored)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+    except sqlite3.Error as e:
+        raise OSError(f"state database: {e}") from e
+    finally:
+        conn.close()
+
+
+def _json_transaction(session_id, callback):
+    state = _load_json_state(session_id)
+    result = callback(state)
+    if len(state.get("shown_warnings") or ()) >= SQLITE_MIN_WARNINGS:
+        try:
+            _migrate_to_db(session_id, state)
+            return result
+        except Exception as e:
+            debug_log(f"State migration to SQLite failed, keeping JSON: {e}")
+    _save_json_state(session_id, state)
+    return result
+
+
+def _transaction(session_id, callback):
+    """Load state from whichever store the session uses, run callback, save."""
+    if os.path.exists(get_state_db(session_id)):
+        return _db_transaction(session_id, callback)
+    return _json_transaction(session_id, callback)
+
+
+def load_state(session_id):
+    """Load the full state dict from file."""
+    if not os.path.exists(get_state_db(session_id)):
+        return _load_json_state(session_id)
+    try:
+        return _db_transaction(session_id, lambda state: dict(
+            state, shown_warnings=list(state["shown_warnings"])))
+    except (OSError, IOError) as e:
+        debug_log(f"Failed to load state database: {e}")
+        return {"shown_warnings": []}
+
+
+def save_state(session_id, state):
+    """Save the full state dict to file."""
+    if not os.path.exists(get_state_db(session_id)):
+        _save_json_state(session_id, state)
+        return
+
+    def _replace(current):
+        current.clear()
+        current.update(state)
+        current["shown_warnings"] = list(state.get("shown_warnings") or [])
+    try:
+        _db_transaction(session_id, _replace)
+    except (OSError, IOError) as e:
+        debug_log(f"Failed to save state database: {e}")
+
+
 def with_locked_state(session_id, callback):
     """
     Execute callback with exclusive access to the state file.
     The callback receives the state dict and can modify it in place.
     State is saved after the callback returns.
     Returns the callback's return value.
+
+    Under the SQLite store, ``state["shown_warnings"]`` is a set-based view
+    (see ``_ShownWarnings``) rather than a list.
     """
     lock_file = get_lock_file(session_id)
     state_dir = os.path.dirname(lock_file)
@@ -132,20 +351,17 @@ def with_locked_state(session_id, callback):
 
     if fcntl is None:
         # No file locking available (Windows) — run without locking
-        state = load_state(session_id)
-        result = callback(state)
-        save_state(session_id, state)
-        return result
+        try:
+            return _transaction(session_id, callback)
+        except (OSError, IOError) as e:
+            debug_log(f"State operation failed: {e}")
+            return None
 
     lock_fd = None
     try:
         lock_fd = os.open(lock_file, os.O_RDWR | os.O_CREAT)
         fcntl.flock(lock_fd, fcntl.LOCK_EX)
-
-        state = load_state(session_id)
-        result = callback(state)
-        save_state(session_id, state)
-        return result
+        return _transaction(session_id, callback)
 
     except (OSError, IOError) as e:
         debug_log(f"Lock/state operation failed: {e}")
@@ -158,4 +374,3 @@ def with_locked_state(session_id, callback):
                 os.close(lock_fd)
             except (OSError, IOError):
                 pass
-
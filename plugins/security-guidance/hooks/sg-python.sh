@@ -19,7 +19,7 @@
 # Args after the shim path are passed straight through to the chosen
 # interpreter, so the hooks.json invocation is:
 #   bash "${CLAUDE_PLUGIN_ROOT}/hooks/sg-python.sh" \
-#        "${CLAUDE_PLUGIN_ROOT}/hooks/security_reminder_hook.py"
+#        "${CLAUDE_PLUGIN_ROOT}/hooks/dispatch.py"
 set -e
 
 probe() {
@@ -0,0 +1,112 @@
+"""
+Per-session cache of pattern-check verdicts for the security-guidance plugin.
+
+Agents edit the same file many times per turn, and each PostToolUse rescans
+the full content (and, for a matching Write, runs ``git show`` on the
+baseline blob and scans that too). Verdicts are pure functions of their
+inputs, so they are cached by content:
+
+  - ``content_key(version, path, content)``: the rule indices that matched
+    this content at this path
+  - ``baseline_key(version, path, cwd, sha)``: the rule names that matched
+    the file at the baseline commit, or None if it wasn't available there.
+    A commit SHA names immutable content, so the ``git show`` is skipped too.
+
+``version`` is the PatternScanner's rule-set digest, so editing built-in or
+user patterns never serves a stale verdict.
+
+The cache lives next to the session state file as a small JSON object,
+bounded to ``MAX_ENTRIES`` most-recently-used entries. It is read without
+the session lock and replaced atomically: concurrent hooks can only lose
+each other's additions, never see a wrong verdict.
+"""
+import hashlib
+import json
+import os
+
+from _base import debug_log
+from session_state import get_state_file
+
+MAX_ENTRIES = 256
+
+
+def _digest(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part.encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def content_key(version, path, content):
+    return "c:" + _digest(version, path, content or "")
+
+
+def baseline_key(version, path, cwd, sha):
+    return "b:" + _digest(version, path, cwd or "", sha)
+
+
+def get_verdict_file(session_id):
+    """Session-specific verdict cache path (swept with the state files)."""
+    return get_state_file(session_id)[:-len(".json")] + ".verdicts.json"
+
+
+class VerdictCache:
+    """Load with ``VerdictCache.load(session_id)``; ``save()`` when done.
+
+    ``hits``/``misses`` count this process's lookups, for the metrics event.
+    """
+
+    def __init__(self, session_id, entries=None):
+        self.session_id = session_id
+        self.entries = entries if entries is not None else {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    @classmethod
+    def load(cls, session_id):
+        try:
+            with open(get_verdict_file(session_id), "r") as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                return cls(session_id, entries)
+        except (OSError, ValueError):
+            pass
+        return cls(session_id)
+
+    def lookup(self, key):
+        """(True, verdict) on a hit, (False, None) on a miss."""
+        if key in self.entries:
+            self.hits += 1
+            # Re-insert so eviction drops the least recently used
+            verdict = self.entries[key] = self.entries.pop(key)
+            self._dirty = True
+            return True, verdict
+        self.misses += 1
+        return False, None
+
+    def store(self, key, verdict):
+        self.entries.pop(key, None)
+        self.entries[key] = verdict
+        while len(self.entries) > MAX_ENTRIES:
+            del self.entries[next(iter(self.entries))]
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        path = get_verdict_file(self.session_id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, path)
+            self._dirty = False
+        except OSError as e:
+            debug_log(f"Failed to save verdict cache {path}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
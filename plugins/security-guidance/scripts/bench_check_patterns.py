@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Benchmark check_patterns(): per-rule loop vs the precompiled PatternScanner.
+
+Usage:
+    python3 scripts/bench_check_patterns.py [--iterations 5]
+
+Times both on 1 KB, 100 KB and 5 MB payloads (code with and without
+trigger snippets) across JS, Python, doc and workflow paths, plus a repeat
+check of unchanged content answered from a warm VerdictCache. Before timing,
+the scanner's (ruleName, reminder) lists are checked to be identical to the
+original per-rule loop on every payload, plus a fuzz corpus of trigger and
+near-miss snippets for the built-in rules and a few user patterns.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks"))
+import extensibility  # noqa: E402
+import security_reminder_hook as hook  # noqa: E402
+from patterns import SECURITY_PATTERNS  # noqa: E402
+from verdict_cache import VerdictCache  # noqa: E402
+
+PATHS = ["src/app.ts", "pkg/loader.py", "docs/guide.md", ".github/workflows/ci.yml", "main.go"]
+
+FILLER = [
+    "    const result = await client.fetchData(options, retries);\n",
+    "    total = sum(item.price for item in basket if item.available)\n",
+    "    if err != nil { return fmt.Errorf(\"load: %w\", err) }\n",
+    "    # Evaluate the model and log the metrics for this epoch\n",
+    "    model.eval()\n",
+    "    data = json.loads(payload)\n",
+]
+
+TRIGGERS = [
+    "child_process.exec(cmd)", "exec(`ls ${dir}`)", "execSync('x')", "new Function('a', body)",
+    "eval(input)", "x.eval(y)", "<div dangerouslySetInnerHTML={{__html: h}} />", "document.write(s)",
+    "el.innerHTML = html", "pickle.loads(blob)", "pkl_load(f)", "os.system(cmd)",
+    "from os import system", "subprocess.run(cmd, shell=True)", 'exec.Command("bash", "-c", s)',
+    "yaml.load(f)", "yaml.load(f, Loader=yaml.SafeLoader)", "crypto.createCipher('aes', k)",
+    "AES.MODE_ECB", "modes.ECB(", "'aes-128-ecb'", "requests.get(u, verify=False)",
+    "rejectUnauthorized: false", "InsecureSkipVerify: true", "NODE_TLS_REJECT_UNAUTHORIZED='0'",
+    "ssl._create_unverified_context()", "check_hostname = False", "marshal.loads(b)",
+    "shelve.open(p)", "ET.fromstring(x)", "minidom.parseString(s)", "xml.sax.parse(f)",
+    "dill.loads(b)", "cloudpickle.load(f)", "el.outerHTML = h", "el.insertAdjacentHTML('x', h)",
+    '<script src="https://cdn.example.com/x.js"></script>',
+    '<script integrity="sha-1" src="https://cdn.example.com/x.js"></script>',
+    "torch.load(p)", "torch.load(p, weights_only=True)", "yaml.unsafe_load(s)",
+    "joblib.load(p)", "pd.read_pickle(p)", "np.load(p, allow_pickle=True)", "np.load(p)",
+    "EXEC(", "Eval (", "pickle.dump(x)", "os.systems", "verify=True", "AES.MODE_CBC",
+    "db.primary.query(sql)", "fetch(url, {mode: 'no-cors'})", "LEGACY_AUTH",
+]
+
+USER_PATTERNS = [
+    {"rule_name": "primary-reads", "reminder": "Reads go through db.replica.",
+     "regex": r"db\.primary\.(query|select)\(", "paths": ["src/**", "*.py"]},
+    {"rule_name": "no-cors", "reminder": "Avoid no-cors fetches.",
+     "regex": r"(?i)mode:\s*'no-cors'"},
+    {"rule_name": "legacy-auth", "reminder": "LEGACY_AUTH is being removed.",
+     "substrings": ["LEGACY_AUTH"], "exclude_paths": ["docs/**"]},
+]
+
+
+def reference_check_patterns(file_path, content):
+    """The per-rule loop check_patterns() ran before PatternScanner."""
+    normalized_path = file_path.lstrip("/")
+    matches = []
+    for pattern in list(SECURITY_PATTERNS) + extensibility.user_patterns():
+        if "path_filter" in pattern:
+            try:
+                if not pattern["path_filter"](normalized_path):
+                    continue
+            except Exception:
+                continue
+        matched = False
+        if "path_check" in pattern:
+            try:
+                if pattern["path_check"](normalized_path):
+                    matched = True
+            except Exception:
+                pass
+        if not matched and "substrings" in pattern and content:
+            for substring in pattern["substrings"]:
+                if substring in content:
+                    matched = True
+                    break
+        if not matched and "regex" in pattern and content:
+            try:
+                if re.search(pattern["regex"], content):
+                    matched = True
+            except Exception:
+                pass
+        if matched:
+            matches.append((pattern["ruleName"], pattern["reminder"]))
+    return matches
+
+
+def payload(size, rng, triggers):
+    lines = []
+    total = 0
+    while total < size:
+        line = rng.choice(FILLER)
+        lines.append(line)
+        total += len(line)
+    for trigger in triggers:
+        lines.insert(rng.randrange(len(lines) + 1), f"    {trigger}\n")
+    return "".join(lines)[:size + sum(len(t) + 5 for t in triggers)]
+
+
+def check_equivalence(rng):
+    extensibility._user_patterns = [
+        extensibility._validate_pattern(entry, "bench") for entry in USER_PATTERNS]
+    cases = [(path, trigger) for path in PATHS for trigger in TRIGGERS]
+    cases += [(path, " ".join(rng.sample(TRIGGERS, 4))) for path in PATHS for _ in range(50)]
+    cases += [(path, "") for path in PATHS]
+    for path, content in cases:
+        if hook.check_patterns(path, content) != reference_check_patterns(path, content):
+            sys.exit(f"mismatch on {path}: {content!r}")
+    extensibility._user_patterns = []
+    return len(cases)
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    print(f"equivalence: {check_equivalence(rng)} fuzz cases identical")
+
+    print(f"{'payload':<28}{'path':<26}{'per-rule loop':>15}{'scanner':>12}{'cached':>12}")
+    for label, size in (("1 KB", 1024), ("100 KB", 100 * 1024), ("5 MB", 5 * 1024 * 1024)):
+        for kind, triggers in (("clean", []), ("3 triggers", rng.sample(TRIGGERS, 3))):
+            content = payload(size, rng, triggers)
+            for path in ("src/app.ts", "pkg/loader.py"):
+                expected = reference_check_patterns(path, content)
+                if hook.check_patterns(path, content) != expected:
+                    sys.exit(f"mismatch on {label} {kind} {path}")
+                before = timed(lambda: reference_check_patterns(path, content), args.iterations)
+                after = timed(lambda: hook.check_patterns(path, content), args.iterations)
+                verdicts = VerdictCache("bench")  # in memory, never saved
+                hook.check_patterns(path, content, verdicts)
+                cached = timed(lambda: hook.check_patterns(path, content, verdicts), args.iterations)
+                if hook.check_patterns(path, content, verdicts) != expected or verdicts.misses != 1:
+                    sys.exit(f"verdict cache mismatch on {label} {kind} {path}")
+                print(f"{label + ' ' + kind:<28}{path:<26}{before:12.2f} ms{after:9.2f} ms"
+                      f"{cached:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Check the byte-budgeted Stop diff against parsing the whole diff, and time both.
+
+Usage:
+    python3 scripts/bench_diff_budget.py [--files 150] [--kb 40] [--runs 3]
+
+First builds a repo with tracked edits, full-file rewrites, a rename with
+edits, a deletion, binary and mode-only changes, names with spaces, glob
+characters, non-ASCII and non-UTF-8 bytes, a `-diff` file, and new files of the same kinds,
+and checks select_git_diff_files() with the budget against
+SG_DIFF_BUDGET=0 (the whole diff parsed, prioritized and filtered):
+
+  - with caps that everything fits under, the same DiffFiles (path,
+    content, added/removed lines)
+  - for a range of MAX_DIFF_FILES / per-file / total caps, the same prompt
+    once llm._cap_files_for_prompt has capped the files (the `dropped`
+    count, only logged, can be higher: it includes ranked files that come
+    back without hunks), and a `diff_truncated` metric whenever the whole
+    diff gives one (how far the estimated skipped bytes are off is printed)
+
+each with untracked files diffed with and without the temp index, and
+with the review restricted to a few paths.
+
+Then times both on a scaffolding-sized turn (--files new files of about
+--kb KB each plus as many edited tracked files) under the default caps:
+wall time, peak traced memory, and how many bytes of hunks were generated.
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+sys.path.insert(0, HOOKS)
+import gitutil  # noqa: E402
+import llm  # noqa: E402
+from gitsession import GIT_CMD  # noqa: E402
+
+
+def git(cwd, *args, **kwargs):
+    return subprocess.run([*GIT_CMD, *args], cwd=cwd, capture_output=True, check=True, **kwargs).stdout
+
+
+def write(repo, rel, data, mode=None):
+    path = os.path.join(repo, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mode:
+        os.chmod(path, mode)
+
+
+def init(repo):
+    os.makedirs(repo)
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.email", "bench@example.com")
+    git(repo, "config", "user.name", "bench")
+
+
+def source(rng, lines, tag):
+    return "".join(f"def {tag}_{i}(x):\n    return call_{rng.randrange(99)}(x, {rng.random():.5f})\n"
+                   for i in range(lines // 2)).encode()
+
+
+def untracked(repo):
+    out = os.fsdecode(git(repo, "-c", "core.quotePath=false", "status", "--porcelain=v1", "-uall", "-z"))
+    return sorted(e[3:] for e in out.split("\0") if e.startswith("?? "))
+
+
+def select(repo, budget, **kwargs):
+    saved = gitutil.ENABLE_DIFF_BUDGET
+    gitutil.ENABLE_DIFF_BUDGET = budget
+    try:
+        return gitutil.select_git_diff_files(repo, "HEAD", **kwargs)
+    finally:
+        gitutil.ENABLE_DIFF_BUDGET = saved
+
+
+def prompt(files, per_file, total):
+    llm.DIFF_PER_FILE_BYTES, llm.DIFF_TOTAL_BYTES = per_file, total
+    return llm._cap_files_for_prompt(files)
+
+
+def capped(sel, per_file, total):
+    """(prompt, diff_truncated) as the Stop hook computes them."""
+    text = prompt(sel.files, per_file, total)
+    return text, llm._last_review_truncated_bytes + sel.skipped_bytes
+
+
+def edge_repo(tmp, rng):
+    repo = os.path.join(tmp, "eq")
+    init(repo)
+    write(repo, ".gitattributes", b"*.gen.js -diff\n")
+    for i in range(40):
+        write(repo, f"src/api/mod{i:02d}.py", source(rng, 60 + 10 * i, f"m{i}"))
+    write(repo, "src/rename_me.py", source(rng, 80, "r"))
+    write(repo, "src/gone.py", source(rng, 20, "g"))
+    write(repo, "src/blob.bin", bytes(range(256)))
+    write(repo, "bin/run.sh", b"#!/bin/sh\necho hi\n")
+    write(repo, "src/with space.py", source(rng, 10, "s"))
+    write(repo, "src/glob[1]*.py", source(rng, 10, "g1"))
+    write(repo, "src/café.py".encode().decode(), source(rng, 10, "c"))
+    write(repo, os.fsdecode(b"src/latin1_\xe9t\xe9.py"), source(rng, 10, "l"))
+    write(repo, "web/app.gen.js", b"var a = 1;\n")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "base")
+
+    for i in range(0, 40, 3):
+        write(repo, f"src/api/mod{i:02d}.py", source(rng, 60 + 10 * i, f"m{i}"))  # rewrite
+    for i in range(1, 40, 3):
+        path = os.path.join(repo, "src", "api", f"mod{i:02d}.py")
+        with open(path, "ab") as f:
+            f.write(b"import os\nos.system(user_input)\n")
+    with open(os.path.join(repo, "src", "rename_me.py"), "rb") as f:
+        body = f.read()
+    os.unlink(os.path.join(repo, "src", "rename_me.py"))
+    write(repo, "src/renamed.py", body + b"eval(data)\n")
+    git(repo, "add", "-A", "src/rename_me.py", "src/renamed.py")
+    os.unlink(os.path.join(repo, "src", "gone.py"))
+    write(repo, "src/blob.bin", bytes(range(255, -1, -1)))
+    os.chmod(os.path.join(repo, "bin", "run.sh"), 0o755)
+    for name in ("src/with space.py", "src/glob[1]*.py", "src/café.py", "web/app.gen.js",
+                 os.fsdecode(b"src/latin1_\xe9t\xe9.py")):
+        with open(os.path.join(repo, name), "ab") as f:
+            f.write(b"x = 2\n")
+    for i in range(12):
+        write(repo, f"src/new/route{i:02d}.py", source(rng, 30 + 40 * i, f"n{i}"))
+    write(repo, "src/new/raw.bin", b"\0\1\2")
+    write(repo, "src/new/empty.py", b"")
+    write(repo, "src/new/nonl.py", b"no_newline = True")
+    write(repo, "src/new/sp ace.py", b"y = 1\n")
+    write(repo, os.fsdecode(b"src/new/latin1_\xe0.py"), b"z = 3\n")
+    write(repo, "src/new/bundle.gen.js", b"var b = 2;\n")
+    return repo
+
+
+def check(tmp, rng):
+    repo = edge_repo(tmp, rng)
+    new = untracked(repo)
+    restricted = [os.path.join(repo, p) for p in ("src/api/mod01.py", "src/renamed.py", "src/new", "web")]
+    caps = [(30, 80000, 400000), (5, 80000, 400000), (30, 2000, 12000), (30, 80000, 3000),
+            (8, 500, 900), (50, 1, 1), (3, 80000, 0)]
+    checks, errors = 0, []
+    for no_index in (True, False):
+        gitutil.ENABLE_UNTRACKED_NO_INDEX = no_index
+        for paths in (None, restricted):
+            kwargs = dict(paths=paths, untracked_paths=new, max_reviewable=300, filter_base="HEAD")
+            fast = select(repo, True, max_files=100, per_file_bytes=10 ** 9, total_bytes=10 ** 9, **kwargs)
+            full = select(repo, False, max_files=100, per_file_bytes=10 ** 9, total_bytes=10 ** 9, **kwargs)
+            label = f"no_index={no_index} paths={'some' if paths else 'all'}"
+            if [(tuple(f), f.added, f.removed) for f in fast.files] != \
+                    [(tuple(f), f.added, f.removed) for f in full.files] or not full.files:
+                sys.exit(f"{label}: files differ with everything under the caps\n"
+                         f"  budget: {[f.path for f in fast.files]}\n  full:   {[f.path for f in full.files]}")
+            checks += 1
+            for max_files, per_file, total in caps:
+                budget = dict(kwargs, max_files=max_files, per_file_bytes=per_file, total_bytes=total)
+                fast = select(repo, True, **budget)
+                full = select(repo, False, **budget)
+                fast_prompt, fast_cut = capped(fast, per_file, total)
+                full_prompt, full_cut = capped(full, per_file, total)
+                if fast_prompt != full_prompt:
+                    sys.exit(f"{label} caps={max_files},{per_file},{total}: prompts differ\n"
+                             f"  budget: {[(f.path, f.size) for f in fast.files]}\n"
+                             f"  full:   {[(f.path, f.size) for f in full.files]}")
+                if bool(fast_cut) != bool(full_cut):
+                    sys.exit(f"{label} caps={max_files},{per_file},{total}: diff_truncated "
+                             f"{fast_cut} with the budget, {full_cut} from the whole diff")
+                if full_cut:
+                    errors.append(abs(fast_cut - full_cut) / full_cut)
+                checks += 1
+    gitutil.ENABLE_UNTRACKED_NO_INDEX = True
+    return checks, errors
+
+
+def scaffold_repo(tmp, n_files, kb, rng):
+    repo = os.path.join(tmp, "scaffold")
+    init(repo)
+    lines = kb * 1024 // 60
+    for i in range(n_files):
+        write(repo, f"app/models/model_{i:03d}.py", source(rng, lines, f"old{i}"))
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "base")
+    for i in range(n_files):
+        path = os.path.join(repo, "app", "models", f"model_{i:03d}.py")
+        with open(path, "ab") as f:
+            f.write(source(rng, lines // 4, f"more{i}"))
+        write(repo, f"app/api/routes/route_{i:03d}.py", source(rng, lines, f"route{i}"))
+    return repo
+
+
+def measure(fn, runs):
+    times, peaks = [], []
+    for _ in range(runs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1e6)
+        tracemalloc.stop()
+    return statistics.median(times), statistics.median(peaks), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=150)
+    parser.add_argument("--kb", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    per_file, total = llm.DIFF_PER_FILE_BYTES, llm.DIFF_TOTAL_BYTES
+
+    with tempfile.TemporaryDirectory(prefix="sg-budget-") as tmp:
+        n, errors = check(tmp, random.Random(25))
+        print(f"budgeted selection matches the whole diff on {n} cases (files when they fit, prompt when capped)")
+        if errors:
+            print(f"diff_truncated reported whenever the whole diff's is; estimate off by "
+                  f"{statistics.median(errors):.0%} median, {max(errors):.0%} worst ({len(errors)} cases)")
+
+        repo = scaffold_repo(tmp, args.files, args.kb, random.Random(25))
+        new = untracked(repo)
+        caps = dict(untracked_paths=new, max_files=30, max_reviewable=10 ** 6,
+                    per_file_bytes=per_file, total_bytes=total, filter_base="HEAD")
+        size = len(gitutil.get_git_diff(repo, "HEAD", untracked_paths=new)) / 1e6
+        t_full, m_full, full = measure(lambda: select(repo, False, **caps), args.runs)
+        t_fast, m_fast, fast = measure(lambda: select(repo, True, **caps), args.runs)
+        fast_prompt, fast_cut = capped(fast, per_file, total)
+        full_prompt, full_cut = capped(full, per_file, total)
+        if fast_prompt != full_prompt:
+            sys.exit("scaffold: prompts differ")
+        got = lambda sel: sum(f.size for f in sel.files) / 1e3  # noqa: E731
+        print(f"\n{len(new)} new + {args.files} edited files, {size:.1f} MB diff, caps 30 files / "
+              f"{per_file // 1000} KB / {total // 1000} KB, median of {args.runs}:")
+        print(f"{'':28}{'wall':>10}{'peak mem':>12}{'hunks held':>13}")
+        print(f"{'whole diff, then cap':28}{t_full:>8.0f} ms{m_full:>9.1f} MB{got(full):>10.0f} KB")
+        print(f"{'numstat, fetch to budget':28}{t_fast:>8.0f} ms{m_fast:>9.1f} MB{got(fast):>10.0f} KB")
+        print(f"diff_truncated: {full_cut / 1e3:.0f} KB from the whole diff, {fast_cut / 1e3:.0f} KB estimated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Check and time the extensibility load cache: uncached load vs a cache hit.
+
+Usage:
+    python3 scripts/bench_extensibility_cache.py [--runs 10] [--rules 40]
+
+Builds a throwaway HOME and project with guidance files and user patterns
+in every location (YAML, JSON, with and without path globs), then checks
+that load_for_session() served from the cache gives the same guidance
+block, the same rule set (PatternScanner version) and the same path-filter
+verdicts as an uncached load, that it reads no config file on a hit, and
+that editing, creating or deleting any config file, or touching one within
+the racy window, is noticed. Then times load_for_session() in fresh
+processes (where the PyYAML import lands) with and without a warm cache.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+sys.path.insert(0, HOOKS)
+import extensibility  # noqa: E402
+from pattern_scanner import rule_set_version  # noqa: E402
+
+SAMPLE_PATHS = ["src/app.py", "src/api/users.ts", "docs/guide.md", "pkg/db/query.go", "README"]
+
+TIMED = """
+import sys, time
+sys.path.insert(0, {hooks!r})
+import extensibility
+start = time.perf_counter()
+extensibility.load_for_session({cwd!r})
+print((time.perf_counter() - start) * 1000, len(extensibility.user_patterns()))
+"""
+
+
+def yaml_rules(count):
+    lines = ["patterns:"]
+    for i in range(count):
+        lines += [f"  - rule_name: rule-{i}",
+                  f"    reminder: Rule {i} reminder text for the reviewer.",
+                  f"    regex: 'db\\.primary\\.(query|select)_{i}\\('"]
+        if i % 3 == 0:
+            lines += ["    paths: ['src/**', '*.py']", "    exclude_paths: ['docs/**']"]
+        if i % 4 == 0:
+            lines += [f"    substrings: ['LEGACY_{i}']"]
+    return "\n".join(lines) + "\n"
+
+
+def write(path, text, age_s=3600):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    stamp = time.time() - age_s
+    os.utime(path, (stamp, stamp))
+
+
+def snapshot():
+    patterns = extensibility.user_patterns()
+    filters = [[bool(p["path_filter"](path)) for path in SAMPLE_PATHS]
+               for p in patterns if "path_filter" in p]
+    return extensibility.guidance_block(), rule_set_version(patterns), filters
+
+
+def load(cwd):
+    """load_for_session(), returning (snapshot, config files read)."""
+    reads = []
+    real_read = extensibility._read_config
+    real_guidance = extensibility._load_guidance
+
+    def counting_read(path):
+        reads.append(path)
+        return real_read(path)
+
+    def counting_guidance(cwd):
+        reads.append("guidance")
+        return real_guidance(cwd)
+    extensibility._read_config, extensibility._load_guidance = counting_read, counting_guidance
+    try:
+        extensibility.load_for_session(cwd)
+    finally:
+        extensibility._read_config, extensibility._load_guidance = real_read, real_guidance
+    return snapshot(), reads
+
+
+def uncached(cwd):
+    cache = extensibility.get_cache_file(cwd)
+    if os.path.exists(cache):
+        os.remove(cache)
+    return load(cwd)[0]
+
+
+def expect_hit(cwd, label):
+    expected = uncached(cwd)
+    got, reads = load(cwd)
+    if reads:
+        sys.exit(f"{label}: cache miss on an unchanged config (read {reads})")
+    if got != expected:
+        sys.exit(f"{label}: cached load differs from an uncached one")
+    return got
+
+
+def expect_miss(cwd, label, before):
+    got, reads = load(cwd)
+    if not reads or got == before:
+        sys.exit(f"{label}: change not picked up")
+    if got != uncached(cwd):
+        sys.exit(f"{label}: reload differs from an uncached one")
+    return expect_hit(cwd, label)
+
+
+def check(home, project, rules):
+    claude = os.path.join(project, ".claude")
+    write(os.path.join(home, ".claude", "claude-security-guidance.md"), "- user rule\n")
+    write(os.path.join(home, ".claude", "security-patterns.json"), json.dumps({"patterns": [
+        {"rule_name": "user-wide", "reminder": "User-wide rule.", "substrings": ["EVAL_ME"]}]}))
+    write(os.path.join(claude, "claude-security-guidance.md"), "- project rule\n")
+    write(os.path.join(claude, "security-patterns.yaml"), yaml_rules(rules))
+    write(os.path.join(claude, "security-patterns.local.json"), json.dumps({"patterns": [
+        {"rule_name": "local", "reminder": "Local rule.", "regex": "no-cors",
+         "paths": ["src/api/**"]}]}))
+
+    state = expect_hit(project, "initial")
+    write(os.path.join(claude, "security-patterns.yaml"), yaml_rules(rules - 1), age_s=1800)
+    state = expect_miss(project, "edited YAML", state)
+    write(os.path.join(claude, "claude-security-guidance.local.md"), "- local rule\n")
+    state = expect_miss(project, "new local guidance", state)
+    os.remove(os.path.join(home, ".claude", "security-patterns.json"))
+    state = expect_miss(project, "deleted user patterns", state)
+    # Same size, new mtime
+    write(os.path.join(claude, "claude-security-guidance.md"), "- project RULE\n", age_s=900)
+    state = expect_miss(project, "same-size edit", state)
+
+    write(os.path.join(claude, "claude-security-guidance.md"), "- fresh\n", age_s=0)
+    uncached(project)
+    if os.path.exists(extensibility.get_cache_file(project)):
+        sys.exit("a just-modified config was cached")
+    write(os.path.join(claude, "claude-security-guidance.md"), "- fresh\n")
+    return len(extensibility.user_patterns())
+
+
+def timed(cwd, env, warm, runs):
+    samples = []
+    for _ in range(runs):
+        if not warm and os.path.exists(extensibility.get_cache_file(cwd)):
+            os.remove(extensibility.get_cache_file(cwd))
+        out = subprocess.run([sys.executable, "-c", TIMED.format(hooks=HOOKS, cwd=cwd)],
+                             env=env, capture_output=True, text=True, check=True).stdout
+        samples.append(float(out.split()[0]))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--rules", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sg-ext-") as tmp:
+        home = os.path.join(tmp, "home")
+        project = os.path.join(tmp, "project")
+        os.environ["HOME"] = home
+        os.environ["SECURITY_WARNINGS_STATE_DIR"] = os.path.join(tmp, "state")
+        loaded = check(home, project, args.rules)
+        print(f"equivalence: cached loads match uncached ones ({loaded} user patterns); "
+              "edits, new and deleted files and racy mtimes are picked up")
+
+        env = dict(os.environ)
+        print(f"load_for_session() in a fresh process, median of {args.runs}:")
+        print(f"  uncached    {timed(project, env, False, args.runs):7.2f} ms")
+        print(f"  cache hit   {timed(project, env, True, args.runs):7.2f} ms")
+        empty = os.path.join(tmp, "bare-project")
+        os.makedirs(empty)
+        os.remove(os.path.join(home, ".claude", "claude-security-guidance.md"))
+        print("no config files anywhere:")
+        print(f"  uncached    {timed(empty, env, False, args.runs):7.2f} ms")
+        print(f"  cache hit   {timed(empty, env, True, args.runs):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
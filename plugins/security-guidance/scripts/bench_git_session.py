@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Check the per-process git session against one-shot git calls, and count forks per hook run.
+
+Usage:
+    python3 scripts/bench_git_session.py [--files 20000] [--runs 5] [--repo DIR] [--compare-rev REV]
+
+First checks, in process, that the helpers routed through
+hooks/gitsession.py (_git_toplevel, _git_dir, _find_git_index,
+_git_rev_parse_head, _detect_main_branch, _is_ancestor,
+get_baseline_file_content, capture_git_baseline) answer exactly what the
+one-shot `git rev-parse` / `git show` / `git merge-base` calls they replace
+answer, from a repo root, a subdirectory, inside .git, a linked worktree, a
+bare repo and a non-repo, and that a commit made mid-process is seen by the
+next HEAD lookup.
+
+Then, on a repo with --files files (or a clone of --repo), runs a turn
+through hooks/dispatch.py: UserPromptSubmit, a few edits and new files, and
+a Stop with the LLM review stubbed to report one finding (so the
+re-baseline after a finding runs too). Each hook runs in a fresh process
+that counts the `git` processes it starts. --compare-rev runs the same
+turn against the hooks as of REV (e.g. the commit before this change).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+sys.path.insert(0, HOOKS)
+import diffstate  # noqa: E402
+import gitsession  # noqa: E402
+import gitutil  # noqa: E402
+
+# One hook invocation, in a child process, counting the git processes it starts
+RUN_HOOK = """
+import io, json, subprocess, sys, time
+hooks, payload, out = sys.argv[1:4]
+sys.path.insert(0, hooks)
+forks = []
+_init = subprocess.Popen.__init__
+def counting_init(self, args, *a, **k):
+    if isinstance(args, (list, tuple)) and args and args[0] == "git":
+        i = 1
+        while i < len(args) and args[i] == "-c":
+            i += 2
+        forks.append(args[i] if i < len(args) else "?")
+    _init(self, args, *a, **k)
+subprocess.Popen.__init__ = counting_init
+start = time.perf_counter()
+import dispatch
+import security_reminder_hook as full
+full.analyze_code_security = lambda *a, **k: ("- hardcoded secret in src/app.py", [{
+    "filePath": "src/app.py", "category": "Hardcoded secret", "severity": "high",
+    "vulnerableCode": "KEY = 'x'", "description": "stub", "recommendation": "stub"}])
+sys.stdin = io.StringIO(payload)
+sys.stdout = io.StringIO()
+try:
+    dispatch.main(full)
+except SystemExit:
+    pass
+elapsed = (time.perf_counter() - start) * 1000
+with open(out, "w") as f:
+    json.dump({"forks": forks, "ms": elapsed}, f)
+"""
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+
+def init_repo(path, files):
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    git(path, "config", "user.email", "bench@example.com")
+    git(path, "config", "user.name", "bench")
+    for i in range(files):
+        sub = os.path.join(path, "src", f"pkg{i // 500}")
+        os.makedirs(sub, exist_ok=True)
+        with open(os.path.join(sub, f"mod{i}.py"), "w") as f:
+            f.write(f"def handler_{i}(request):\n    return request.args.get('q{i}')\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-qm", "initial")
+
+
+# ── equivalence ─────────────────────────────────────────────────────────────
+
+def one_shot(cwd, *args):
+    try:
+        r = subprocess.run([*gitsession.GIT_CMD, *args], cwd=cwd, capture_output=True, text=True, timeout=5)
+    except OSError:
+        return -1, ""
+    return r.returncode, r.stdout
+
+
+def expected(cwd, baseline, rel_path):
+    rc, out = one_shot(cwd, "rev-parse", "HEAD")
+    head = out.strip() if rc == 0 and out.strip() else None
+    rc, out = one_shot(cwd, "rev-parse", "--show-toplevel")
+    top = out.strip() if rc == 0 and out.strip() else None
+    rc, out = one_shot(cwd, "rev-parse", "--git-common-dir")
+    common = (out.strip() if os.path.isabs(out.strip()) else os.path.join(cwd, out.strip())) if rc == 0 else None
+    rc, out = one_shot(cwd, "rev-parse", "--git-dir")
+    index = None
+    if rc == 0:
+        gd = out.strip() if os.path.isabs(out.strip()) else os.path.join(cwd, out.strip())
+        index = os.path.join(gd, "index") if os.path.isfile(os.path.join(gd, "index")) else None
+    main = None
+    for ref in ("origin/HEAD", "origin/main", "origin/master", "main", "master"):
+        rc, out = one_shot(cwd, "rev-parse", "--verify", "-q", ref)
+        if rc == 0 and out.strip():
+            main = ref
+            break
+    rc, out = one_shot(cwd, "show", f"{baseline}:{rel_path}")
+    content = out if rc == 0 else None
+    rc, _ = one_shot(cwd, "merge-base", "--is-ancestor", baseline, "HEAD")
+    return head, top, common, index, main, content, rc == 0
+
+
+def _paths(result):
+    """Compare the path fields by realpath: the in-process reader reports
+    `<top>/.git` where rev-parse from a subdirectory says `src/../.git`."""
+    return tuple(os.path.realpath(v) if i in (1, 2, 3) and v else v for i, v in enumerate(result))
+
+
+def routed(cwd, baseline, file_path):
+    return (gitutil._git_rev_parse_head(cwd), gitutil._git_toplevel(cwd), gitutil._git_dir(cwd),
+            gitutil._find_git_index(cwd), gitutil._detect_main_branch(cwd),
+            diffstate.get_baseline_file_content("bench", file_path, cwd, baseline),
+            gitutil._is_ancestor(cwd, baseline, "HEAD"))
+
+
+def check_equivalence(tmp):
+    repo = os.path.join(tmp, "eq")
+    init_repo(repo, 20)
+    with open(os.path.join(repo, "src", "crlf.txt"), "wb") as f:
+        f.write(b"a\r\nb\rc\n")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "crlf")
+    baseline = git(repo, "rev-parse", "HEAD").strip()
+    git(repo, "worktree", "add", "-q", os.path.join(tmp, "eq-wt"))
+    git(tmp, "clone", "-q", "--bare", repo, os.path.join(tmp, "eq-bare"))
+    os.makedirs(os.path.join(tmp, "not-a-repo"))
+
+    cases = [(repo, "src/pkg0/mod1.py"), (repo, "src/crlf.txt"), (repo, "missing.py"),
+             (os.path.join(repo, "src"), "pkg0/mod3.py"), (os.path.join(repo, "src", "pkg0"), "../crlf.txt"),
+             (os.path.join(repo, ".git"), "x"), (os.path.join(tmp, "eq-wt"), "src/pkg0/mod2.py"),
+             (os.path.join(tmp, "eq-bare"), "src/pkg0/mod2.py"), (os.path.join(tmp, "not-a-repo"), "x"),
+             (os.path.join(tmp, "gone"), "x")]
+    for cwd, rel in cases:
+        want = expected(cwd, baseline, rel)
+        got = routed(cwd, baseline, os.path.join(cwd, rel))
+        if _paths(got) != _paths(want):
+            sys.exit(f"{cwd} ({rel}): routed {got}\n  one-shot {want}")
+
+    # Refs resolve per request: a commit after the first lookup is seen
+    with open(os.path.join(repo, "new.py"), "w") as f:
+        f.write("x = 1\n")
+    gitutil._git_rev_parse_head(repo)
+    git(repo, "add", "new.py")
+    git(repo, "commit", "-qm", "more")
+    if gitutil._git_rev_parse_head(repo) != git(repo, "rev-parse", "HEAD").strip():
+        sys.exit("HEAD lookup served a stale SHA after a commit")
+    with open(os.path.join(repo, "new.py"), "w") as f:
+        f.write("x = 2\n")
+    stash = diffstate.capture_git_baseline(repo)
+    if not stash or diffstate.get_baseline_file_content("bench", os.path.join(repo, "new.py"), repo, stash) != "x = 2\n":
+        sys.exit("object created mid-process not readable through the batch process")
+    gitsession.close_all()
+    return len(cases)
+
+
+# ── forks per turn ──────────────────────────────────────────────────────────
+
+def run_hook(hooks, payload, env, tmp):
+    out = os.path.join(tmp, "hook-result.json")
+    subprocess.run([sys.executable, "-c", RUN_HOOK, hooks, json.dumps(payload), out],
+                   env=env, check=True, capture_output=True, timeout=300)
+    with open(out) as f:
+        return json.load(f)
+
+
+def turn(hooks, repo, edits, env, tmp, session_id):
+    git(repo, "checkout", "-q", "--", ".")
+    git(repo, "clean", "-fdq")
+    base = {"session_id": session_id, "cwd": repo}
+    ups = run_hook(hooks, {**base, "hook_event_name": "UserPromptSubmit", "prompt": "edit"}, env, tmp)
+    for path in edits:
+        with open(os.path.join(repo, path), "a") as f:
+            f.write("API_KEY = 'sk-live-0000'\n")
+    os.makedirs(os.path.join(repo, "src", "new"), exist_ok=True)
+    for i in range(3):
+        with open(os.path.join(repo, "src", "new", f"added{i}.py"), "w") as f:
+            f.write("import os\nos.system(input())\n")
+    stop = run_hook(hooks, {**base, "hook_event_name": "Stop", "stop_hook_active": False}, env, tmp)
+    return ups, stop
+
+
+def measure(label, hooks, repo, edits, env, tmp, runs):
+    ups_ms, stop_ms = [], []
+    for n in range(runs):
+        ups, stop = turn(hooks, repo, edits, env, tmp, f"bench-{label}-{n}")
+        ups_ms.append(ups["ms"])
+        stop_ms.append(stop["ms"])
+    print(f"{label:<14}{len(ups['forks']):>8}{statistics.median(ups_ms):>9.0f} ms"
+          f"{len(stop['forks']):>10}{statistics.median(stop_ms):>9.0f} ms   {' '.join(stop['forks'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--repo", help="clone this repo instead of generating one")
+    parser.add_argument("--compare-rev", help="also run the hooks as of this revision of the plugin repo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sg-git-") as tmp:
+        state_dir = os.path.join(tmp, "state")
+        os.makedirs(state_dir)
+        # A fresh throttle file keeps PostToolUse from spawning the SDK venv build
+        open(os.path.join(state_dir, ".sdk_bootstrap_spawned"), "w").close()
+        os.environ["SECURITY_WARNINGS_STATE_DIR"] = state_dir
+        print(f"equivalence: {check_equivalence(tmp)} cwds, routed helpers match one-shot git; "
+              "refs and new objects are seen mid-process")
+
+        repo = os.path.join(tmp, "repo")
+        if args.repo:
+            git(tmp, "clone", "-q", "--shared", os.path.abspath(args.repo), repo)
+        else:
+            init_repo(repo, args.files)
+        env = {**os.environ, "HOME": os.path.join(tmp, "home"), "ANTHROPIC_API_KEY": "bench-unused",
+               "CLAUDE_PROJECT_DIR": repo}
+        for key in ("CLAUDE_CODE_REMOTE", "SECURITY_GUIDANCE_DEBUG_LOG", "SG_GIT_BATCH"):
+            env.pop(key, None)
+
+        tracked = [p for p in git(repo, "ls-files", "-z").split("\0") if p]
+        # Five reviewable files spread over the tree
+        sources = [p for p in tracked if p.endswith(".py")] or tracked
+        edits = sources[::max(1, len(sources) // 5)][:5]
+        files = len(tracked)
+        print(f"\n{files} tracked files, median of {args.runs} turns (5 edits, 3 new files):")
+        print(f"{'hooks':<14}{'UPS: git':>8}{'wall':>12}{'Stop: git':>10}{'wall':>12}   Stop's git commands")
+        targets = [("current", HOOKS)]
+        if args.compare_rev:
+            old = os.path.join(tmp, "old")
+            os.makedirs(old)
+            plugin = os.path.dirname(HOOKS)
+            top = git(plugin, "rev-parse", "--show-toplevel").strip()
+            prefix = os.path.relpath(HOOKS, top).replace(os.sep, "/")
+            archive = subprocess.run(["git", "archive", args.compare_rev, prefix], cwd=top,
+                                     capture_output=True, check=True).stdout
+            subprocess.run(["tar", "-x", "-C", old], input=archive, check=True)
+            targets.insert(0, (args.compare_rev, os.path.join(old, prefix)))
+        for label, hooks in targets:
+            measure(label, hooks, repo, edits, env, tmp, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmark the PostToolUse edit's state work: per-call helpers vs record_edit().
+
+Usage:
+    python3 scripts/bench_state_transaction.py [--sizes 0 1000 5000 20000] [--edits 200]
+        [--fresh-sizes 1000 2000 3000 4000 5000 6000] [--fresh-runs 15]
+
+For each shown_warnings size, times one Edit's state updates (touched path,
+one check-and-mark per pattern match, pending warnings) done the old way,
+each in its own with_locked_state() call, and as the single record_edit()
+transaction, for edits with 0 and 3 pattern matches. record_edit() is timed
+on both state stores: the JSON file (kept at every size for the benchmark)
+and the SQLite database sessions migrate to past SQLITE_MIN_WARNINGS. All
+three end in identical state and show the same reminders, which is checked
+first.
+
+Then, for each --fresh-sizes size, times one record_edit() in a new Python
+process, as a hook pays it (including importing sqlite3 and opening the
+database), on each store: where the columns cross is what
+SQLITE_MIN_WARNINGS should be.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+sys.path.insert(0, HOOKS)
+import security_reminder_hook as hook  # noqa: E402
+import session_state  # noqa: E402
+
+SESSION = "bench-session"
+MATCHES = [
+    ("eval_injection", "eval reminder"),
+    ("innerHTML_xss", "innerHTML reminder"),
+    ("pickle_deserialization", "pickle reminder"),
+]
+
+
+def per_call(file_path, matches):
+    hook.record_touched_path(SESSION, file_path)
+    guidance = [reminder for rule_name, reminder in matches
+                if hook.atomic_check_and_mark_warning(SESSION, f"{file_path}-{rule_name}")]
+    if matches:
+        hook.record_pending_warnings(SESSION, file_path, [r for r, _ in matches])
+    return guidance
+
+
+def transaction(file_path, matches):
+    return hook.record_edit(SESSION, file_path, matches)[1]
+
+
+def seed(size, store):
+    for path in (hook.get_state_file(SESSION), session_state.get_state_db(SESSION)):
+        if os.path.exists(path):
+            os.remove(path)
+    state = {
+        "shown_warnings": [f"src/old/module_{i}.ts-eval_injection" for i in range(size)],
+        "touched_paths": [f"src/old/module_{i}.ts" for i in range(min(size, 200))],
+    }
+    if store == "sqlite":
+        session_state._migrate_to_db(SESSION, state)
+    else:
+        hook.save_state(SESSION, state)
+
+
+def run(fn, size, matches, edits, store="json"):
+    seed(size, store)
+    samples = []
+    shown = []
+    for i in range(edits):
+        start = time.perf_counter()
+        shown.append(fn(f"src/app/file_{i % 50}.ts", matches))
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, shown, hook.load_state(SESSION)
+
+
+# One edit in a fresh process; the JSON store is kept on JSON
+FRESH_EDIT = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+import edit_hook, session_state
+if sys.argv[2] == "json":
+    session_state.SQLITE_MIN_WARNINGS = float("inf")
+start = time.perf_counter()
+edit_hook.record_edit(sys.argv[3], "src/app/file.ts", [("eval_injection", "r"), ("innerHTML_xss", "r")])
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def fresh_edit_ms(size, store, runs):
+    samples = []
+    for _ in range(runs):
+        seed(size, store)
+        out = subprocess.run([sys.executable, "-c", FRESH_EDIT, HOOKS, store, SESSION],
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(float(out.split()[-1]))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 5000, 20000])
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--fresh-sizes", type=int, nargs="+", default=[1000, 2000, 3000, 4000, 5000, 6000])
+    parser.add_argument("--fresh-runs", type=int, default=15)
+    args = parser.parse_args()
+
+    session_state.SQLITE_MIN_WARNINGS = float("inf")  # keep the JSON runs on JSON
+    with tempfile.TemporaryDirectory(prefix="sg-bench-") as state_dir:
+        os.environ["SECURITY_WARNINGS_STATE_DIR"] = state_dir
+        print(f"{'shown_warnings':>14}  {'matches':>7}  {'per-call p50':>12}  "
+              f"{'record_edit p50':>15}  {'+ SQLite p50':>12}")
+        for size in args.sizes:
+            for matches in ([], MATCHES):
+                old_ms, old_shown, old_state = run(per_call, size, matches, args.edits)
+                new_ms, new_shown, new_state = run(transaction, size, matches, args.edits)
+                db_ms, db_shown, db_state = run(transaction, size, matches, args.edits, "sqlite")
+                if not old_shown == new_shown == db_shown or not old_state == new_state == db_state:
+                    sys.exit(f"record_edit diverged at size={size}, matches={len(matches)}")
+                print(f"{size:>14}  {len(matches):>7}  {statistics.median(old_ms):9.3f} ms"
+                      f"  {statistics.median(new_ms):12.3f} ms  {statistics.median(db_ms):9.3f} ms")
+
+        print(f"\none edit in a fresh process, median of {args.fresh_runs}:")
+        print(f"{'shown_warnings':>14}  {'JSON':>9}  {'SQLite':>9}")
+        for size in args.fresh_sizes:
+            print(f"{size:>14}  {fresh_edit_ms(size, 'json', args.fresh_runs):6.2f} ms"
+                  f"  {fresh_edit_ms(size, 'sqlite', args.fresh_runs):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Check untracked-file diffs without a temp index against the temp-index path, and time both.
+
+Usage:
+    python3 scripts/bench_untracked_diff.py [--index-mb 50] [--untracked 3] [--runs 5]
+
+First builds a small repo with tracked edits and deletions plus untracked
+files of every awkward kind (spaces, non-ASCII and tabs in names, binary,
+executable, symlink, empty, no trailing newline, CRLF with autocrlf, a
+.gitattributes `-diff` file, a nested dir) and checks that get_git_diff()
+and _git_name_only(include_untracked=True) return byte-identical output
+whether untracked files go through `git diff --no-index` or through the
+_temp_index copy (SG_UNTRACKED_NO_INDEX=0), with and without a pathspec
+and full context. A file `git rm --cached` this turn, which exists in the
+base tree, must take the temp-index path.
+
+Then builds a repo whose index is about --index-mb MB (skip-worktree
+entries, so the worktree stays empty and git diff doesn't stat them —
+this isolates the index copy, the real tree's stat cost is the same on
+both paths), makes a tracked edit and --untracked new files, and times
+get_git_diff(untracked_paths=...) both ways. The diff is unrestricted:
+with a pathspec, `git diff HEAD -- <paths>` itself takes seconds on an
+index this size (git 2.39), the same on both paths, and would swamp the
+difference being measured.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+sys.path.insert(0, HOOKS)
+import gitutil  # noqa: E402
+from gitsession import GIT_CMD  # noqa: E402
+
+
+def git(cwd, *args, **kwargs):
+    return subprocess.run([*GIT_CMD, *args], cwd=cwd, capture_output=True, check=True, **kwargs).stdout
+
+
+def write(repo, rel, data, mode=None):
+    path = os.path.join(repo, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mode:
+        os.chmod(path, mode)
+
+
+def init(repo):
+    os.makedirs(repo)
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.email", "bench@example.com")
+    git(repo, "config", "user.name", "bench")
+
+
+def both_ways(fn):
+    """fn() with untracked files diffed without and with the temp index."""
+    saved = gitutil.ENABLE_UNTRACKED_NO_INDEX
+    try:
+        gitutil.ENABLE_UNTRACKED_NO_INDEX = True
+        fast = fn()
+        gitutil.ENABLE_UNTRACKED_NO_INDEX = False
+        slow = fn()
+    finally:
+        gitutil.ENABLE_UNTRACKED_NO_INDEX = saved
+    return fast, slow
+
+
+def untracked(repo):
+    out = git(repo, "-c", "core.quotePath=false", "status", "--porcelain=v1", "-uall", "-z").decode()
+    return sorted(e[3:] for e in out.split("\0") if e.startswith("?? "))
+
+
+def check(tmp):
+    repo = os.path.join(tmp, "eq")
+    init(repo)
+    git(repo, "config", "core.autocrlf", "input")
+    for i in range(6):
+        write(repo, f"src/mod{i}.py", b"".join(b"line %d of %d\n" % (n, i) for n in range(40)))
+    write(repo, ".gitattributes", b"*.lock -diff\n")
+    write(repo, "zz/last.py", b"print('last')\n")
+    write(repo, "dropped.py", b"print('was tracked')\n")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "base")
+    base = git(repo, "rev-parse", "HEAD").decode().strip()
+
+    write(repo, "src/mod1.py", b"changed\n")
+    write(repo, "src/mod3.py", b"line 0 of 3\nEDIT\n")
+    os.unlink(os.path.join(repo, "src", "mod4.py"))
+    write(repo, "src/mod2a.py", b"import os\nos.system(x)\n")
+    write(repo, "a new/sp ace é.py", "é\n".encode())
+    write(repo, "src/tab\tname.py", b"x = 1\n")
+    write(repo, "src/blob.bin", b"\0\1\2binary")
+    write(repo, "run.sh", b"#!/bin/sh\necho hi\n", 0o755)
+    os.symlink("src/mod1.py", os.path.join(repo, "link.py"))
+    write(repo, "empty.py", b"")
+    write(repo, "nonl.py", b"no newline")
+    write(repo, "crlf.py", b"a = 1\r\nb = 2\r\n")
+    write(repo, "deps.lock", b"pinned\n")
+    write(repo, "zz/deeper/new.py", b"print('deep')\n")
+    new = untracked(repo)
+
+    cases = [dict(paths=None), dict(paths=[os.path.join(repo, p) for p in ("src", "zz/deeper/new.py", "run.sh")]),
+             dict(paths=None, full_context=True)]
+    for kwargs in cases:
+        fast, slow = both_ways(lambda: gitutil.get_git_diff(repo, base, untracked_paths=new, **kwargs))
+        if fast != slow or not fast:
+            sys.exit(f"get_git_diff({kwargs}) differs:\n--- no index\n{fast}\n--- temp index\n{slow}")
+    fast, slow = both_ways(lambda: gitutil._git_name_only(repo, base, include_untracked=True))
+    if fast != slow:
+        sys.exit(f"_git_name_only differs: {sorted(fast ^ slow)}")
+    fast, slow = both_ways(lambda: gitutil._git_name_only(os.path.join(repo, "src"), base, include_untracked=True))
+    if fast != slow:
+        sys.exit(f"_git_name_only from src/ differs: {sorted(fast ^ slow)}")
+
+    git(repo, "rm", "-q", "--cached", "dropped.py")
+    write(repo, "dropped.py", b"print('was tracked, now edited')\n")
+    new = untracked(repo)
+    if gitutil._untracked_without_index(repo, base, new) is not None:
+        sys.exit("a path that exists in the base tree didn't fall back to the temp index")
+    fast, slow = both_ways(lambda: gitutil.get_git_diff(repo, base, untracked_paths=new))
+    if fast != slow:
+        sys.exit("get_git_diff with a `git rm --cached` file differs")
+    return len(new)
+
+
+def big_repo(tmp, index_mb):
+    repo = os.path.join(tmp, "big")
+    init(repo)
+    empty = git(repo, "hash-object", "-w", "--stdin", input=b"").decode().strip()
+    entries = index_mb * 1024 * 1024 // 112  # ~112 bytes per entry with these path lengths
+    info = "".join(f"100644 {empty}\tservices/svc{i // 2000:03d}/pkg{(i // 50) % 40:02d}/module_{i:06d}_handler.py\n"
+                   for i in range(entries))
+    git(repo, "update-index", "--index-info", input=info.encode())
+    git(repo, "update-index", "-z", "--skip-worktree", "--stdin", input=git(repo, "ls-files", "-z"))
+    write(repo, "app/main.py", b"".join(b"line %d\n" % n for n in range(200)))
+    write(repo, "app/util.py", b"def f():\n    return 1\n")
+    git(repo, "add", "app")
+    git(repo, "commit", "-qm", "big")
+    return repo
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-mb", type=int, default=50)
+    parser.add_argument("--untracked", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sg-untracked-") as tmp:
+        n = check(tmp)
+        print(f"equivalence: {n} untracked files, get_git_diff and _git_name_only match the temp-index path")
+
+        repo = big_repo(tmp, args.index_mb)
+        write(repo, "app/main.py", b"edited\n" + b"".join(b"line %d\n" % n for n in range(1, 200)))
+        for i in range(args.untracked):
+            write(repo, f"app/new_{i}.py", b"import subprocess\nsubprocess.run(cmd, shell=True)\n" * (i + 1))
+        new = untracked(repo)
+        size = os.path.getsize(os.path.join(repo, ".git", "index")) / 1e6
+        diff = lambda: gitutil.get_git_diff(repo, "HEAD", untracked_paths=new)  # noqa: E731
+        fast, slow = both_ways(diff)
+        if fast != slow:
+            sys.exit("big repo: outputs differ")
+        gitutil.ENABLE_UNTRACKED_NO_INDEX = False
+        t_slow = timed(diff, args.runs)
+        gitutil.ENABLE_UNTRACKED_NO_INDEX = True
+        t_fast = timed(diff, args.runs)
+        print(f"\n{size:.0f} MB index, 1 tracked edit + {len(new)} untracked files, median of {args.runs}:")
+        print(f"  temp index copy + add -N + diff   {t_slow:8.1f} ms")
+        print(f"  diff + --no-index per file        {t_fast:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
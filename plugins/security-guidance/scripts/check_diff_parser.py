@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Check the streaming diff parser against the split-based one it replaced, and measure both.
+
+Usage:
+    python3 scripts/check_diff_parser.py [--repo DIR] [--commits 200] [--files 300] [--runs 3]
+
+Correctness, on the last --commits commits of --repo (default: this
+checkout) as `git show -p` prints them, plus a generated repo with edge
+cases (CRLF, non-UTF-8, binary, mode-only, renames, `++`/`--` lines,
+"diff --git" inside a line):
+
+  - parse_diff_into_files / extract_file_paths_from_diff on the text, and
+    _git_diff_files on the streamed stdout, give the same (path, content)
+    pairs as the old parser. The only allowed differences are the old
+    parser breaking a file at "diff --git " in the middle of a line, and
+    skipping a file whose name git quotes in the header (non-ASCII)
+  - each DiffFile's added/removed lines and hunk counts agree with its
+    content; _prioritize_diff_files ranks the same as the old
+    count("\\n+") proxy; filter_preexisting_from_diff gives the old output
+    (up to the old parser dropping `+++`/`---`-prefixed body lines)
+  - get_git_diff_files equals parse_diff_into_files(get_git_diff) with
+    untracked files, both with and without the temp index
+
+Then, on a generated diff of --files rewritten files, compares the peak
+memory (tracemalloc) and time of the Stop pipeline's parse → prioritize →
+filter-preexisting → diff-anchor over the old (buffer, split, re-split per
+stage) and the new (stream once) code. What the new code saves is memory
+(one copy of the diff text, not one per stage); its wall time is the same
+as the old code's, give or take run-to-run noise of a few percent either
+way, since git, not parsing, dominates it.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+sys.path.insert(0, HOOKS)
+import diffparse  # noqa: E402
+import gitutil  # noqa: E402
+from gitsession import GIT_CMD  # noqa: E402
+
+
+# ── the pre-streaming implementations, verbatim in behavior ──────────────
+
+def old_parse(diff_output):
+    if not diff_output or not diff_output.strip():
+        return []
+    files = []
+    for file_diff in diff_output.split("diff --git "):
+        if not file_diff.strip():
+            continue
+        lines = file_diff.split('\n')
+        header_match = re.match(r'^a/(.+?) b/(.+)$', lines[0])
+        if not header_match:
+            continue
+        file_path = header_match.group(2) or header_match.group(1) or ''
+        if not gitutil._is_reviewable_source(file_path):
+            continue
+        diff_lines = []
+        in_hunks = False
+        for line in lines[1:]:
+            if line.startswith('@@'):
+                in_hunks = True
+            if in_hunks:
+                diff_lines.append(line)
+        if diff_lines:
+            files.append((file_path, '\n'.join(diff_lines)))
+    return files
+
+
+def old_filter_preexisting(diff_files):
+    filtered = []
+    for file_path, diff_content in diff_files:
+        lines = diff_content.split('\n')
+        removed_lines = set()
+        added_lines = []
+        for line in lines:
+            if line.startswith('-') and not line.startswith('---'):
+                removed_lines.add(line[1:].strip())
+            elif line.startswith('+') and not line.startswith('+++'):
+                added_lines.append(line[1:].strip())
+        if not removed_lines or not any(l in removed_lines for l in added_lines):
+            filtered.append((file_path, diff_content))
+            continue
+        added_lines_set = set(added_lines)
+        new_lines = []
+        for line in lines:
+            if line.startswith('+') and not line.startswith('+++'):
+                new_lines.append(' ' + line[1:] if line[1:].strip() in removed_lines else line)
+            elif line.startswith('-') and not line.startswith('---'):
+                if line[1:].strip() not in added_lines_set:
+                    new_lines.append(line)
+            else:
+                new_lines.append(line)
+        filtered.append((file_path, '\n'.join(new_lines)))
+    return filtered
+
+
+def old_anchor_lines(diff_text):
+    added = [ln[1:] for ln in diff_text.splitlines() if ln.startswith("+") and not ln.startswith("+++")]
+    removed = [ln[1:] for ln in diff_text.splitlines() if ln.startswith("-") and not ln.startswith("---")]
+    return added, removed
+
+
+# ── checks ───────────────────────────────────────────────────────────────
+
+def git(cwd, *args, **kwargs):
+    return subprocess.run([*GIT_CMD, *args], cwd=cwd, capture_output=True, check=True, **kwargs).stdout
+
+
+def midline_split(text):
+    """The old parser's two known misses: "diff --git " inside a line, and
+    a header with a quoted (e.g. non-ASCII) name, which it skipped."""
+    return any(("diff --git " in line and not line.startswith("diff --git "))
+               or (line.startswith("diff --git ") and '"' in line) for line in text.split("\n"))
+
+
+def has_plusplus(files):
+    return any(line[:3] in ("+++", "---") for _, c in files for line in c.split("\n"))
+
+
+def check_text(label, text, streamed=None):
+    new = gitutil.parse_diff_into_files(text)
+    old = old_parse(text)
+    if [tuple(f) for f in new] != old and not midline_split(text):
+        sys.exit(f"{label}: parse differs from the old parser")
+    if streamed is not None and [tuple(f) for f in streamed] != [tuple(f) for f in new]:
+        sys.exit(f"{label}: streamed parse differs from parsing the text")
+    old_paths = [p for p in (re.match(r'^a/(.+?) b/(.+)$', s.split('\n')[0]) for s in text.split("diff --git "))
+                 if p and gitutil._is_reviewable_source(p.group(2))]
+    if gitutil.extract_file_paths_from_diff(text) != [m.group(2) for m in old_paths] and not midline_split(text):
+        sys.exit(f"{label}: extract_file_paths_from_diff differs")
+    for f in new:
+        again = diffparse.diff_file(f.path, f.content)
+        if (again.added, again.removed) != (f.added, f.removed):
+            sys.exit(f"{label}: {f.path}: added/removed differ from a reparse of its content")
+        if sum(h.added for h in f.hunks) != len(f.added) or sum(h.removed for h in f.hunks) != len(f.removed):
+            sys.exit(f"{label}: {f.path}: hunk counts don't add up")
+        if len(f.added) != f.content.count("\n+") and not has_plusplus([f]):
+            sys.exit(f"{label}: {f.path}: {len(f.added)} added lines vs count('\\n+') {f.content.count(chr(10) + '+')}")
+    if len(new) > 1 and not has_plusplus(new):
+        ranked_new = [f.path for f in gitutil._prioritize_diff_files(new, len(new) - 1)[0]]
+        ranked_old = [p for p, _ in gitutil._prioritize_diff_files(old, len(old) - 1)[0]]
+        if ranked_new != ranked_old and not midline_split(text):
+            sys.exit(f"{label}: _prioritize_diff_files ranks differently")
+    if not has_plusplus(new):
+        got = [tuple(f) for f in gitutil.filter_preexisting_from_diff(new, ".", "HEAD")]
+        if got != old_filter_preexisting([tuple(f) for f in new]):
+            sys.exit(f"{label}: filter_preexisting_from_diff differs")
+    return len(new)
+
+
+def check_history(repo, commits):
+    shas = git(repo, "rev-list", f"--max-count={commits}", "HEAD").decode().split()
+    files = 0
+    for sha in shas:
+        argv = [*GIT_CMD, "show", "-p", "--no-color", "--no-ext-diff", sha, "--"]
+        text = git(repo, *argv[len(GIT_CMD):]).decode("utf-8", errors="replace")
+        files += check_text(sha[:12], text, streamed=gitutil.parse_diff_into_files(gitutil._git_diff_files(argv, repo, 30)))
+    return len(shas), files
+
+
+def write(repo, rel, data):
+    path = os.path.join(repo, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def check_edge_cases(tmp):
+    repo = os.path.join(tmp, "edge")
+    os.makedirs(repo)
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.email", "check@example.com")
+    git(repo, "config", "user.name", "check")
+    write(repo, "src/crlf.py", b"a = 1\r\nb = 2\r\n")
+    write(repo, "src/latin1.py", "s = 'caf\xe9'\n".encode("latin-1"))
+    write(repo, "src/plus.c", b"int i;\n")
+    write(repo, "src/old_name.py", b"".join(b"line %d\n" % i for i in range(30)))
+    write(repo, "bin/tool", b"#!/bin/sh\necho\n")
+    write(repo, "img.bin", b"\0\1\2")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "base")
+    write(repo, "src/crlf.py", b"a = 1\r\nb = 3\r\nc\rd = 4\r\n")
+    write(repo, "src/latin1.py", "s = 'caf\xe9s'\n".encode("latin-1"))
+    write(repo, "src/plus.c", b"int i;\n++i;\n--i;\n")
+    os.rename(os.path.join(repo, "src", "old_name.py"), os.path.join(repo, "src", "new_name.py"))
+    write(repo, "src/new_name.py", b"".join(b"line %d\n" % i for i in range(29)) + b"changed\n")
+    os.chmod(os.path.join(repo, "bin", "tool"), 0o755)
+    write(repo, "img.bin", b"\0\1\3")
+    write(repo, "src/quote.py", b'doc = """\ndiff --git a/x b/x\n"""\n')
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "edge cases")
+    argv = [*GIT_CMD, "show", "-p", "--no-color", "--no-ext-diff", "HEAD", "--"]
+    text = git(repo, *argv[len(GIT_CMD):]).decode("utf-8", errors="replace")
+    check_text("edge cases", text, streamed=gitutil.parse_diff_into_files(gitutil._git_diff_files(argv, repo, 30)))
+    plus = {f.path: f for f in gitutil.parse_diff_into_files(text)}["src/plus.c"]
+    if plus.added != ["++i;", "--i;"]:
+        sys.exit(f"`++`-prefixed added lines: {plus.added}")
+
+    # Stop's path: working-tree diff with untracked files
+    write(repo, "src/plus.c", b"int j;\n")
+    write(repo, "src/new_file.py", b"import os\nos.system(cmd)\n")
+    write(repo, "src/deep/other.py", b"x = 1\n")
+    untracked = ["src/deep/other.py", "src/new_file.py"]
+    for no_index in (True, False):
+        gitutil.ENABLE_UNTRACKED_NO_INDEX = no_index
+        text = gitutil.get_git_diff(repo, "HEAD", untracked_paths=untracked)
+        files = gitutil.get_git_diff_files(repo, "HEAD", untracked_paths=untracked)
+        if [tuple(f) for f in gitutil.parse_diff_into_files(files)] != old_parse(text) or len(files) != 3:
+            sys.exit(f"get_git_diff_files differs from parsing get_git_diff (no_index={no_index})")
+    gitutil.ENABLE_UNTRACKED_NO_INDEX = True
+
+
+# ── measurement ──────────────────────────────────────────────────────────
+
+def big_diff_repo(tmp, n_files, rng):
+    repo = os.path.join(tmp, "big")
+    os.makedirs(repo)
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.email", "check@example.com")
+    git(repo, "config", "user.name", "check")
+    for i in range(n_files):
+        body = "".join(f"    value_{j} = compute({j}, {rng.random():.6f})\n" for j in range(120))
+        write(repo, f"services/api/handler_{i}.py", f"def handler_{i}():\n{body}".encode())
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "base")
+    for i in range(n_files):
+        # A Write-tool rewrite: same lines reordered plus a few new ones
+        path = os.path.join(repo, "services", "api", f"handler_{i}.py")
+        with open(path) as f:
+            lines = f.readlines()
+        head, body = lines[:1], lines[1:]
+        rng.shuffle(body)
+        body[:0] = [f"    token_{k} = request.args.get('t{k}')\n" for k in range(5)]
+        with open(path, "w") as f:
+            f.writelines(head + body)
+    return repo
+
+
+def old_pipeline(repo, cap):
+    r = subprocess.run([*GIT_CMD, "diff", "--no-color", "--no-ext-diff", "HEAD"],
+                       cwd=repo, capture_output=True, timeout=60)
+    text = r.stdout.decode("utf-8", errors="replace")
+    files, _ = gitutil._prioritize_diff_files(old_parse(text), cap)
+    files = old_filter_preexisting(files)
+    diff_text = "\n\n".join(f"=== DIFF: {fp} ===\n{c}" for fp, c in files)
+    return files, old_anchor_lines(diff_text)
+
+
+def new_pipeline(repo, cap):
+    files = gitutil.parse_diff_into_files(gitutil.get_git_diff_files(repo, "HEAD"))
+    files, _ = gitutil._prioritize_diff_files(files, cap)
+    files = gitutil.filter_preexisting_from_diff(files, repo, "HEAD")
+    return files, diffparse.added_removed(files)
+
+
+def measure(fn, runs):
+    times, peaks = [], []
+    for _ in range(runs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1e6)
+        tracemalloc.stop()
+    return statistics.median(times), statistics.median(peaks), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo", default=os.path.dirname(os.path.dirname(HOOKS)))
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    n_commits, n_files = check_history(os.path.abspath(args.repo), args.commits)
+    with tempfile.TemporaryDirectory(prefix="sg-diffparse-") as tmp:
+        check_edge_cases(tmp)
+        print(f"parser matches the old one on {n_commits} commits ({n_files} files) and the edge-case repo")
+
+        repo = big_diff_repo(tmp, args.files, random.Random(24))
+        size = len(git(repo, "diff", "HEAD")) / 1e6
+        cap = args.files  # no prioritizer cut, so both pipelines see every file
+        t_old, m_old, (files_old, _) = measure(lambda: old_pipeline(repo, cap), args.runs)
+        t_new, m_new, (files_new, _) = measure(lambda: new_pipeline(repo, cap), args.runs)
+        if [tuple(f) for f in files_new] != files_old:
+            sys.exit("pipelines disagree on the generated diff")
+        print(f"\n{size:.1f} MB diff, {args.files} rewritten files, median of {args.runs}:")
+        print(f"{'':24}{'wall':>10}{'peak mem':>12}")
+        print(f"{'buffer + re-split':24}{t_old:>8.0f} ms{m_old:>9.1f} MB")
+        print(f"{'stream once':24}{t_new:>8.0f} ms{m_new:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
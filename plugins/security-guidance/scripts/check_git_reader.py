@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Check the in-process git reader against the git CLI on generated repos, and time it.
+
+Usage:
+    python3 scripts/check_git_reader.py [--commits 40] [--runs 200]
+
+Builds repos in a throwaway dir and, for each state below, compares
+hooks/gitreader.py with git itself:
+
+  - layout (toplevel, git dir, common git dir) vs `git rev-parse`
+  - every object in the repo (`cat-file --batch-all-objects`) read by sha
+  - HEAD, every ref by full name and by shorthand, missing names, and
+    `<commit>:<path>` for every path in several commits (plus missing
+    paths), vs `git cat-file --batch`
+  - the HEAD reflog vs `git log -g --format=%H|%ct|%gs`
+
+States: loose objects only; after `git gc` (packs and packed-refs); after
+an aggressive repack (deep delta chains); new loose objects and a loose ref
+overriding a packed one on top of packs; a clone with remote-tracking
+refs; a linked worktree; a repo whose .git is a gitdir file; a subdirectory
+and a symlinked cwd; an unborn repo. The reader must answer all of those
+itself. A bare repo, a clone with alternates, GIT_DIR in the environment
+and a repo with a replace ref must be declined (Unsupported), not answered
+wrong. Then times HEAD resolution and a reflog read against the forks they
+replace.
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+sys.path.insert(0, HOOKS)
+import gitreader  # noqa: E402
+from gitsession import GIT_CMD, _read_response  # noqa: E402
+
+
+def git(cwd, *args, **kwargs):
+    return subprocess.run([*GIT_CMD, *args], cwd=cwd, capture_output=True, check=True, **kwargs).stdout
+
+
+def commit_all(repo, message):
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", message)
+
+
+def build_history(repo, commits, rng):
+    """A history with edits to a large file (for deltas), renames, deletes,
+    nested dirs, binary and CRLF content, branches, tags and an amend."""
+    os.makedirs(os.path.join(repo, "src", "deep", "er"))
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.email", "check@example.com")
+    git(repo, "config", "user.name", "check")
+    big = [f"line {i}: {rng.random()}\n" for i in range(3000)]
+    for n in range(commits):
+        big[rng.randrange(len(big))] = f"edit {n}: {rng.random()}\n"
+        with open(os.path.join(repo, "big.txt"), "w") as f:
+            f.writelines(big)
+        with open(os.path.join(repo, "src", f"mod{n % 7}.py"), "w") as f:
+            f.write(f"VALUE = {n}\r\nprint(VALUE)\n")
+        with open(os.path.join(repo, "src", "deep", "er", "blob.bin"), "wb") as f:
+            f.write(bytes(rng.randrange(256) for _ in range(512)))
+        if n % 5 == 3 and os.path.exists(os.path.join(repo, "src", "mod1.py")):
+            os.rename(os.path.join(repo, "src", "mod1.py"), os.path.join(repo, "src", f"moved{n}.py"))
+        commit_all(repo, f"commit {n} | with a pipe")
+        if n == commits // 3:
+            git(repo, "branch", "feature")
+            git(repo, "tag", "v1")
+            git(repo, "tag", "-a", "v1-annotated", "-m", "release")
+        if n == commits // 2:
+            git(repo, "checkout", "-q", "feature")
+            with open(os.path.join(repo, "feature.txt"), "w") as f:
+                f.write("feature\n")
+            commit_all(repo, "feature work")
+            git(repo, "checkout", "-q", "main")
+    git(repo, "commit", "-q", "--amend", "-m", "amended tip")
+    git(repo, "reset", "-q", "--soft", "HEAD~1")
+    git(repo, "commit", "-qm", "recommitted")
+
+
+def cli_batch(cwd, names):
+    out = io.BytesIO(git(cwd, "cat-file", "--batch", input="".join(n + "\n" for n in names).encode()))
+    return [_read_response(out) for _ in names]
+
+
+def cli_reflog(cwd, n):
+    out = git(cwd, "log", "-g", "-n", str(n), "--format=%H|%ct|%gs", "HEAD").decode()
+    return [tuple(line.split("|", 2)) for line in out.splitlines()]
+
+
+def names_to_check(cwd, rng):
+    refs = git(cwd, "for-each-ref", "--format=%(refname)\t%(refname:short)").decode().splitlines()
+    names = ["HEAD", "main", "master", "origin/HEAD", "origin/main", "origin/master",
+             "nope", "origin/nope", "refs/heads/nope", "ORIG_HEAD", "FETCH_HEAD"]
+    for line in refs:
+        names += line.split("\t")
+    commits = git(cwd, "rev-list", "--all").decode().split()
+    for sha in rng.sample(commits, min(6, len(commits))) + (["HEAD"] if commits else []):
+        names += [sha, f"{sha}:", f"{sha}:nope", f"{sha}:src/nope.py", f"{sha}:big.txt/x"]
+        paths = git(cwd, "ls-tree", "-r", "-t", "--full-tree", "--name-only", sha).decode().splitlines()
+        names += [f"{sha}:{p}" for p in paths]
+    return list(dict.fromkeys(names))
+
+
+def compare(label, cwd, rng, expect_supported=True):
+    """Compare the reader with git from cwd. Returns the number of checks."""
+    try:
+        repo = gitreader.Repository(cwd)
+    except gitreader.Unsupported as e:
+        if expect_supported:
+            sys.exit(f"{label}: reader declined the repo: {e}")
+        return 0
+    checks = 0
+    rev_parse = git(cwd, "rev-parse", "--show-toplevel", "--git-dir", "--git-common-dir").decode().splitlines()
+    want = [os.path.realpath(os.path.join(cwd, p)) for p in rev_parse]
+    got = [os.path.realpath(p) for p in (repo.toplevel, repo.git_dir, repo.common_dir)]
+    if got != want:
+        sys.exit(f"{label}: layout {got} != git's {want}")
+    checks += 1
+
+    declined = []
+    all_objects = git(cwd, "cat-file", "--batch-all-objects", "--batch-check=%(objectname)").decode().split()
+    for sha, expected in zip(all_objects, cli_batch(cwd, all_objects)):
+        try:
+            got = repo.read(sha)
+        except gitreader.Unsupported as e:
+            declined.append(f"{sha}: {e}")
+            continue
+        if got != expected[1:]:
+            sys.exit(f"{label}: object {sha} read as {got[0]} of {len(got[1])} bytes, git: "
+                     f"{expected[1]} of {len(expected[2])} bytes")
+        checks += 1
+
+    names = names_to_check(cwd, rng)
+    for name, expected in zip(names, cli_batch(cwd, names)):
+        try:
+            got = repo.lookup(name)
+        except gitreader.Unsupported as e:
+            declined.append(f"{name}: {e}")
+            continue
+        if got != expected:
+            sys.exit(f"{label}: {name} -> {got and got[:2]}, git: {expected and expected[:2]}")
+        checks += 1
+
+    if all_objects:
+        for n in (1, 5, 50):
+            try:
+                got = repo.head_reflog(n)
+            except gitreader.Unsupported as e:
+                declined.append(f"reflog: {e}")
+                continue
+            if got != cli_reflog(cwd, n):
+                sys.exit(f"{label}: reflog -n {n}\n  reader {got}\n  git    {cli_reflog(cwd, n)}")
+            checks += 1
+    repo.close()
+    if declined and expect_supported:
+        sys.exit(f"{label}: reader declined {len(declined)} lookups, e.g. {declined[:3]}")
+    return checks
+
+
+def expect_declined(label, cwd, env=None):
+    saved = dict(os.environ)
+    os.environ.update(env or {})
+    try:
+        repo = gitreader.Repository(cwd)
+        try:
+            repo.read(git(cwd, "rev-parse", "HEAD").decode().strip())
+        finally:
+            repo.close()
+    except gitreader.Unsupported:
+        return
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    sys.exit(f"{label}: reader answered instead of deferring to git")
+
+
+def check(tmp, commits, rng):
+    repo = os.path.join(tmp, "repo")
+    build_history(repo, commits, rng)
+    total = 0
+    total += compare("loose", repo, rng)
+    total += compare("subdirectory", os.path.join(repo, "src", "deep"), rng)
+    os.symlink(os.path.join(repo, "src"), os.path.join(tmp, "link"))
+    total += compare("symlinked cwd", os.path.join(tmp, "link"), rng)
+    git(repo, "gc", "-q")
+    total += compare("gc", repo, rng)
+    git(repo, "repack", "-adfq", "--depth=250", "--window=250")
+    total += compare("deep deltas", repo, rng)
+    with open(os.path.join(repo, "big.txt"), "a") as f:
+        f.write("after gc\n")
+    commit_all(repo, "loose on top of packs")
+    git(repo, "update-ref", "refs/tags/v1", "HEAD")  # loose ref shadowing the packed one
+    total += compare("packs + loose", repo, rng)
+
+    clone = os.path.join(tmp, "clone")
+    git(tmp, "clone", "-q", "--no-local", repo, clone)
+    git(clone, "checkout", "-q", "-b", "local")
+    total += compare("clone", clone, rng)
+    git(repo, "worktree", "add", "-q", os.path.join(tmp, "worktree"), "feature")
+    total += compare("linked worktree", os.path.join(tmp, "worktree"), rng)
+    git(tmp, "clone", "-q", "--no-local", "--separate-git-dir", os.path.join(tmp, "sep.git"),
+        repo, os.path.join(tmp, "sep"))
+    total += compare("gitdir file", os.path.join(tmp, "sep"), rng)
+    unborn = os.path.join(tmp, "unborn")
+    os.makedirs(unborn)
+    git(unborn, "init", "-q")
+    total += compare("unborn", unborn, rng)
+
+    git(tmp, "clone", "-q", "--bare", repo, os.path.join(tmp, "bare.git"))
+    expect_declined("bare", os.path.join(tmp, "bare.git"))
+    git(tmp, "clone", "-q", "--shared", repo, os.path.join(tmp, "shared"))
+    expect_declined("alternates", os.path.join(tmp, "shared"))
+    expect_declined("GIT_DIR", os.path.join(tmp, "unborn"), {"GIT_DIR": os.path.join(repo, ".git")})
+    head = git(clone, "rev-parse", "HEAD").decode().strip()
+    git(clone, "replace", head, git(clone, "rev-parse", "HEAD~1").decode().strip())
+    expect_declined("replace refs", clone)
+    return total
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=22)
+    args = parser.parse_args()
+    for var in gitreader._GIT_ENV:
+        os.environ.pop(var, None)
+
+    with tempfile.TemporaryDirectory(prefix="sg-reader-") as tmp:
+        total = check(tmp, args.commits, random.Random(args.seed))
+        print(f"reader matches git on {total} checks; bare, alternates, GIT_DIR and replace refs are declined")
+
+        repo = os.path.join(tmp, "repo")
+        runs = args.runs
+        print(f"\nmedian of {runs}:")
+        print(f"  HEAD, fresh reader          {timed(lambda: gitreader.Repository(repo).lookup('HEAD'), runs):8.0f} us")
+        print(f"  HEAD, `git rev-parse HEAD`  {timed(lambda: git(repo, 'rev-parse', 'HEAD'), max(1, runs // 4)):8.0f} us")
+        reader = gitreader.Repository(repo)
+        print(f"  reflog -n 5, reader         {timed(lambda: reader.head_reflog(5), runs):8.0f} us")
+        print(f"  reflog -n 5, `git log -g`   {timed(lambda: cli_reflog(repo, 5), max(1, runs // 4)):8.0f} us")
+        print(f"  HEAD:big.txt, reader        {timed(lambda: reader.lookup('HEAD:big.txt'), runs):8.0f} us")
+        print(f"  HEAD:big.txt, `git show`    {timed(lambda: git(repo, 'show', 'HEAD:big.txt'), max(1, runs // 4)):8.0f} us")
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
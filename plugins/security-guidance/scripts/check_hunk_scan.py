@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Check and time hunk-scoped pattern checking against full-file rescans.
+
+Usage:
+    python3 scripts/check_hunk_scan.py [--cases 3000] [--seed 15]
+
+Builds random files from code lines and trigger snippets, including
+constructs split across lines, applies random Edits, and checks that
+PatternScanner.scan_hunks() over windows around the edit equals the same
+"match touches the edit" check run over the whole file. Also counts how
+often the surrounding text changed the verdict from checking new_string
+alone: a construct completed by the edit, or a lookaround (weights_only=True
+after torch.load(, x before eval() that rules a match out. Then times a
+one-line Edit to a 4 MB file: full-file scan vs new_string only vs
+scan_hunks().
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks"))
+import security_reminder_hook as hook  # noqa: E402
+
+PATHS = ["src/app.ts", "pkg/loader.py", "docs/guide.md", ".github/workflows/ci.yml", "main.go"]
+
+LINES = [
+    "const result = await client.fetchData(options, retries);\n",
+    "total = sum(item.price for item in basket if item.available)\n",
+    "if err != nil { return err }\n",
+    "# evaluate the model\n",
+    "data = json.loads(payload)\n",
+    "\n",
+]
+
+# Whole constructs, and halves that only match once an edit joins them
+PIECES = [
+    "eval(input)", "el.innerHTML = html", "os.system(cmd)", "pickle.loads(blob)",
+    "subprocess.run(cmd,", "    shell=True)", "yaml.load(", "f, Loader=yaml.SafeLoader)",
+    "torch.load(p,", " weights_only=True)", "AES.MODE_", "ECB", "xeval(", "verify=",
+    "False", "<script ", "src=\"https://cdn.example.com/x.js\"></script>", "exec.Command(",
+    "\"bash\", \"-c\", s)", "dangerouslySetInnerHTML", "requests.get(u, verify=False)",
+    "new Function(", "document.write(", "marshal.load (", "child_process.exec(x)",
+]
+
+
+def reference_touches(rule, text, start, end):
+    """The scan_hunks() condition, searched over the whole file."""
+    if rule.regex is None:
+        return False
+    pos = 0
+    while True:
+        m = rule.regex.search(text, pos)
+        if m is None or m.start() - rule.lookahead > end:
+            return False
+        if m.end() + rule.lookahead >= start:
+            return True
+        pos = m.start() + 1
+
+
+def reference_scan(scanner, path, text, hunks):
+    matches = []
+    for index, rule in enumerate(scanner.rules):
+        if rule.path_filter is not None and not rule.path_filter(path):
+            continue
+        matched = rule.path_check is not None and bool(rule.path_check(path))
+        if not matched and text:
+            for start, end in hunks:
+                for substring in rule.substrings:
+                    at = text.find(substring)
+                    while at != -1 and not matched:
+                        matched = at <= end and at + len(substring) >= start
+                        at = text.find(substring, at + 1)
+                if matched or reference_touches(rule, text, start, end):
+                    matched = True
+                    break
+        if matched:
+            matches.append(index)
+    return matches
+
+
+def random_text(rng, lines):
+    parts = []
+    for _ in range(lines):
+        parts.append(rng.choice(LINES) if rng.random() < 0.7 else rng.choice(PIECES) + rng.choice(["", "\n"]))
+    return "".join(parts)
+
+
+def check(cases, rng):
+    scanner = hook._pattern_scanner()
+    widened = narrowed = 0
+    for _ in range(cases):
+        path = rng.choice(PATHS)
+        before = random_text(rng, rng.randint(1, 40))
+        new_string = rng.choice(PIECES + LINES) if rng.random() < 0.8 else random_text(rng, 3)
+        at = rng.randint(0, len(before))
+        text = before[:at] + new_string + before[at:]
+        hunks = hook.edit_hunks(text, "Edit", {"new_string": new_string})
+        if hunks is None:
+            continue
+        got = scanner.scan_hunks(path, text, hunks)
+        expected = reference_scan(scanner, path, text, hunks)
+        if got != expected:
+            sys.exit(f"scan_hunks != full rescan on {path}: {text!r} hunks={hunks}\n"
+                     f"  got {got}, expected {expected}")
+        alone = set(scanner.scan_indices(path, new_string))
+        widened += bool(set(got) - alone)
+        narrowed += bool(alone - set(got))
+    return widened, narrowed
+
+
+def timed(fn, iterations=5):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=15)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    widened, narrowed = check(args.cases, rng)
+    print(f"{args.cases} random edits: scan_hunks equals the full-file check; vs new_string "
+          f"alone, {widened} gained a match and {narrowed} lost one to context")
+
+    scanner = hook._pattern_scanner()
+    text = "".join(rng.choice(LINES) for _ in range(120000))
+    new_string = "    rows = pickle.loads(blob)\n"
+    at = text.index("\n", len(text) // 2) + 1
+    text = text[:at] + new_string + text[at:]
+    hunks = hook.edit_hunks(text, "Edit", {"new_string": new_string})
+    path = "pkg/loader.py"
+    print(f"one-line Edit to a {len(text) / 1e6:.1f} MB file:")
+    print(f"  full-file scan     {timed(lambda: scanner.scan_indices(path, text)):8.2f} ms")
+    print(f"  new_string only    {timed(lambda: scanner.scan_indices(path, new_string)):8.2f} ms")
+    print(f"  scan_hunks         {timed(lambda: scanner.scan_hunks(path, text, hunks)):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
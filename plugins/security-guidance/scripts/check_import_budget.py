@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Check that the Edit/Write hook path stays off the LLM/HTTP/SDK imports, and time startup.
+
+Usage:
+    python3 scripts/check_import_budget.py [--runs 10]
+
+Runs hooks/dispatch.py (what hooks.json invokes) under `python -X importtime`
+on Edit, MultiEdit, Write and NotebookEdit PostToolUse payloads, in a
+throwaway state dir and project, and fails if any of FORBIDDEN is imported
+on that path. A UserPromptSubmit run checks the other direction: dispatch
+must hand it to security_reminder_hook. Then compares, for the same Edit
+payload, dispatch.py against running security_reminder_hook.py directly
+(the old entrypoint): total import time as reported by -X importtime, and
+wall-clock time of the whole hook process.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+DISPATCH = os.path.join(HOOKS, "dispatch.py")
+FULL = os.path.join(HOOKS, "security_reminder_hook.py")
+
+# Modules an edit's hook process must never import
+FORBIDDEN = {
+    "security_reminder_hook", "llm", "review_api", "claude_agent_sdk",
+    "urllib.request", "http.client", "ssl", "email", "asyncio",
+}
+
+CONTENT = "import pickle\n\ndef load(blob):\n    rows = pickle.loads(blob)\n    return rows\n"
+
+
+def payloads(project):
+    path = os.path.join(project, "loader.py")
+    notebook = os.path.join(project, "analysis.ipynb")
+    base = {"session_id": "import-budget", "cwd": project, "hook_event_name": "PostToolUse"}
+    return [
+        ("Edit", {**base, "tool_name": "Edit", "tool_input": {
+            "file_path": path, "old_string": "rows = []", "new_string": "rows = pickle.loads(blob)"}}),
+        ("MultiEdit", {**base, "tool_name": "MultiEdit", "tool_input": {
+            "file_path": path, "edits": [{"old_string": "x", "new_string": "return rows"}]}}),
+        ("Write", {**base, "tool_name": "Write", "tool_input": {"file_path": path, "content": CONTENT}}),
+        ("NotebookEdit", {**base, "tool_name": "NotebookEdit", "tool_input": {
+            "notebook_path": notebook, "new_source": "print(1)"}}),
+    ]
+
+
+def run_hook(script, payload, env, importtime=True):
+    """(imported module names, total import µs, wall ms, stdout) of one hook run."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + [script]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, input=json.dumps(payload), capture_output=True, text=True, env=env)
+    wall = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        sys.exit(f"{os.path.basename(script)} exited {proc.returncode}:\n{proc.stderr[-2000:]}")
+    modules = set()
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):  # top-level import: cumulative covers its children
+            total_us += int(cumulative)
+    return modules, total_us, wall, proc.stdout
+
+
+def median_run(script, payload, env, runs):
+    imports, walls = [], []
+    for _ in range(runs):
+        _, total_us, _, _ = run_hook(script, payload, env)
+        imports.append(total_us / 1000)
+        walls.append(run_hook(script, payload, env, importtime=False)[2])
+    return statistics.median(imports), statistics.median(walls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sg-import-") as tmp:
+        state_dir = os.path.join(tmp, "state")
+        project = os.path.join(tmp, "project")
+        os.makedirs(state_dir)
+        os.makedirs(project)
+        with open(os.path.join(project, "loader.py"), "w") as f:
+            f.write(CONTENT)
+        # A fresh throttle file keeps PostToolUse from spawning the SDK venv build
+        open(os.path.join(state_dir, ".sdk_bootstrap_spawned"), "w").close()
+        env = {**os.environ, "SECURITY_WARNINGS_STATE_DIR": state_dir,
+               "CLAUDE_PROJECT_DIR": project, "PYTHONDONTWRITEBYTECODE": "1"}
+        env.pop("SECURITY_GUIDANCE_DEBUG_LOG", None)
+        env.pop("PYTHONPATH", None)
+
+        edits = payloads(project)
+        for tool, payload in edits:
+            modules, total_us, _, stdout = run_hook(DISPATCH, payload, env)
+            leaked = sorted(m for m in modules if m in FORBIDDEN or m.split(".")[0] in FORBIDDEN)
+            if leaked:
+                sys.exit(f"{tool} PostToolUse imported {', '.join(leaked)}")
+            if tool in ("Edit", "Write") and "pattern_hits" not in stdout:
+                sys.exit(f"{tool} PostToolUse didn't report its pickle match: {stdout!r}")
+            print(f"{tool:<13} ok: {len(modules)} modules, {total_us / 1000:.1f} ms of imports")
+
+        prompt = {"session_id": "import-budget", "cwd": project, "hook_event_name": "UserPromptSubmit"}
+        if "security_reminder_hook" not in run_hook(DISPATCH, prompt, env)[0]:
+            sys.exit("UserPromptSubmit didn't reach security_reminder_hook")
+        print("UserPromptSubmit ok: routed to security_reminder_hook")
+
+        edit = edits[0][1]
+        print(f"\nEdit PostToolUse, median of {args.runs} cold processes:")
+        print(f"{'entrypoint':<28}{'imports':>10}{'wall':>12}")
+        for label, script in (("security_reminder_hook.py", FULL), ("dispatch.py", DISPATCH)):
+            imports, wall = median_run(script, edit, env, args.runs)
+            print(f"{label:<28}{imports:7.1f} ms{wall:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
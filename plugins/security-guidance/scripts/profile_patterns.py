@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Profile the pattern rules over a directory tree or a git history range.
+
+Usage:
+    python3 scripts/profile_patterns.py --tree DIR [--user-patterns] [--format json|text]
+    python3 scripts/profile_patterns.py --git RANGE [--repo DIR] [--user-patterns]
+
+Runs check_patterns() on every text file under DIR (skipping .git,
+node_modules and other vendored dirs), or on every blob added or modified
+by the commits in RANGE (e.g. v1.2.0..HEAD; each distinct blob once), as
+a Write of that file would. Per rule it reports:
+
+  - files: files that passed the rule's path_filter; hits and hit_rate
+  - doc_hits: hits on _DOC_EXTS files (.md, .json, .yaml, ...), where a
+    match is usually prose or config mentioning the API, not a call
+  - total_ms / mean_us / p99_us: time to check that rule alone, per file
+  - never_matching_exts: for a rule with a path_filter, extensions it let
+    through on at least --min-files files without a single hit
+
+plus the combined check_patterns() time per file, as JSON (default) with
+the plugin version and rule-set digest, so runs on the same corpus can be
+diffed across plugin versions. --user-patterns adds the
+security-patterns.* rules that apply to DIR (or --repo).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks"))
+import extensibility  # noqa: E402
+from _base import _PV  # noqa: E402
+from edit_hook import _pattern_scanner, check_patterns  # noqa: E402
+from pattern_scanner import PatternScanner  # noqa: E402
+from patterns import _DOC_EXTS, _RULE_NAME_TO_ID, SECURITY_PATTERNS  # noqa: E402
+
+SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__", "dist", "build", ".tox", "vendor"}
+
+
+def _text(raw, max_bytes):
+    if len(raw) > max_bytes or b"\0" in raw[:8192]:
+        return None
+    return raw.decode("utf-8", "replace")
+
+
+def tree_files(root, max_bytes):
+    """(relative path, content) for each text file under root."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            try:
+                with open(path, "rb") as f:
+                    content = _text(f.read(max_bytes + 1), max_bytes)
+            except OSError:
+                continue
+            if content is not None:
+                yield os.path.relpath(path, root).replace(os.sep, "/"), content
+
+
+def git_files(repo, rev_range, max_bytes):
+    """(path, content) for each distinct blob added or modified in rev_range."""
+    # -z: each entry is ":<modes> <shas> <status>" and the path, NUL
+    # terminated, and the path is never quoted (a name with a tab, quote or
+    # non-ASCII byte would otherwise come back C-quoted)
+    log = subprocess.run(
+        ["git", "-C", repo, "log", "-z", "--format=", "--raw", "--no-abbrev", "--no-renames",
+         "--diff-filter=AM", rev_range],
+        capture_output=True, check=True).stdout
+    blobs = {}
+    fields = log.split(b"\0")
+    i = 0
+    while i < len(fields) - 1:
+        meta = fields[i].lstrip(b"\n").split()
+        if len(meta) < 5 or not meta[0].startswith(b":"):
+            i += 1
+            continue
+        sha = meta[3].decode()
+        if sha not in blobs and meta[1] != b"160000":
+            blobs[sha] = fields[i + 1].decode("utf-8", errors="replace")
+        i += 2
+    if not blobs:
+        return
+    proc = subprocess.Popen(["git", "-C", repo, "cat-file", "--batch"],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        for sha, path in blobs.items():
+            proc.stdin.write(sha.encode() + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().split()
+            if len(header) != 3:
+                continue
+            raw = proc.stdout.read(int(header[2]) + 1)[:-1]
+            content = _text(raw, max_bytes)
+            if content is not None:
+                yield path, content
+    finally:
+        proc.stdin.close()
+        proc.wait()
+
+
+def _ext(path):
+    return os.path.splitext(path)[1].lower() or "(none)"
+
+
+def _p99(samples):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[98]
+
+
+def profile(files, min_files):
+    scanner = _pattern_scanner()
+    # One unbudgeted scanner per rule, built from the same pattern dicts as
+    # the combined one, so a slow user regex shows its full cost
+    singles = [PatternScanner([pattern]) for pattern in list(SECURITY_PATTERNS) + extensibility.user_patterns()]
+    stats = [{"files": 0, "hits": 0, "doc_hits": 0, "times": [], "exts": {}} for _ in singles]
+    combined, total_bytes, count = [], 0, 0
+    for path, content in files:
+        count += 1
+        total_bytes += len(content)
+        start = time.perf_counter()
+        expected = {name for name, _ in check_patterns(path, content)}
+        combined.append((time.perf_counter() - start) * 1e6)
+        ext, is_doc = _ext(path), path.endswith(_DOC_EXTS)
+        for single, rule_stats in zip(singles, stats):
+            rule = single.rules[0]
+            start = time.perf_counter()
+            hit = bool(single.scan_indices(path, content))
+            rule_stats["times"].append((time.perf_counter() - start) * 1e6)
+            if rule.path_filter is not None:
+                try:
+                    if not rule.path_filter(path):
+                        continue
+                except Exception:
+                    continue
+            rule_stats["files"] += 1
+            per_ext = rule_stats["exts"].setdefault(ext, [0, 0])
+            per_ext[0] += 1
+            if hit != (rule.name in expected) and rule.name not in scanner.over_budget:
+                sys.exit(f"{rule.name} alone disagrees with check_patterns() on {path}")
+            if hit:
+                rule_stats["hits"] += 1
+                rule_stats["doc_hits"] += is_doc
+                per_ext[1] += 1
+
+    rules = []
+    for single, rule_stats in zip(singles, stats):
+        rule = single.rules[0]
+        times = rule_stats["times"]
+        never = {}
+        if rule.path_filter is not None:
+            never = {ext: n for ext, (n, hits) in sorted(rule_stats["exts"].items())
+                     if hits == 0 and n >= min_files}
+        rules.append({
+            "rule": rule.name,
+            "rule_id": int(_RULE_NAME_TO_ID[rule.name]) if rule.name in _RULE_NAME_TO_ID else None,
+            "path_filter": rule.path_filter is not None,
+            "files": rule_stats["files"],
+            "hits": rule_stats["hits"],
+            "hit_rate": round(rule_stats["hits"] / rule_stats["files"], 6) if rule_stats["files"] else 0.0,
+            "doc_hits": rule_stats["doc_hits"],
+            "total_ms": round(sum(times) / 1000, 3),
+            "mean_us": round(statistics.mean(times), 3) if times else 0.0,
+            "p99_us": round(_p99(times), 3),
+            "never_matching_exts": never,
+        })
+    return {
+        "plugin_version": _PV,
+        "rule_set_version": scanner.version,
+        "files": count,
+        "bytes": total_bytes,
+        "check_patterns": {
+            "total_ms": round(sum(combined) / 1000, 3),
+            "mean_us": round(statistics.mean(combined), 3) if combined else 0.0,
+            "p99_us": round(_p99(combined), 3),
+        },
+        "rules": rules,
+    }
+
+
+def print_text(report, out):
+    out.write(f"{report['files']} files, {report['bytes'] / 1e6:.1f} MB; check_patterns "
+              f"{report['check_patterns']['total_ms']:.0f} ms total, "
+              f"p99 {report['check_patterns']['p99_us']:.0f} us/file\n")
+    out.write(f"{'rule':<30}{'files':>8}{'hits':>7}{'rate':>8}{'docs':>6}"
+              f"{'total ms':>10}{'p99 us':>9}  never-matching exts\n")
+    for rule in sorted(report["rules"], key=lambda r: -r["total_ms"]):
+        never = " ".join(f"{ext}({n})" for ext, n in rule["never_matching_exts"].items())
+        out.write(f"{rule['rule']:<30}{rule['files']:>8}{rule['hits']:>7}{rule['hit_rate']:>8.3f}"
+                  f"{rule['doc_hits']:>6}{rule['total_ms']:>10.1f}{rule['p99_us']:>9.1f}  {never}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tree", help="directory to scan")
+    source.add_argument("--git", metavar="RANGE", help="revision range whose added/modified blobs to scan")
+    parser.add_argument("--repo", default=".", help="repository for --git (default: .)")
+    parser.add_argument("--user-patterns", action="store_true",
+                        help="include the security-patterns.* rules for the tree/repo")
+    parser.add_argument("--max-bytes", type=int, default=5 * 1024 * 1024,
+                        help="skip files larger than this (default 5 MB)")
+    parser.add_argument("--min-files", type=int, default=20,
+                        help="files of one extension a rule must see before it's flagged (default 20)")
+    parser.add_argument("--format", choices=("json", "text"), default="json")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.tree or args.repo)
+    if args.user_patterns:
+        extensibility.load_for_session(root)
+    if args.tree:
+        files = tree_files(root, args.max_bytes)
+    else:
+        files = git_files(root, args.git, args.max_bytes)
+    report = profile(files, args.min_files)
+    report["source"] = {"tree": root} if args.tree else {"repo": root, "range": args.git}
+    report["user_patterns"] = len(extensibility.user_patterns())
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(report, out, indent=2)
+            out.write("\n")
+        else:
+            print_text(report, out)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()